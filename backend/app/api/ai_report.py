@@ -1,18 +1,60 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.core.supabase_client import supabase
-from app.api.matching import match_diensten_enhanced
+from app.api.matching import session_preferences, match_from_session
+import asyncio
 import logging
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional
 from datetime import datetime
-import anthropic
+import time
+from app.core.llm_gateway import llm_gateway
+from app.core.model_router import model_router
+from app.services.llm_cache import llm_cache
+from app.services.report_jobs import report_jobs
+from app.utils.streaming import SSE_HEADERS, sse_event, iter_lines, iter_markdown_sections
 
 router = APIRouter(tags=["ai-report"])
 
-# Initialize Claude client
-claude_client = anthropic.Anthropic(
-    api_key=os.getenv("ANTHROPIC_API_KEY")
-)
+# Prompt template versies: verhogen bij elke wijziging aan build_claude_prompt / build_insights_prompt
+# (of aan hoe het antwoord gebruikt wordt) zodat gecachte antwoorden niet meer gebruikt worden
+REPORT_PROMPT_VERSION = "1"
+INSIGHTS_PROMPT_VERSION = "1"
+
+async def cached_completion(prompt: str, route: str, template_version: str, deadline: Optional[float] = None) -> str:
+    """
+    Claude completion via de persistente response cache (enkel echte Claude antwoorden worden bewaard).
+    Model en timeout komen van de model router (latency budget van de route); gooit asyncio.TimeoutError
+    vlak voor de deadline zodat de caller nog zijn fallback kan teruggeven.
+    De cache wordt eerst geraadpleegd (een hit telt niet als routing beslissing): het antwoord van de
+    voorkeur tier, en dat van een snellere tier enkel als de router nu toch zou downgraden.
+    """
+    cached = await llm_cache.get_any(prompt, model_router.candidates(route, prompt, deadline), template_version)
+    if cached is not None:
+        logging.info("💾 Claude antwoord uit de cache")
+        return cached
+    
+    params, timeout = model_router.plan(route, prompt, deadline)
+    start = time.perf_counter()
+    response_text = await model_router.complete(route, prompt, params, timeout)
+    await llm_cache.put(prompt, params, template_version, response_text, time.perf_counter() - start)
+    return response_text
+
+async def cached_stream(prompt: str, route: str, template_version: str, deadline: Optional[float] = None) -> AsyncIterator[str]:
+    """Zelfde als cached_completion, maar als stream: een cache hit komt in één stuk, een miss wordt na afloop bewaard"""
+    cached = await llm_cache.get_any(prompt, model_router.candidates(route, prompt, deadline), template_version)
+    if cached is not None:
+        logging.info("💾 Claude antwoord uit de cache")
+        yield cached
+        return
+    
+    params, timeout = model_router.plan(route, prompt, deadline)
+    start = time.perf_counter()
+    chunks = []
+    async for chunk in model_router.stream(route, prompt, params, timeout):
+        chunks.append(chunk)
+        yield chunk
+    await llm_cache.put(prompt, params, template_version, "".join(chunks), time.perf_counter() - start)
 
 @router.post("/generate-ai-report")
 async def generate_ai_report(user_preferences: Dict[str, Any]):
@@ -20,34 +62,144 @@ async def generate_ai_report(user_preferences: Dict[str, Any]):
     Generate AI-powered personalized investment report using Claude
     """
     try:
-        logging.info(f"Generating AI report for preferences: {user_preferences}")
-        
-        # 1. Get matches using existing enhanced matching
-        matches_response = await match_diensten_enhanced(user_preferences)
-        
-        if not matches_response.get("success") or not matches_response.get("matches"):
-            raise HTTPException(status_code=400, detail="No matches found for report generation")
-        
-        # 2. Build context for LLM
-        context = build_report_context(matches_response, user_preferences)
-        
-        # 3. Generate report content with Claude
-        report_content = await generate_claude_report(context)
-        
-        # 4. Generate PDF (disabled for now)
-        # pdf_url = await generate_pdf_report(report_content, user_preferences)
-        pdf_url = None  # Temporarily disabled
-        
-        return {
-            "success": True,
-            "report_url": pdf_url,  # Will be None
-            "report_content": report_content,
-            "generated_at": datetime.now().isoformat()
-        }
-        
+        return await build_ai_report(user_preferences)
+    except Exception as e:
+        logging.error(f"Error generating AI report: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"AI report generation error: {str(e)}")
+
+async def build_ai_report(user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Match + context + Claude rapport (gedeeld door /generate-ai-report en de rapport job queue)"""
+    deadline = model_router.deadline("report")
+    result_id = user_preferences.get("result_id")
+    user_preferences = await session_preferences(result_id, user_preferences)
+    logging.info(f"Generating AI report for preferences: {user_preferences}")
+    
+    # 1. Get matches using existing enhanced matching (vanaf de match sessie als er een result_id is)
+    matches_response = await match_from_session(result_id, user_preferences)
+    
+    if not matches_response.get("success") or not matches_response.get("matches"):
+        raise HTTPException(status_code=400, detail="No matches found for report generation")
+    
+    # 2. Build context for LLM
+    context = build_report_context(matches_response, user_preferences)
+    
+    # 3. Generate report content with Claude (template rapport als het budget op is)
+    report_content = await generate_claude_report(context, deadline)
+    
+    # 4. Generate PDF (disabled for now)
+    # pdf_url = await generate_pdf_report(report_content, user_preferences)
+    pdf_url = None  # Temporarily disabled
+    
+    return {
+        "success": True,
+        "report_url": pdf_url,  # Will be None
+        "report_content": report_content,
+        "generated_at": datetime.now().isoformat()
+    }
+
+report_jobs.register("ai_report", build_ai_report)
+
+@router.post("/reports/jobs")
+async def create_report_job(request_data: Dict[str, Any]):
+    """
+    Rapport generatie als achtergrond job: geeft meteen een job_id terug (binnen de 10s frontend timeout).
+    Body: {"preferences": {...}, "priority": 0} of rechtstreeks de voorkeuren zoals bij /generate-ai-report.
+    """
+    priority = request_data.get("priority", 0)
+    if not isinstance(priority, int):
+        raise HTTPException(status_code=400, detail="priority moet een geheel getal zijn")
+    user_preferences = request_data.get("preferences")
+    if user_preferences is None:
+        user_preferences = {key: value for key, value in request_data.items() if key != "priority"}
+    
+    job_id = await report_jobs.submit("ai_report", user_preferences, priority)
+    logging.info(f"📥 Rapport job {job_id} aangemaakt (prioriteit {priority})")
+    return {"success": True, "job_id": job_id, "status": "queued", "status_url": f"/api/reports/jobs/{job_id}"}
+
+@router.get("/reports/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    """Status van een rapport job (queued/running/done/failed), met result zodra hij klaar is"""
+    job = await report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rapport job niet gevonden")
+    return {"success": True, **job}
+
+@router.get("/report-jobs-stats")
+async def get_report_jobs_stats():
+    """Queue diepte, wachttijd en uitvoeringstijd van de rapport job queue"""
+    return {"success": True, **(await report_jobs.stats())}
+
+@router.post("/generate-ai-report-stream")
+async def generate_ai_report_stream(user_preferences: Dict[str, Any]):
+    """
+    Streaming variant van /generate-ai-report (server-sent events):
+    - event 'context': matches + report context, meteen na het matchen
+    - event 'section': elke markdown sectie zodra de volgende header begint
+    - event 'done': volledige report_content (zelfde velden als /generate-ai-report)
+    """
+    deadline = model_router.deadline("report")
+    try:
+        result_id = user_preferences.get("result_id")
+        user_preferences = await session_preferences(result_id, user_preferences)
+        matches_response = await match_from_session(result_id, user_preferences)
     except Exception as e:
         logging.error(f"Error generating AI report: {str(e)}")
         raise HTTPException(status_code=500, detail=f"AI report generation error: {str(e)}")
+    
+    if not matches_response.get("success") or not matches_response.get("matches"):
+        raise HTTPException(status_code=400, detail="No matches found for report generation")
+    
+    context = build_report_context(matches_response, user_preferences)
+    return StreamingResponse(stream_report_events(matches_response, context, deadline),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def single_chunk(text: str) -> AsyncIterator[str]:
+    yield text
+
+async def stream_report_events(matches_response: Dict[str, Any], context: Dict[str, Any],
+                               deadline: Optional[float] = None) -> AsyncIterator[str]:
+    """SSE frames voor het rapport; valt terug op het template rapport als Claude faalt vóór de eerste sectie"""
+    yield sse_event("context", {
+        "matches": matches_response["matches"],
+        "total_found": matches_response.get("total_found"),
+        "context": context
+    })
+    
+    chunks = []
+    async def recorded(stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+    
+    sent_sections = 0
+    try:
+        stream = recorded(cached_stream(build_claude_prompt(context), "report", REPORT_PROMPT_VERSION, deadline))
+        async for section in iter_markdown_sections(stream):
+            sent_sections += 1
+            yield sse_event("section", section)
+        report_content = "".join(chunks)
+        logging.info("Successfully streamed Claude report")
+    except Exception as e:
+        logging.error(f"Error streaming Claude report: {str(e)}")
+        if sent_sections:
+            yield sse_event("error", {"detail": f"AI report generation error: {str(e)}"})
+            return
+        # Fallback to template-based report
+        try:
+            report_content = generate_fallback_report(context)
+        except Exception as fallback_error:
+            logging.error(f"Error generating fallback report: {str(fallback_error)}")
+            yield sse_event("error", {"detail": f"AI report generation error: {str(fallback_error)}"})
+            return
+        async for section in iter_markdown_sections(single_chunk(report_content)):
+            yield sse_event("section", section)
+    
+    yield sse_event("done", {
+        "success": True,
+        "report_url": None,
+        "report_content": report_content,
+        "generated_at": datetime.now().isoformat()
+    })
 
 def build_report_context(matches_response: Dict[str, Any], user_preferences: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -178,27 +330,15 @@ def generate_match_insights(match: Dict[str, Any], priority_analysis: Dict[str,
     
     return insights
 
-async def generate_claude_report(context: Dict[str, Any]) -> str:
-    """Generate personalized report using Claude"""
+async def generate_claude_report(context: Dict[str, Any], deadline: Optional[float] = None) -> str:
+    """Generate personalized report using Claude (template rapport bij fouten of als de deadline nadert)"""
     
     # Build the prompt
     prompt = build_claude_prompt(context)
     
     try:
-        # Call Claude API
-        response = claude_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2000,
-            temperature=0.3,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-        
-        report_content = response.content[0].text
+        # Call Claude API (async gateway: blokkeert de event loop niet)
+        report_content = await cached_completion(prompt, "report", REPORT_PROMPT_VERSION, deadline)
         logging.info("Successfully generated Claude report")
         return report_content
         
@@ -368,11 +508,13 @@ async def generate_ai_insights(request_data: Dict[str, Any]):
     Generate quick AI insights for Results page preview
     Lighter version of full report for faster loading
     """
+    deadline = model_router.deadline("insights")
     try:
         print("🔥🔥🔥 AI INSIGHTS ENDPOINT CALLED!")
         print(f"📊 Request data: {request_data}")
         
-        user_preferences = request_data
+        result_id = request_data.get("result_id")
+        user_preferences = await session_preferences(result_id, request_data)
         matches = request_data.get("matches", [])
         
         print(f"🎯 User preferences: {user_preferences}")
@@ -381,8 +523,8 @@ async def generate_ai_insights(request_data: Dict[str, Any]):
         
         if not matches:
             print("⚠️ No matches provided, getting from enhanced matching...")
-            # Get matches if not provided
-            matches_response = await match_diensten_enhanced(user_preferences)
+            # Get matches if not provided (vanaf de match sessie als er een result_id is)
+            matches_response = await match_from_session(result_id, user_preferences)
             matches = matches_response.get("matches", [])[:3]  # Top 3 only
             print(f"🔄 Got {len(matches)} matches from enhanced matching")
         
@@ -401,7 +543,7 @@ async def generate_ai_insights(request_data: Dict[str, Any]):
         
         # Generate quick insights with Claude
         print("🤖 Generating Claude insights...")
-        insights = await generate_claude_insights(insights_context)
+        insights = await generate_claude_insights(insights_context, deadline)
         print(f"✅ Final insights: {insights}")
         
         return {
@@ -419,6 +561,65 @@ async def generate_ai_insights(request_data: Dict[str, Any]):
             "insights": generate_fallback_insights(matches if 'matches' in locals() else [], user_preferences if 'user_preferences' in locals() else {})
         }
 
+@router.post("/generate-ai-insights-stream")
+async def generate_ai_insights_stream(request_data: Dict[str, Any]):
+    """
+    Streaming variant van /generate-ai-insights (server-sent events):
+    - event 'context': matches + insights context
+    - event 'section': {"section": key_insight|trade_offs|priority_analysis, "text": ...} zodra de sectie af is
+    - event 'done': de volledige insights dict (zelfde als /generate-ai-insights)
+    """
+    deadline = model_router.deadline("insights")
+    user_preferences = request_data
+    matches = request_data.get("matches", [])
+    try:
+        result_id = request_data.get("result_id")
+        user_preferences = await session_preferences(result_id, request_data)
+        if not matches:
+            matches_response = await match_from_session(result_id, user_preferences)
+            matches = matches_response.get("matches", [])[:3]  # Top 3 only
+        insights_context = build_insights_context(matches, user_preferences)
+    except Exception as e:
+        logging.error(f"Error in generate_ai_insights_stream: {str(e)}")
+        insights_context = None
+    
+    return StreamingResponse(stream_insights_events(matches, user_preferences, insights_context, deadline),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def stream_insights_events(matches: List[Dict[str, Any]], user_preferences: Dict[str, Any],
+                                 insights_context, deadline: Optional[float] = None) -> AsyncIterator[str]:
+    """SSE frames voor de insights: elke sectie wordt verstuurd zodra de header van de volgende binnen is"""
+    yield sse_event("context", {"matches": matches, "context": insights_context})
+    
+    sent = {}
+    if insights_context is None:
+        insights = generate_fallback_insights(matches, user_preferences)
+    elif not insights_context:
+        insights = generate_default_insights()
+    else:
+        lines = []
+        try:
+            stream = cached_stream(build_insights_prompt(insights_context), "insights", INSIGHTS_PROMPT_VERSION, deadline)
+            async for line in iter_lines(stream):
+                # Nieuwe header = alle vorige secties zijn compleet
+                if insight_section_for(line.strip()):
+                    for section, text in parse_insight_sections("\n".join(lines)).items():
+                        if section not in sent:
+                            sent[section] = text
+                            yield sse_event("section", {"section": section, "text": text})
+                lines.append(line)
+            insights = parse_insights_response("\n".join(lines))
+        except Exception as e:
+            logging.error(f"Error streaming Claude insights: {str(e)}")
+            # Use fallback with the improved context (reeds verstuurde secties blijven staan)
+            insights = {**generate_fallback_insights_from_context(insights_context), **sent}
+    
+    for section, text in insights.items():
+        if section not in sent:
+            yield sse_event("section", {"section": section, "text": text})
+    
+    yield sse_event("done", {"success": True, "insights": insights})
+
 
 def build_insights_context(matches: List[Dict[str, Any]], user_preferences: Dict[str, Any]) -> Dict[str, Any]:
     """Build lightweight context for quick insights with detailed analysis"""
@@ -640,8 +841,8 @@ STIJL:
     print(f"✅ DEBUG - Final prompt built, length: {len(prompt)}")
     return prompt
     
-async def generate_claude_insights(context: Dict[str, Any]) -> Dict[str, str]:
-    """Generate quick insights using Claude with improved context"""
+async def generate_claude_insights(context: Dict[str, Any], deadline: Optional[float] = None) -> Dict[str, str]:
+    """Generate quick insights using Claude with improved context (fallback bij fouten of als de deadline nadert)"""
     
     if not context:
         return generate_default_insights()
@@ -653,19 +854,7 @@ async def generate_claude_insights(context: Dict[str, Any]) -> Dict[str, str]:
     print(f"🔍 Prompt preview: {prompt[:200]}...")
     
     try:
-        response = claude_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=800,  # INCREASED from 500!
-            temperature=0.3,
-            messages=[
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ]
-        )
-        
-        insights_text = response.content[0].text
+        insights_text = await cached_completion(prompt, "insights", INSIGHTS_PROMPT_VERSION, deadline)
         print(f"🤖 Claude API response: {insights_text}")  # ADD DEBUG
         
         # Parse the structured response
@@ -678,8 +867,18 @@ async def generate_claude_insights(context: Dict[str, Any]) -> Dict[str, str]:
         # Use fallback with the improved context
         return generate_fallback_insights_from_context(context)
     
-def parse_insights_response(insights_text: str) -> Dict[str, str]:
-    """Parse human-style insights from Claude response"""
+def insight_section_for(line: str):
+    """Welke insights sectie begint op deze (gestripte) regel - None als het geen header is"""
+    if line.startswith('1.') and 'bevinding' in line.lower():
+        return 'key_insight'
+    if line.startswith('2.') and ('dilemma' in line.lower() or 'keuze' in line.lower()):
+        return 'trade_offs'
+    if line.startswith('3.') and ('opviel' in line.lower() or 'prioriteit' in line.lower()):
+        return 'priority_analysis'
+    return None
+
+def parse_insight_sections(insights_text: str) -> Dict[str, str]:
+    """De drie genummerde secties uit een (eventueel nog onvolledig) Claude antwoord halen"""
     
     insights = {}
     
@@ -692,25 +891,14 @@ def parse_insights_response(insights_text: str) -> Dict[str, str]:
         line = line.strip()
         
         # Look for the three section headers
-        if line.startswith('1.') and 'bevinding' in line.lower():
+        section = insight_section_for(line)
+        if section:
             if current_section and current_text:
                 insights[current_section] = ' '.join(current_text).strip()
-            current_section = 'key_insight'
+            current_section = section
             # Extract text after the header
             text_part = line.split(':', 1)[-1].strip() if ':' in line else ''
             current_text = [text_part] if text_part else []
-        elif line.startswith('2.') and ('dilemma' in line.lower() or 'keuze' in line.lower()):
-            if current_section and current_text:
-                insights[current_section] = ' '.join(current_text).strip()
-            current_section = 'trade_offs'
-            text_part = line.split(':', 1)[-1].strip() if ':' in line else ''
-            current_text = [text_part] if text_part else []
-        elif line.startswith('3.') and ('opviel' in line.lower() or 'prioriteit' in line.lower()):
-            if current_section and current_text:
-                insights[current_section] = ' '.join(current_text).strip()
-            current_section = 'priority_analysis'
-            text_part = line.split(':', 1)[-1].strip() if ':' in line else ''
-            current_text = [text_part] if text_part else []
         elif line and current_section:
             # Continue building current section
             current_text.append(line)
@@ -719,6 +907,13 @@ def parse_insights_response(insights_text: str) -> Dict[str, str]:
     if current_section and current_text:
         insights[current_section] = ' '.join(current_text).strip()
     
+    return insights
+
+def parse_insights_response(insights_text: str) -> Dict[str, str]:
+    """Parse human-style insights from Claude response"""
+    
+    insights = parse_insight_sections(insights_text)
+    
     # Fallback if parsing failed
     if not insights:
         # Try simpler parsing - just split by numbers
@@ -837,94 +1032,11 @@ def generate_pdf_report(report_content: str, user_preferences: Dict[str, Any]) -
 
 # Voeg dit toe aan je ai_report.py (GEEN namen veranderen!)
 
-@router.post("/recalculate-matches")
-async def recalculate_matches(request_data: Dict[str, Any]):
-    """
-    Herbereken matches gebaseerd op iteratieve antwoorden
-    Gebruikt bestaande match_diensten_enhanced functie
-    """
-    try:
-        print("🔄 RECALCULATE MATCHES ENDPOINT CALLED!")
-        print(f"📊 Request data: {request_data}")
-        
-        # Haal originele user preferences op
-        original_preferences = request_data.get("original_preferences", {})
-        impacts = request_data.get("impacts", [])
-        
-        print(f"🎯 Original preferences: {original_preferences}")
-        print(f"💥 Impacts to apply: {impacts}")
-        
-        # Maak kopie van preferences om te modificeren
-        modified_preferences = original_preferences.copy()
-        
-        # Pas impacts toe
-        for impact in impacts:
-            print(f"🔧 Applying impact: {impact}")
-            
-            for key, value in impact.items():
-                if key.startswith('weight_'):
-                    # Converteer weight naar importance level
-                    priority_key = key.replace('weight_', '') + '_belangrijkheid'
-                    
-                    if value > 1.3:
-                        modified_preferences[priority_key] = 'heel_belangrijk'
-                        print(f"   ✅ Set {priority_key} to 'heel_belangrijk' (weight: {value})")
-                    elif value > 1.1:
-                        modified_preferences[priority_key] = 'zeer_belangrijk'
-                        print(f"   ✅ Set {priority_key} to 'zeer_belangrijk' (weight: {value})")
-                    elif value < 0.8:
-                        modified_preferences[priority_key] = 'niet_belangrijk'
-                        print(f"   ✅ Set {priority_key} to 'niet_belangrijk' (weight: {value})")
-                    elif value < 0.9:
-                        modified_preferences[priority_key] = 'geen_voorkeur'
-                        print(f"   ✅ Set {priority_key} to 'geen_voorkeur' (weight: {value})")
-                
-                elif key == 'preferred_match':
-                    # Voor toekomstige implementatie van match boosting
-                    print(f"   📌 User preferred match: {value}")
-                
-                elif key == 'lower_thresholds':
-                    # Verlaag drempelwaarden voor meer matches
-                    print(f"   🔽 Lower thresholds requested: {value}")
-                
-                elif key == 'expand_scope':
-                    # Breid zoekcriteria uit
-                    print(f"   🔍 Expand scope requested: {value}")
-                
-                elif key == 'restart_wizard':
-                    # Gebruiker wil wizard opnieuw starten
-                    print(f"   🔄 Restart wizard requested: {value}")
-                    return {
-                        "success": True,
-                        "action": "restart_wizard",
-                        "message": "Gebruiker wil wizard opnieuw starten"
-                    }
-        
-        print(f"🏁 Final modified preferences: {modified_preferences}")
-        
-        # Roep bestaande matching functie aan met gemodificeerde preferences
-        print("🎯 Calling match_diensten_enhanced with modified preferences...")
-        matches_response = await match_diensten_enhanced(modified_preferences)
-        
-        if not matches_response.get("success"):
-            raise HTTPException(status_code=400, detail="Herberekening van matches mislukt")
-        
-        print(f"✅ Recalculation successful! Found {len(matches_response.get('matches', []))} matches")
-        
-        return {
-            "success": True,
-            "matches": matches_response.get("matches", []),
-            "modified_preferences": modified_preferences,
-            "applied_impacts": impacts,
-            "total_found": matches_response.get("total_found", 0)
-        }
-        
-    except Exception as e:
-        print(f"❌ Error in recalculate_matches: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Herberekening error: {str(e)}")
-
+@router.get("/llm-gateway-stats")
+async def get_llm_gateway_stats():
+    """Queue diepte, concurrency en latency van de gedeelde Claude gateway + response cache + model routing"""
+    response_cache = await asyncio.to_thread(llm_cache.stats)
+    return {"success": True, **llm_gateway.stats(), "response_cache": response_cache, "routing": model_router.stats()}
 
 def detect_scenario_backend(matches: List[Dict], user_preferences: Dict) -> Dict:
     """
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from app.core.supabase_client import supabase
+from app.services.catalog import catalog
 import logging
 
 router = APIRouter(tags=["banks"])
@@ -8,8 +8,9 @@ router = APIRouter(tags=["banks"])
 async def get_all_banks():
     """Haal alle aanbieders op uit de database"""
     try:
-        # Query de aanbieders tabel
-        banks = await supabase.select("aanbieders", "*")
+        # Aanbieders uit de in-memory catalogus
+        snapshot = await catalog.get_snapshot()
+        banks = snapshot.rows("aanbieders")
         
         return {
             "success": True,
@@ -25,14 +26,15 @@ async def get_all_banks():
 async def get_bank_by_id(bank_id: int):
     """Haal specifieke aanbieder op via ID"""
     try:
-        banks = await supabase.select("aanbieders", f"*&aanbieder_id=eq.{bank_id}")
+        snapshot = await catalog.get_snapshot()
+        bank = snapshot.aanbieder(bank_id)
         
-        if not banks:
+        if not bank:
             raise HTTPException(status_code=404, detail="Aanbieder niet gevonden")
             
         return {
             "success": True,
-            "data": banks[0]
+            "data": bank
         }
     
     except HTTPException:
@@ -46,14 +48,15 @@ async def get_bank_by_id(bank_id: int):
     """Haal specifieke bank op via ID"""
     try:
         # FIX: gebruik aanbieder_id in plaats van id
-        banks = await supabase.select("aanbieders", f"*&aanbieder_id=eq.{bank_id}")
+        snapshot = await catalog.get_snapshot()
+        bank = snapshot.aanbieder(bank_id)
         
-        if not banks:
+        if not bank:
             raise HTTPException(status_code=404, detail="Bank niet gevonden")
             
         return {
             "success": True,
-            "data": banks[0]
+            "data": bank
         }
     
     except HTTPException:
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Header
+from app.services.catalog import catalog
+from typing import Optional
+import hmac
+import logging
+import os
+
+router = APIRouter(tags=["catalog"])
+
+CATALOG_ADMIN_TOKEN = os.getenv("CATALOG_ADMIN_TOKEN")
+
+@router.get("/status")
+async def get_catalog_status():
+    """Versie en grootte van de in-memory catalogus"""
+    snapshot = catalog.snapshot
+    return {
+        "success": True,
+        "loaded": snapshot is not None,
+        "ttl_seconds": catalog.ttl_seconds,
+        "last_error": catalog.last_error,
+        **(snapshot.summary() if snapshot else {})
+    }
+
+@router.post("/refresh")
+async def refresh_catalog(x_admin_token: Optional[str] = Header(None)):
+    """Admin trigger: catalogus onmiddellijk opnieuw laden uit Supabase"""
+    # Constante tijd vergelijking (als bytes: compare_digest weigert niet-ASCII str)
+    if not CATALOG_ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), CATALOG_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Niet toegestaan")
+
+    try:
+        snapshot = await catalog.refresh()
+        return {"success": True, **snapshot.summary()}
+    except Exception as e:
+        logging.error(f"Error bij verversen catalogus: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
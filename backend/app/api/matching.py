@@ -1,21 +1,281 @@
 from fastapi import APIRouter, HTTPException, Request
-from app.core.supabase_client import supabase
+from fastapi.responses import StreamingResponse
+from app.services.catalog import catalog
+from app.services.match_cache import match_cache
+from app.services.match_sessions import match_sessions
+from app.services.ranking_table import ranking_table
+from app.utils.scoring import (
+    CRITERIA, ScoreMatrix, get_weight, get_weights, calculate_percentile_scores, normalize_score,
+    calculate_weighted_score, score_to_match_percentage, match_percentages, rank_indices,
+    top_k_indices, apply_soft_preferences_ranked
+)
 import logging
 import statistics
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator
+import asyncio
+import functools
+import json
 import math
-from difflib import SequenceMatcher
+import os
+import numpy as np
 
-def is_similar_name(name_a, name_b, threshold=0.75):
-    """Vergelijkt twee namen op basis van gelijkenis, onafhankelijk van 'Bank', hoofdletters etc."""
-    def clean(s):
-        return s.lower().replace("bank", "").replace("belgië", "").strip()
+router = APIRouter(tags=["matching"])
+
+# Aantal matches dat volledig wordt opgebouwd en teruggegeven (endpoint / interne aanroepers met soft preferences)
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "30"))
+MATCH_SOFT_TOP_K = int(os.getenv("MATCH_SOFT_TOP_K", "10"))
+
+# Aantal profielen dat per keer samen gescoord en teruggestreamd wordt bij batch matching
+MATCH_BATCH_CHUNK_SIZE = int(os.getenv("MATCH_BATCH_CHUNK_SIZE", "256"))
+
+# Type mapping van gebruiker clusters naar database waarden
+TYPE_MAPPING = {
+    "Doe-het-zelf": ["Brokerage", "Execution Only"],
+    "Samen of laten beleggen": ["Adviserend beheer", "Vermogensbeheer"], 
+    "Pensioensparen": ["Pensioensparen"]
+}
+
+def select_catalog_diensten(snapshot, type_dienst, bank_filter) -> List[Dict[str, Any]]:
+    """
+    Filter actieve diensten uit de catalogus snapshot op type en bank filter.
+    Zelfde semantiek als de vroegere PostgREST filters (status=eq, in., not.in.)
+    """
+    db_types = TYPE_MAPPING.get(type_dienst) if type_dienst else None
+
+    include_banks = exclude_banks = None
+    if bank_filter:
+        filter_type = bank_filter.get('type')
+        banks = bank_filter.get('banks', [])
+        if filter_type == 'include' and banks:
+            include_banks = set(banks)
+            logging.info(f"🏦 INCLUDE filter toegepast: {banks}")
+        elif filter_type == 'exclude' and banks:
+            exclude_banks = set(banks)
+            logging.info(f"🏦 EXCLUDE filter toegepast: {banks}")
+
+    diensten = []
+    for dienst in snapshot.rows("diensten"):
+        if dienst.get("status") != "actief":
+            continue
+        if db_types is not None and dienst.get("type_aanbod") not in db_types:
+            continue
+        naam = dienst.get("naam_aanbieder")
+        if include_banks is not None and naam not in include_banks:
+            continue
+        # not.in. sluit in PostgREST ook NULL namen uit
+        if exclude_banks is not None and (naam is None or naam in exclude_banks):
+            continue
+        diensten.append(dienst)
+    return diensten
+
+def build_score_matrix(snapshot, type_dienst, bedrag, bank_filter) -> Optional[ScoreMatrix]:
+    """Stap 1-4: diensten filteren op type, banken en minimum bedrag + criteria matrix (None als er geen over zijn)"""
+    # Stap 1: Filter diensten op type, status en banken (uit de in-memory catalogus)
+    diensten = select_catalog_diensten(snapshot, type_dienst, bank_filter)
+    logging.info(f"Gevonden {len(diensten)} diensten van type {type_dienst}")
+    
+    # Stap 2: Filter op minimum bedrag
+    filtered_diensten = []
+    for dienst in diensten:
+        minimum = dienst.get("minimum")
+        if minimum is None or bedrag >= minimum:
+            filtered_diensten.append(dienst)
+    logging.info(f"Na bedrag filtering: {len(filtered_diensten)} diensten over")
     
-    return SequenceMatcher(None, clean(name_a), clean(name_b)).ratio() >= threshold
+    if not filtered_diensten:
+        return None
+    
+    # Stap 3-4: Criteria matrix met percentiel scores voor TCO en rendement
+    matrix = ScoreMatrix(
+        filtered_diensten,
+        snapshot.by_dienst("kosten"),
+        snapshot.by_dienst("functionaliteiten"),
+        snapshot.by_dienst("rendementen"),
+        snapshot.bank_index
+    )
+    logging.info(f"Data opgehaald voor {len(filtered_diensten)} diensten")
+    return matrix
 
-router = APIRouter(tags=["matching"])
+def resolve_score_matrix(snapshot, type_dienst, bedrag, bank_filter):
+    """
+    (matrix, population): de voorberekende populatie uit de ranking tabel als er geen bank filter
+    is, anders (of als de tabel nog niet klaar is) een live opgebouwde score matrix
+    """
+    if _canonical_bank_filter(bank_filter) is None:
+        population = ranking_table.lookup(snapshot, type_dienst if type_dienst in TYPE_MAPPING else None, bedrag)
+        if population is not None:
+            logging.info(f"📊 Ranking tabel: {len(population.matrix)} diensten van type {type_dienst} voor bedrag {bedrag}")
+            return population.matrix, population
+    return build_score_matrix(snapshot, type_dienst, bedrag, bank_filter), None
+
+async def rebuild_ranking_table(snapshot):
+    """Catalog listener (op de event loop): ranking tabel voor de nieuwe versie op de achtergrond voorberekenen"""
+    base_populations = {
+        type_key: select_catalog_diensten(snapshot, type_key, None)
+        for type_key in [None, *TYPE_MAPPING]
+    }
+    ranking_table.schedule_build(snapshot, base_populations)
+
+def _canonical_bank_filter(bank_filter) -> Optional[tuple]:
+    """Bank filter zonder effect -> None, anders (type, gesorteerde banken)"""
+    if not isinstance(bank_filter, dict):
+        return None
+    filter_type = bank_filter.get('type')
+    banks = bank_filter.get('banks', [])
+    if filter_type not in ('include', 'exclude', 'boost') or not banks:
+        return None
+    return (filter_type, tuple(sorted(str(bank) for bank in banks)))
+
+def match_cache_key(variant: str, user_preferences: Dict[str, Any], snapshot) -> Optional[tuple]:
+    """
+    Gecanonicaliseerde cache key voor een match aanvraag, of None als de aanvraag niet cachebaar is.
+    Belangrijkheden worden naar hun gewicht vertaald (heel_ en zeer_belangrijk delen een entry) en
+    bedrag naar de bucket tussen twee catalogus minimum drempels.
+    """
+    bedrag = user_preferences.get("bedrag", 0)
+    if not isinstance(bedrag, (int, float)):
+        return None
+
+    type_dienst = user_preferences.get("type_dienst")
+    soft_preferences = user_preferences.get("soft_preferences") or []
+    try:
+        soft_key = tuple(
+            (pref.get('action'), tuple(str(bank) for bank in pref.get('banks', [])))
+            for pref in soft_preferences
+        )
+    except AttributeError:
+        return None
+
+    return (
+        variant,
+        snapshot.version,
+        type_dienst if type_dienst in TYPE_MAPPING else None,
+        tuple(get_weights(user_preferences).values()),
+        snapshot.bedrag_bucket(bedrag),
+        _canonical_bank_filter(user_preferences.get("bank_filter")),
+        soft_key
+    )
+
+def echo_request_filters(response: Dict[str, Any], user_preferences: Dict[str, Any], defaults: Dict[str, Any]):
+    """Zet de filters_applied van een (gecachte) response terug op de voorkeuren van deze aanvraag"""
+    filters_applied = response.get("filters_applied")
+    if filters_applied is not None:
+        for field, default in defaults.items():
+            if field in filters_applied:
+                filters_applied[field] = user_preferences.get(field, default)
+    return response
+
+def cached_match(variant: str, echo_defaults: Dict[str, Any]):
+    """
+    Decorator: serveer herhaalde match aanvragen met equivalente voorkeuren uit de match cache.
+    echo_defaults: velden uit filters_applied die letterlijk uit de aanvraag komen + hun default
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(user_preferences: Dict[str, Any]):
+            return await serve_cached_match(variant, echo_defaults, user_preferences, lambda: func(user_preferences))
+        return wrapper
+    return decorator
+
+async def serve_cached_match(variant: str, echo_defaults: Dict[str, Any], user_preferences: Dict[str, Any], compute):
+    """Match response uit de match cache, of compute() (coroutine factory) uitvoeren en het resultaat cachen"""
+    snapshot = await catalog.get_snapshot()
+    key = match_cache_key(variant, user_preferences, snapshot)
+    response = match_cache.get(key) if key is not None else None
+
+    if response is None:
+        response = await compute()
+        if key is not None:
+            match_cache.put(key, response)
+        return response
+
+    # Echo altijd de voorkeuren van deze aanvraag (bv. exact bedrag binnen de bucket)
+    logging.info("⚡ Match cache hit")
+    return echo_request_filters(response, user_preferences, echo_defaults)
+
+# Nieuwe catalogus versie -> alle gecachte matches ongeldig + ranking tabel opnieuw opbouwen
+catalog.add_listener(lambda snapshot: match_cache.clear())
+catalog.add_listener(rebuild_ranking_table)
+
+@router.get("/match-cache-stats")
+async def get_match_cache_stats():
+    """Hit/miss tellers van de match result cache"""
+    return {"success": True, **match_cache.stats(), "ranking_table": ranking_table.stats(),
+            "match_sessions": match_sessions.stats()}
+
+def empty_enhanced_response() -> Dict[str, Any]:
+    return {
+        "success": True,
+        "matches": [],
+        "total_found": 0,
+        "message": "Geen diensten gevonden die voldoen aan uw criteria"
+    }
+
+def rank_enhanced_matches(matrix: ScoreMatrix, gewichten: Dict[str, float], boost_banks: List[str],
+                          ranked=None, total_scores: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """
+    Stap 5-6 van /match-diensten-enhanced: bank boost, matchScore en top k result dicts.
+    ranked: (order, percentages) uit de ranking tabel; total_scores: voorberekende gewogen scores (batch)
+    """
+    if ranked is not None:
+        order, ranked_percentages = ranked
+        top = order[:MATCH_TOP_K]
+        top_totals = matrix.weighted_totals(gewichten, top)
+    else:
+        # Stap 5: Gewogen scores voor alle diensten in één keer
+        if total_scores is None:
+            total_scores = matrix.weighted_totals(gewichten)
+        
+        # NEW: Apply bank boost if specified
+        if boost_banks:
+            boost_mask = matrix.bank_mask(boost_banks, "contains") & matrix.named
+            total_scores = np.where(boost_mask, total_scores * 1.1, total_scores)  # 10% boost for preferred banks
+            logging.info(f"🚀 Applied boost to {int(boost_mask.sum())} diensten")
+        
+        # Converteer naar percentage en selecteer de top k op matchScore (geen volledige sortering)
+        percentages = match_percentages(total_scores)
+        top = top_k_indices(percentages, MATCH_TOP_K)
+        ranked_percentages = percentages[top]
+        top_totals = total_scores[top]
+    
+    # Enkel voor de teruggegeven matches de volledige result dicts opbouwen
+    return [
+        build_match_result(matrix, i, gewichten, top_totals[rank], ranked_percentages[rank])
+        for rank, i in enumerate(top)
+    ]
+
+def build_enhanced_response(user_preferences: Dict[str, Any], matches: List[Dict[str, Any]], total_found: int) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "matches": matches,  # Top k (30) om te kunnen boosten na top 3, enkel eerste 3 worden getoond in de front
+        "total_found": total_found,
+        "filters_applied": {
+            "type_dienst": user_preferences.get("type_dienst"),
+            "bedrag": user_preferences.get("bedrag", 0),
+            "bank_filter": user_preferences.get("bank_filter"),  # NEW: Include bank filter info
+            "gewichten": {
+                "kosten": get_weight(user_preferences.get("kosten_belangrijkheid", "geen_voorkeur")),
+                "duurzaamheid": get_weight(user_preferences.get("duurzaamheid_belangrijkheid", "geen_voorkeur")),
+                "begeleiding": get_weight(user_preferences.get("begeleiding_belangrijkheid", "geen_voorkeur")),
+                "functionaliteiten": get_weight(user_preferences.get("functionaliteiten_belangrijkheid", "geen_voorkeur")),
+                "rendement": get_weight(user_preferences.get("rendement_belangrijkheid", "geen_voorkeur"))
+            }
+        }
+    }
+
+def with_match_session(func):
+    """Decorator: geef bij een succesvolle match een result_id terug voor de vervolg endpoints"""
+    @functools.wraps(func)
+    async def wrapper(user_preferences: Dict[str, Any]):
+        response = await func(user_preferences)
+        if response.get("success"):
+            response = {**response, "result_id": await open_match_session(user_preferences, response)}
+        return response
+    return wrapper
 
 @router.post("/match-diensten-enhanced")
+@with_match_session
+@cached_match("enhanced_v1", {"type_dienst": None, "bedrag": 0, "bank_filter": None})
 async def match_diensten_enhanced(user_preferences: Dict[str, Any]):
     """
     ENHANCED Match diensten - Multi-criteria scoring met gewogen factoren + BANK FILTERING
@@ -31,172 +291,182 @@ async def match_diensten_enhanced(user_preferences: Dict[str, Any]):
         logging.info(f"🔍 DEBUG: Received bedrag: {bedrag} (type: {type(bedrag)})")
         logging.info(f"🏦 DEBUG: Bank filter: {bank_filter}")
         
-        kosten_belangrijk = user_preferences.get("kosten_belangrijkheid", "geen_voorkeur")
-        duurzaamheid_belangrijk = user_preferences.get("duurzaamheid_belangrijkheid", "geen_voorkeur")
-        begeleiding_belangrijk = user_preferences.get("begeleiding_belangrijkheid", "geen_voorkeur")
-        functionaliteiten_belangrijk = user_preferences.get("functionaliteiten_belangrijkheid", "geen_voorkeur")
-        rendement_belangrijk = user_preferences.get("rendement_belangrijkheid", "geen_voorkeur")
-        
-        # Type mapping van gebruiker clusters naar database waarden
-        type_mapping = {
-            "Doe-het-zelf": ["Brokerage", "Execution Only"],
-            "Samen of laten beleggen": ["Adviserend beheer", "Vermogensbeheer"], 
-            "Pensioensparen": ["Pensioensparen"]
-        }
-        
-        # Stap 1: Filter diensten op type en status
-        filters = "status=eq.actief"
-        if type_dienst and type_dienst in type_mapping:
-            db_types = type_mapping[type_dienst]
-            type_filter = ",".join([f'"{t}"' for t in db_types])
-            filters += f"&type_aanbod=in.({type_filter})"
-        
-        # NEW: Add bank filtering to database query
-        if bank_filter:
-            filter_type = bank_filter.get('type')
-            banks = bank_filter.get('banks', [])
-            
-            if filter_type == 'include' and banks:
-                # Only include specified banks
-                bank_filter_str = ",".join([f'"{bank}"' for bank in banks])
-                filters += f"&naam_aanbieder=in.({bank_filter_str})"
-                logging.info(f"🏦 Including only banks: {banks}")
-                
-            elif filter_type == 'exclude' and banks:
-                # Exclude specified banks
-                bank_filter_str = ",".join([f'"{bank}"' for bank in banks])
-                filters += f"&naam_aanbieder=not.in.({bank_filter_str})"
-                logging.info(f"🏦 Excluding banks: {banks}")
-        
-        diensten = await supabase.select("diensten", f"*&{filters}")
-        logging.info(f"Gevonden {len(diensten)} diensten van type {type_dienst} (na bank filtering)")
-        
-        # Stap 2: Filter op minimum bedrag
-        filtered_diensten = []
-        for dienst in diensten:
-            minimum = dienst.get("minimum")
-            if minimum is None or bedrag >= minimum:
-                filtered_diensten.append(dienst)
-        logging.info(f"🔍 DEBUG: First few diensten minimums: {[(d.get('naam_aanbieder'), d.get('minimum')) for d in diensten[:3]]}")
-        logging.info(f"🔍 DEBUG: After bedrag filter: {len(filtered_diensten)} diensten remaining")
-        logging.info(f"Na bedrag filtering: {len(filtered_diensten)} diensten over")
-        
-        if not filtered_diensten:
-            return {
-                "success": True,
-                "matches": [],
-                "total_found": 0,
-                "message": "Geen diensten gevonden die voldoen aan uw criteria"
-            }
-
-        # Stap 3: Bulk data ophalen voor alle benodigde tabellen
-        dienst_ids = [d.get("dienst_id") for d in filtered_diensten]
-        dienst_ids_str = ",".join(map(str, dienst_ids))
+        snapshot = await catalog.get_snapshot()
+        gewichten = get_weights(user_preferences)
+        boost_banks = bank_filter.get('banks', []) if bank_filter and bank_filter.get('type') == 'boost' else []
         
-        # Haal alle benodigde data op in bulk queries
-        all_kosten = await supabase.select("kosten", f"*&dienst_id=in.({dienst_ids_str})")
-        all_functionaliteiten = await supabase.select("functionaliteiten", f"*&dienst_id=in.({dienst_ids_str})")
-        all_rendementen = await supabase.select("rendementen", f"*&dienst_id=in.({dienst_ids_str})")
+        # Stap 1-5 voorberekend: zonder bank filter komt de ranking rechtstreeks uit de ranking tabel
+        matrix, population = resolve_score_matrix(snapshot, type_dienst, bedrag, bank_filter)
         
-        # Create lookups
-        kosten_lookup = {k['dienst_id']: k for k in all_kosten}
-        functionaliteiten_lookup = {f['dienst_id']: f for f in all_functionaliteiten}
-        rendementen_lookup = {r['dienst_id']: r for r in all_rendementen}
+        if matrix is None or not len(matrix):
+            return empty_enhanced_response()
         
-        logging.info(f"Data opgehaald voor {len(filtered_diensten)} diensten")
-        
-        # Stap 4: Bereken percentiel-based scores voor TCO en rendement
-        tco_scores = calculate_percentile_scores([kosten_lookup.get(d['dienst_id'], {}).get('tco') for d in filtered_diensten], reverse=True)
-        rendement_scores = calculate_percentile_scores([rendementen_lookup.get(d['dienst_id'], {}).get('rendement_5j') for d in filtered_diensten], reverse=False)
-        
-        # Stap 5: Bereken gewogen scores voor elke dienst
-        matches = []
-        for i, dienst in enumerate(filtered_diensten):
-            dienst_id = dienst.get("dienst_id")
-            
-            # Haal data op
-            kosten_data = kosten_lookup.get(dienst_id, {})
-            functionaliteiten_data = functionaliteiten_lookup.get(dienst_id, {})
-            rendement_data = rendementen_lookup.get(dienst_id, {})
-            
-            # Bereken individuele scores
-            scores = {
-                'duurzaamheid': dienst.get('score_duurzaamheid', 5),
-                'begeleiding': dienst.get('score_persoonlijke_begeleiding', 5),
-                'functionaliteiten': functionaliteiten_data.get('score_functionaliteiten', 5),
-                'kosten': tco_scores[i] if tco_scores[i] is not None else 5,
-                'rendement': rendement_scores[i] if rendement_scores[i] is not None else 5
-            }
-            
-            # Bereken gewichten op basis van gebruikersvoorkeuren
-            gewichten = {
-                'duurzaamheid': get_weight(duurzaamheid_belangrijk),
-                'begeleiding': get_weight(begeleiding_belangrijk),
-                'functionaliteiten': get_weight(functionaliteiten_belangrijk),
-                'kosten': get_weight(kosten_belangrijk),
-                'rendement': get_weight(rendement_belangrijk)
-            }
-            
-            # Bereken gewogen totaalscore
-            total_score = calculate_weighted_score(scores, gewichten)
-            
-            # NEW: Apply bank boost if specified
-            if bank_filter and bank_filter.get('type') == 'boost':
-                boosted_banks = bank_filter.get('banks', [])
-                if any(bank in dienst.get('naam_aanbieder', '') for bank in boosted_banks):
-                    total_score *= 1.1  # 10% boost for preferred banks
-                    logging.info(f"🚀 Applied boost to {dienst.get('naam_aanbieder')}")
-            
-            # Converteer naar percentage (scores zijn 1-10, gewichten sommeren tot 1.0)
-            match_score = score_to_match_percentage(total_score)
-            
-            match = {
-                "id": f"dienst_{dienst_id}",
-                "name": dienst.get("naam_aanbieder", "Onbekende aanbieder"),
-                "logo": f"{dienst.get('naam_aanbieder', 'default').lower().replace(' ', '_')}.svg",
-                "description": f"{dienst.get('type_aanbod')} van {dienst.get('naam_aanbieder')}",
-                "strengths": parse_db_strengths(dienst.get("sterktes", "")),
-                "weaknesses": parse_db_weaknesses(dienst.get("zwaktes", "")),
-                "matchScore": match_score,
-                "rating": dienst.get("sterren_score", 0),
-                "details": {
-                    "minimum_bedrag": dienst.get("minimum"),
-                    "tco": kosten_data.get("tco"),
-                    "rendement_5j": rendement_data.get("rendement_5j"),
-                    "sterren_score": dienst.get("sterren_score"),
-                    "kenmerken": dienst.get("kenmerken"),
-                    "scores": scores,
-                    "gewichten": gewichten,
-                    "total_score": total_score
-                }
-            }
-            matches.append(match)
-        
-        # Sorteer op matchScore
-        matches.sort(key=lambda x: x["matchScore"], reverse=True)
-        
-        return {
-            "success": True,
-            "matches": matches[:30],  # Allemaal opmaken om te kunnen boosten na top 3, enkel eerste 3 worden getoond in de front
-            "total_found": len(matches),
-            "filters_applied": {
-                "type_dienst": type_dienst,
-                "bedrag": bedrag,
-                "bank_filter": bank_filter,  # NEW: Include bank filter info
-                "gewichten": {
-                    "kosten": get_weight(kosten_belangrijk),
-                    "duurzaamheid": get_weight(duurzaamheid_belangrijk),
-                    "begeleiding": get_weight(begeleiding_belangrijk),
-                    "functionaliteiten": get_weight(functionaliteiten_belangrijk),
-                    "rendement": get_weight(rendement_belangrijk)
-                }
-            }
-        }
+        ranked = population.ranked(gewichten, MATCH_TOP_K) if population is not None else None
+        matches = rank_enhanced_matches(matrix, gewichten, boost_banks, ranked=ranked)
+        return build_enhanced_response(user_preferences, matches, len(matrix))
         
     except Exception as e:
         logging.error(f"Error in enhanced matching: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Enhanced matching error: {str(e)}")
 
+def score_profiles_batch(snapshot, profiles: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Score een reeks voorkeurprofielen tegen één catalogus snapshot, met per profiel hetzelfde
+    resultaat als /match-diensten-enhanced. Profielen met dezelfde populatie (type, bedrag bucket,
+    include/exclude filter) delen één score matrix; hun gewogen scores worden in één matrix
+    operatie berekend. Fouten worden per profiel teruggegeven in plaats van de batch af te breken.
+    """
+    results = [None] * len(profiles)
+    gewichten_by_index = {}
+    groups = {}
+
+    for index, user_preferences in enumerate(profiles):
+        try:
+            if isinstance(user_preferences, Exception):
+                raise user_preferences
+            if not isinstance(user_preferences, dict):
+                raise ValueError("Profiel moet een JSON object zijn")
+            bedrag = user_preferences.get("bedrag", 0)
+            if not isinstance(bedrag, (int, float)):
+                raise ValueError(f"Ongeldig bedrag: {bedrag!r}")
+            bank_filter = user_preferences.get("bank_filter")
+            if bank_filter and not isinstance(bank_filter, dict):
+                raise ValueError(f"Ongeldige bank_filter: {bank_filter!r}")
+
+            # Een boost verandert de populatie niet, enkel de scores
+            population_filter = _canonical_bank_filter(bank_filter)
+            if population_filter is not None and population_filter[0] == 'boost':
+                population_filter = None
+
+            type_dienst = user_preferences.get("type_dienst")
+            gewichten_by_index[index] = get_weights(user_preferences)
+            group_key = (type_dienst if type_dienst in TYPE_MAPPING else None, snapshot.bedrag_bucket(bedrag), population_filter)
+            groups.setdefault(group_key, []).append(index)
+        except Exception as e:
+            results[index] = {"success": False, "error": str(e)}
+
+    for indices in groups.values():
+        first = profiles[indices[0]]
+        try:
+            matrix, _ = resolve_score_matrix(snapshot, first.get("type_dienst"), first.get("bedrag", 0), first.get("bank_filter"))
+            if matrix is None or not len(matrix):
+                for index in indices:
+                    results[index] = empty_enhanced_response()
+                continue
+            total_scores = matrix.weighted_totals_many([gewichten_by_index[index] for index in indices])
+        except Exception as e:
+            logging.error(f"Error in batch matching: {str(e)}")
+            for index in indices:
+                results[index] = {"success": False, "error": str(e)}
+            continue
+
+        for row, index in enumerate(indices):
+            user_preferences = profiles[index]
+            try:
+                bank_filter = user_preferences.get("bank_filter")
+                boost_banks = bank_filter.get('banks', []) if bank_filter and bank_filter.get('type') == 'boost' else []
+                matches = rank_enhanced_matches(matrix, gewichten_by_index[index], boost_banks, total_scores=total_scores[row])
+                results[index] = build_enhanced_response(user_preferences, matches, len(matrix))
+            except Exception as e:
+                results[index] = {"success": False, "error": str(e)}
+
+    return results
+
+def _parse_ndjson_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Ongeldige JSON: {str(e)}")
+
+async def _iter_ndjson_profiles(request: Request) -> AsyncIterator[Any]:
+    """Profielen uit een gestreamde NDJSON body (één JSON object per lijn)"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if buffer.strip():
+        yield _parse_ndjson_line(buffer)
+
+async def _iter_list(items: List[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+async def _chunked(profiles: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    chunk = []
+    async for profile in profiles:
+        chunk.append(profile)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@router.post("/match-diensten-batch")
+async def match_diensten_batch(request: Request):
+    """
+    Batch matching voor veel voorkeurprofielen in één aanvraag.
+    Body: JSON lijst van profielen, {"profiles": [...]}, of NDJSON (Content-Type: application/x-ndjson).
+    Antwoord: NDJSON stream met één lijn per profiel in dezelfde volgorde ({"index": i, ...});
+    een mislukt profiel geeft {"index": i, "success": false, "error": ...}.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        # Body lijn per lijn parsen maar volledig lezen voor de response start: tijdens een
+        # StreamingResponse luistert Starlette zelf op receive() (disconnect detectie)
+        profiles = _iter_list([profile async for profile in _iter_ndjson_profiles(request)])
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ongeldige JSON body")
+        if isinstance(body, dict):
+            body = body.get("profiles")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Verwacht een lijst van voorkeurprofielen")
+        profiles = _iter_list(body)
+
+    # Eén catalogus snapshot voor de hele batch
+    snapshot = await catalog.get_snapshot()
+    echo_defaults = {"type_dienst": None, "bedrag": 0, "bank_filter": None}
+
+    async def generate():
+        index = 0
+        scored = 0
+        async for chunk in _chunked(profiles, MATCH_BATCH_CHUNK_SIZE):
+            results = [None] * len(chunk)
+            keys = [None] * len(chunk)
+            for i, user_preferences in enumerate(chunk):
+                if isinstance(user_preferences, dict):
+                    try:
+                        keys[i] = match_cache_key("enhanced_v1", user_preferences, snapshot)
+                    except Exception:
+                        keys[i] = None
+                    if keys[i] is not None:
+                        cached = match_cache.get(keys[i])
+                        if cached is not None:
+                            results[i] = echo_request_filters(cached, user_preferences, echo_defaults)
+
+            # Cache misses samen scoren, buiten de event loop
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                scored_results = await asyncio.to_thread(score_profiles_batch, snapshot, [chunk[i] for i in missing])
+                for i, result in zip(missing, scored_results):
+                    results[i] = result
+                    if keys[i] is not None:
+                        match_cache.put(keys[i], result)
+                scored += len(missing)
+
+            for result in results:
+                yield json.dumps({"index": index, **result}, ensure_ascii=False, default=str) + "\n"
+                index += 1
+
+        logging.info(f"✅ Batch matching: {index} profielen ({scored} gescoord, {index - scored} uit cache)")
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.post("/recalculate-matches")
 async def recalculate_matches(request: Request):
     """
@@ -209,23 +479,20 @@ async def recalculate_matches(request: Request):
         print("🔄 RECALCULATE MATCHES ENDPOINT CALLED!")
         print(f"📊 Request data: {request_data}")
         
-        # Haal originele user preferences op
-        original_preferences = request_data.get("original_preferences", {})
+        # Haal originele user preferences op (aangevuld uit de match sessie als er een result_id is)
+        result_id = request_data.get("result_id")
+        original_preferences = await session_preferences(result_id, request_data.get("original_preferences", {}))
         impacts = request_data.get("impacts", [])
         
         print(f"🎯 Original preferences: {original_preferences}")
         print(f"💥 Impacts to apply: {impacts}")
         
-        # STAP 1: Haal originele matches op via bestaande functie
-        print("🎯 Getting original matches...")
-        original_response = await match_diensten_enhanced(original_preferences)
-        
-        if not original_response.get("success"):
-            raise HTTPException(status_code=400, detail="Kan originele matches niet ophalen")
-        
-        original_matches = original_response.get("matches", [])
-        print(f"📋 Found {len(original_matches)} original matches")
-        
+        # STAP 1: Volledige score matrix - uit de sessie, anders opnieuw opgebouwd uit de catalogus
+        # (geen database). Herrekenen over alle diensten, niet enkel de eerder teruggegeven top k.
+        print("🎯 Getting score matrix...")
+        prepared = await prepare_session_match(result_id, original_preferences)
+        print(f"📋 Score matrix met {len(prepared['matrix']) if prepared['matrix'] is not None else 0} diensten")
+
         # STAP 2: Bereken gewicht aanpassingen
         weight_adjustments = {}
         preferred_match_id = None
@@ -280,19 +547,10 @@ async def recalculate_matches(request: Request):
                     
                     elif key == 'lower_thresholds':
                         if value:
-                            # Voor low scores scenario - probeer meer matches te vinden
-                            print(f"   🔽 Lower thresholds requested")
-                            modified_preferences = original_preferences.copy()
-                            # Verlaag minimum scores in preferences
-                            for pref_key in modified_preferences:
-                                if 'belangrijkheid' in pref_key and modified_preferences[pref_key] == 'heel_belangrijk':
-                                    modified_preferences[pref_key] = 'zeer_belangrijk'
-                            
-                            # Haal nieuwe matches op met verlaagde criteria
-                            expanded_response = await match_diensten_enhanced(modified_preferences)
-                            if expanded_response.get("success"):
-                                original_matches = expanded_response.get("matches", original_matches)
-                                print(f"   📈 Expanded to {len(original_matches)} matches")
+                            # Voor low scores scenario - heel_belangrijk -> zeer_belangrijk verlagen.
+                            # Beide hebben hetzelfde gewicht (get_weight = 0.3): een tweede matching
+                            # zou exact dezelfde ranking opleveren, dus de matches blijven behouden
+                            print(f"   🔽 Lower thresholds requested (zelfde gewichten, matches behouden)")
                     
                     else:
                         print(f"   ❓ Unknown impact key: {key} = {value}")
@@ -301,70 +559,10 @@ async def recalculate_matches(request: Request):
                 print(f"   ❌ Error processing impact {impact}: {str(impact_error)}")
                 continue
         
-        # STAP 3: Pas gewichten toe op de scores
-        adjusted_matches = []
-        
-        for match in original_matches:
-            print(f"\n🔄 Processing match: {match.get('name', 'Unknown')}")
-            
-            # Start met originele score
-            original_score = match.get("matchScore", 0)
-            adjusted_score = original_score
-            
-            print(f"   📊 Original score: {original_score}")
-            
-            # Pas gewicht aanpassingen toe
-            if weight_adjustments and match.get("details", {}).get("scores"):
-                scores = match["details"]["scores"]
-                total_adjustment = 0
-                adjustment_count = 0
-                
-                for criteria, weight in weight_adjustments.items():
-                    if criteria in scores:
-                        criteria_score = scores[criteria]
-                        
-                        # Bereken impact: (score - 5) * weight_factor * importance
-                        weight_factor = (weight - 1.0)  # -0.5 tot +0.5
-                        impact = (criteria_score - 5.0) * weight_factor * 3  # Max 3 punten impact
-                        
-                        total_adjustment += impact
-                        adjustment_count += 1
-                        
-                        print(f"   🎯 {criteria}: score={criteria_score}, weight={weight}, impact={impact:.2f}")
-                
-                if adjustment_count > 0:
-                    avg_adjustment = total_adjustment / adjustment_count
-                    adjusted_score = max(0, min(100, original_score + avg_adjustment))
-                    print(f"   📈 Weight adjustments: {avg_adjustment:.2f} -> Score: {original_score} -> {adjusted_score:.1f}")
-            
-            # Pas preferred match bonus toe
-            if preferred_match_id and match.get("id") == preferred_match_id:
-                adjusted_score *= boost_factor
-                adjusted_score = min(100, adjusted_score)  # Cap at 100%
-                print(f"   ⭐ Preferred match bonus: {boost_factor} -> Final score: {adjusted_score:.1f}")
-            
-            # Pas reduce_similar_attributes toe (verlaag scores van lagere matches)
-            elif boost_factor < 1.0:  # reduce scenario
-                # Alleen toepassen op matches die niet de beste zijn
-                if original_score < max(m.get("matchScore", 0) for m in original_matches):
-                    adjusted_score *= boost_factor
-                    print(f"   📉 Reduce penalty applied: {boost_factor} -> Score: {adjusted_score:.1f}")
-            
-            # Pas boost_similar_attributes toe
-            elif boost_factor > 1.0:  # boost scenario
-                adjusted_score *= boost_factor
-                adjusted_score = min(100, adjusted_score)
-                print(f"   📈 Boost applied: {boost_factor} -> Score: {adjusted_score:.1f}")
-            
-            # Maak kopie van match met aangepaste score
-            adjusted_match = match.copy()
-            adjusted_match["matchScore"] = round(adjusted_score, 1)
-            adjusted_matches.append(adjusted_match)
-            
-            print(f"   ✅ Final score: {original_score} -> {adjusted_score:.1f}")
-        
-        # STAP 4: Sorteer opnieuw op aangepaste scores
-        adjusted_matches.sort(key=lambda x: x.get("matchScore", 0), reverse=True)
+        # STAP 3: Pas gewichten en bonussen toe op alle diensten en rangschik opnieuw
+        adjusted_matches, total_found = recalculate_ranking(
+            original_preferences, prepared["matrix"], weight_adjustments, preferred_match_id, boost_factor
+        )
         
         print(f"\n🏁 FINAL RANKING:")
         for i, match in enumerate(adjusted_matches[:5]):
@@ -376,7 +574,7 @@ async def recalculate_matches(request: Request):
             "weight_adjustments": weight_adjustments,
             "preferred_match_id": preferred_match_id,
             "applied_impacts": impacts,
-            "total_found": len(adjusted_matches)
+            "total_found": total_found
         }
         
     except Exception as e:
@@ -419,350 +617,340 @@ async def debug_score_calculation(request: Request):
 # BEHOUDT de bestaande optimized functie voor backward compatibility
 # VERVANG de laatste match_diensten_enhanced functie (vanaf regel ~180) met deze versie:
 
+# Velden uit filters_applied die letterlijk uit de aanvraag komen (+ default) bij een cache hit
+ENHANCED_ECHO_DEFAULTS = {"type_dienst": None, "bedrag": 0, "bank_filter": {}, "soft_preferences": []}
+
 @router.post("/match-diensten-enhanced")
+@cached_match("enhanced_v2", ENHANCED_ECHO_DEFAULTS)
 async def match_diensten_enhanced(user_preferences: Dict[str, Any]):
     """
     ENHANCED Match diensten - Multi-criteria scoring met gewogen factoren + BANK FILTERING + SOFT PREFERENCES
     """
     try:
         logging.info(f"Enhanced matching aanvraag: {user_preferences}")
+        snapshot = await catalog.get_snapshot()
         
-        # 🏦 Extract bank filter + soft preferences
-        bank_filter = user_preferences.get('bank_filter', {})
-        soft_preferences = user_preferences.get('soft_preferences', [])
-        
-        logging.info(f"🏦 DEBUG: Bank filter received: {bank_filter}")
-        logging.info(f"🎯 DEBUG: Soft preferences received: {soft_preferences}")
-        
-        # Extract user preferences
-        type_dienst = user_preferences.get("type_dienst")
-        bedrag = user_preferences.get("bedrag", 0)
-        kosten_belangrijk = user_preferences.get("kosten_belangrijkheid", "geen_voorkeur")
-        duurzaamheid_belangrijk = user_preferences.get("duurzaamheid_belangrijkheid", "geen_voorkeur")
-        begeleiding_belangrijk = user_preferences.get("begeleiding_belangrijkheid", "geen_voorkeur")
-        functionaliteiten_belangrijk = user_preferences.get("functionaliteiten_belangrijkheid", "geen_voorkeur")
-        rendement_belangrijk = user_preferences.get("rendement_belangrijkheid", "geen_voorkeur")
-        
-        # Type mapping van gebruiker clusters naar database waarden
-        type_mapping = {
-            "Doe-het-zelf": ["Brokerage", "Execution Only"],
-            "Samen of laten beleggen": ["Adviserend beheer", "Vermogensbeheer"], 
-            "Pensioensparen": ["Pensioensparen"]
-        }
-        
-        # Stap 1: Filter diensten op type en status
-        filters = "status=eq.actief"
-        if type_dienst and type_dienst in type_mapping:
-            db_types = type_mapping[type_dienst]
-            type_filter = ",".join([f'"{t}"' for t in db_types])
-            filters += f"&type_aanbod=in.({type_filter})"
-        
-        # 🏦 Bank filtering toevoegen
-        if bank_filter:
-            filter_type = bank_filter.get('type')
-            banks = bank_filter.get('banks', [])
-            
-            if filter_type == 'include' and banks:
-                bank_filter_str = ",".join([f'"{bank}"' for bank in banks])
-                filters += f"&naam_aanbieder=in.({bank_filter_str})"
-                logging.info(f"🏦 INCLUDE filter toegepast: {banks}")
-                
-            elif filter_type == 'exclude' and banks:
-                bank_filter_str = ",".join([f'"{bank}"' for bank in banks])
-                filters += f"&naam_aanbieder=not.in.({bank_filter_str})"
-                logging.info(f"🏦 EXCLUDE filter toegepast: {banks}")
-        
-        logging.info(f"🔍 Final database filters: {filters}")
-        
-        diensten = await supabase.select("diensten", f"*&{filters}")
-        logging.info(f"Gevonden {len(diensten)} diensten van type {type_dienst}")
-        
-        # Stap 2: Filter op minimum bedrag
-        filtered_diensten = []
-        for dienst in diensten:
-            minimum = dienst.get("minimum")
-            if minimum is None or bedrag >= minimum:
-                filtered_diensten.append(dienst)
-        
-        logging.info(f"Na bedrag filtering: {len(filtered_diensten)} diensten over")
-        
-        if not filtered_diensten:
-            return {
-                "success": True,
-                "matches": [],
-                "total_found": 0,
-                "message": "Geen diensten gevonden die voldoen aan uw criteria",
-                "filters_applied": {"bank_filter": bank_filter}
-            }
-        
-        # Stap 3: Bulk data ophalen
-        dienst_ids = [d.get("dienst_id") for d in filtered_diensten]
-        dienst_ids_str = ",".join(map(str, dienst_ids))
-        
-        all_kosten = await supabase.select("kosten", f"*&dienst_id=in.({dienst_ids_str})")
-        all_functionaliteiten = await supabase.select("functionaliteiten", f"*&dienst_id=in.({dienst_ids_str})")
-        all_rendementen = await supabase.select("rendementen", f"*&dienst_id=in.({dienst_ids_str})")
-        
-        kosten_lookup = {k['dienst_id']: k for k in all_kosten}
-        functionaliteiten_lookup = {f['dienst_id']: f for f in all_functionaliteiten}
-        rendementen_lookup = {r['dienst_id']: r for r in all_rendementen}
-        
-        logging.info(f"Data opgehaald voor {len(filtered_diensten)} diensten")
-        
-        # Stap 4: Bereken percentiel scores
-        tco_scores = calculate_percentile_scores([kosten_lookup.get(d['dienst_id'], {}).get('tco') for d in filtered_diensten], reverse=True)
-        rendement_scores = calculate_percentile_scores([rendementen_lookup.get(d['dienst_id'], {}).get('rendement_5j') for d in filtered_diensten], reverse=False)
-        
-        # Stap 5: Bereken gewogen scores voor elke dienst
-        matches = []
-        for i, dienst in enumerate(filtered_diensten):
-            dienst_id = dienst.get("dienst_id")
-            naam_aanbieder = dienst.get("naam_aanbieder", "Onbekende aanbieder")
-            
-            # Haal data op
-            kosten_data = kosten_lookup.get(dienst_id, {})
-            functionaliteiten_data = functionaliteiten_lookup.get(dienst_id, {})
-            rendement_data = rendementen_lookup.get(dienst_id, {})
-            
-            # Bereken individuele scores
-            scores = {
-                'duurzaamheid': dienst.get('score_duurzaamheid', 5),
-                'begeleiding': dienst.get('score_persoonlijke_begeleiding', 5),
-                'functionaliteiten': functionaliteiten_data.get('score_functionaliteiten', 5),
-                'kosten': tco_scores[i] if tco_scores[i] is not None else 5,
-                'rendement': rendement_scores[i] if rendement_scores[i] is not None else 5
-            }
-            
-            # Bereken gewichten
-            gewichten = {
-                'duurzaamheid': get_weight(duurzaamheid_belangrijk),
-                'begeleiding': get_weight(begeleiding_belangrijk),
-                'functionaliteiten': get_weight(functionaliteiten_belangrijk),
-                'kosten': get_weight(kosten_belangrijk),
-                'rendement': get_weight(rendement_belangrijk)
-            }
-            
-            # Bereken gewogen totaalscore
-            total_score = calculate_weighted_score(scores, gewichten)
-            
-            # Bank boost (existing logic)
-            boost_applied = False
-            if bank_filter.get('type') == 'boost':
-                boost_banks = bank_filter.get('banks', [])
-                if boost_banks and any(bank in naam_aanbieder for bank in boost_banks):
-                    total_score = min(10.0, total_score + 1.0)
-                    boost_applied = True
-                    logging.info(f"🏦 BOOST toegepast op {naam_aanbieder}: +1.0 punt")
-            
-            # Converteer naar percentage
-            match_score = score_to_match_percentage(total_score)
-            
-            match = {
-                "id": f"dienst_{dienst_id}",
-                "name": naam_aanbieder,
-                "logo": f"{naam_aanbieder.lower().replace(' ', '_')}.svg",
-                "description": f"{dienst.get('type_aanbod')} van {naam_aanbieder}",
-                "strengths": parse_db_strengths(dienst.get("sterktes", "")),
-                "weaknesses": parse_db_weaknesses(dienst.get("zwaktes", "")),
-                "matchScore": match_score,
-                "rating": dienst.get("sterren_score", 0),
-                "details": {
-                    "minimum_bedrag": dienst.get("minimum"),
-                    "tco": kosten_data.get("tco"),
-                    "rendement_5j": rendement_data.get("rendement_5j"),
-                    "sterren_score": dienst.get("sterren_score"),
-                    "kenmerken": dienst.get("kenmerken"),
-                    "scores": scores,
-                    "gewichten": gewichten,
-                    "total_score": total_score,
-                    "boost_applied": boost_applied
-                }
-            }
-            matches.append(match)
-        
-        # Sorteer op matchScore
-        matches.sort(key=lambda x: x["matchScore"], reverse=True)
-        
-        # 🎯 NIEUW: Apply soft preferences
-        if soft_preferences:
-            logging.info(f"🚀 Applying {len(soft_preferences)} soft preferences...")
-            matches = apply_soft_preferences(matches, soft_preferences)
-        else:
-            logging.info("ℹ️ No soft preferences to apply")
-        
-        logging.info(f"✅ Enhanced matching succesvol: {len(matches)} matches gevonden")
-        
-        return {
-            "success": True,
-            "matches": matches[:10],  # Return 10 matches instead of 3 to see boost effect
-            "total_found": len(matches),
-            "filters_applied": {
-                "type_dienst": type_dienst,
-                "bedrag": bedrag,
-                "bank_filter": bank_filter,
-                "soft_preferences": soft_preferences,  # Include in response
-                "gewichten": {
-                    "kosten": get_weight(kosten_belangrijk),
-                    "duurzaamheid": get_weight(duurzaamheid_belangrijk),
-                    "begeleiding": get_weight(begeleiding_belangrijk),
-                    "functionaliteiten": get_weight(functionaliteiten_belangrijk),
-                    "rendement": get_weight(rendement_belangrijk)
-                }
-            }
-        }
+        # Stap 1-5 voorberekend: zonder bank filter komt de ranking rechtstreeks uit de ranking tabel
+        matrix, population = resolve_score_matrix(
+            snapshot, user_preferences.get("type_dienst"), user_preferences.get("bedrag", 0),
+            user_preferences.get('bank_filter', {})
+        )
+        return rank_soft_matches(user_preferences, matrix, population)
         
     except Exception as e:
         logging.error(f"Error in enhanced matching: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Enhanced matching error: {str(e)}")
 
-def apply_soft_preferences(matches, soft_preferences):
-    """Apply soft preference actions to matches"""
-    logging.info(f"🚀 Applying soft preferences: {soft_preferences}")
-    
-    for preference in soft_preferences:
-        action = preference.get('action')
-        
-        if action == 'boost_banks':
-            banks_to_boost = preference.get('banks', [])
-            boost_factor = 1.4  # 40% boost
-            
-            logging.info(f"💪 Boosting banks: {banks_to_boost} with factor {boost_factor}")
-            
-            boosted_count = 0
-            for match in matches:
-                bank_name = match.get('name', '')
-                
-                # Check if this bank should be boosted
-                def normalize(text):
-                    return text.lower().replace("bank", "").replace("belgië", "").strip()
-
-                should_boost = any(normalize(boost_bank) in normalize(bank_name) for boost_bank in banks_to_boost)
-
-                
-                if should_boost:
-                    old_score = match['matchScore']
-                    new_score = min(99, int(old_score * boost_factor))  # Cap at 99%
-                    match['matchScore'] = new_score
-                    match['details']['boost_applied'] = True
-                    boosted_count += 1
-                    
-                    logging.info(f"📈 {bank_name}: {old_score}% → {new_score}% (SOFT BOOST)")
-                else:
-                    # Ensure boost_applied is set to False for non-boosted banks
-                    if not match['details'].get('boost_applied', False):
-                        match['details']['boost_applied'] = False
-            
-            logging.info(f"✅ Soft boosted {boosted_count} banks matching {banks_to_boost}")
-        
-        elif action == 'exclude_banks':
-            banks_to_exclude = preference.get('banks', [])
-            logging.info(f"❌ Excluding banks: {banks_to_exclude}")
-            
-            original_count = len(matches)
-            matches = [
-                match for match in matches 
-                if not any(exclude_bank.lower() in match.get('name', '').lower() 
-                          for exclude_bank in banks_to_exclude)
-            ]
-            excluded_count = original_count - len(matches)
-            logging.info(f"❌ Excluded {excluded_count} banks")
-    
-    # Re-sort matches by score after applying preferences
-    matches.sort(key=lambda x: x['matchScore'], reverse=True)
-    logging.info(f"🔄 Re-sorted {len(matches)} matches by new scores")
-    
-    return matches
-    
-def get_weight(importance: str) -> float:
-    """Converteer gebruikers belangrijkheid naar numeriek gewicht"""
-    weights = {
-        "heel_belangrijk": 0.3,
-        "zeer_belangrijk": 0.3,
-        "belangrijk": 0.15,
-        "geen_voorkeur": 0.05
-    }
-    return weights.get(importance, 0.05)
-
-def calculate_percentile_scores(values: List[Any], reverse: bool = False) -> List[int]:
+def rank_soft_matches(user_preferences: Dict[str, Any], matrix, population) -> Dict[str, Any]:
     """
-    Bereken percentiel-based scores van 1-10 voor een lijst van waarden
-    reverse=True: lagere waarde = hogere score (voor kosten)
-    reverse=False: hogere waarde = hogere score (voor rendement)
+    Gewichten, bank boost en soft preferences toepassen op een (voorberekende) score matrix.
+    Goedkoop t.o.v. het opbouwen van de matrix: enkel dit deel hangt af van belangrijkheden en soft preferences.
     """
-    # Filter None waarden en bewaar originele indices
-    valid_values = []
-    valid_indices = []
+    # 🏦 Extract bank filter + soft preferences
+    bank_filter = user_preferences.get('bank_filter', {})
+    soft_preferences = user_preferences.get('soft_preferences', [])
     
-    for i, val in enumerate(values):
-        if val is not None and isinstance(val, (int, float)):
-            valid_values.append(val)
-            valid_indices.append(i)
+    logging.info(f"🏦 DEBUG: Bank filter received: {bank_filter}")
+    logging.info(f"🎯 DEBUG: Soft preferences received: {soft_preferences}")
     
-    if not valid_values:
-        return [None] * len(values)
+    # Extract user preferences
+    type_dienst = user_preferences.get("type_dienst")
+    bedrag = user_preferences.get("bedrag", 0)
+    kosten_belangrijk = user_preferences.get("kosten_belangrijkheid", "geen_voorkeur")
+    duurzaamheid_belangrijk = user_preferences.get("duurzaamheid_belangrijkheid", "geen_voorkeur")
+    begeleiding_belangrijk = user_preferences.get("begeleiding_belangrijkheid", "geen_voorkeur")
+    functionaliteiten_belangrijk = user_preferences.get("functionaliteiten_belangrijkheid", "geen_voorkeur")
+    rendement_belangrijk = user_preferences.get("rendement_belangrijkheid", "geen_voorkeur")
     
-    # Sorteer voor percentiel berekening
-    sorted_values = sorted(valid_values, reverse=reverse)
+    gewichten = get_weights(user_preferences)
+    boost_banks = bank_filter.get('banks', []) if bank_filter.get('type') == 'boost' else []
     
-    # Bereken scores
-    scores = [None] * len(values)
+    if matrix is None or not len(matrix):
+        return {
+            "success": True,
+            "matches": [],
+            "total_found": 0,
+            "message": "Geen diensten gevonden die voldoen aan uw criteria",
+            "filters_applied": {"bank_filter": bank_filter}
+        }
     
-    for i, val in enumerate(values):
-        if val is not None and isinstance(val, (int, float)):
-            # Vind positie in gesorteerde lijst
-            if reverse:
-                # Voor kosten: lagere waarde = hogere score
-                rank = sorted_values.index(val)
-            else:
-                # Voor rendement: hogere waarde = hogere score  
-                rank = len(sorted_values) - 1 - sorted_values[::-1].index(val)
-            
-            # Converteer naar 1-10 schaal
-            percentile = rank / (len(sorted_values) - 1) if len(sorted_values) > 1 else 0.5
-            score = max(1, min(10, int(percentile * 9) + 1))
-            scores[i] = score
+    # Soft preferences (exclusies) hebben de volledige ranking nodig: de tabel bewaart enkel de top k
+    ranked = population.ranked(gewichten, MATCH_SOFT_TOP_K) if population is not None and not soft_preferences else None
+    if ranked is not None:
+        order, ranked_percentages = ranked
+        ranked_boost = np.zeros(len(order), dtype=bool)
+        total_scores = None
+    else:
+        # Stap 5: Gewogen scores voor alle diensten in één keer
+        total_scores = matrix.weighted_totals(gewichten)
+        
+        # Bank boost (existing logic)
+        boost_applied = np.zeros(len(matrix), dtype=bool)
+        if boost_banks:
+            boost_applied = matrix.bank_mask(boost_banks, "contains")
+            total_scores = np.where(boost_applied, np.minimum(10.0, total_scores + 1.0), total_scores)
+            logging.info(f"🏦 BOOST toegepast op {int(boost_applied.sum())} diensten: +1.0 punt")
+        
+        # Converteer naar percentage; soft preferences hebben de volledige ranking nodig
+        # (exclusies verschuiven de top), anders volstaat een top k selectie
+        percentages = match_percentages(total_scores)
+        if soft_preferences:
+            order = rank_indices(percentages)
+        else:
+            order = top_k_indices(percentages, MATCH_SOFT_TOP_K)
+        ranked_percentages = percentages[order]
+        ranked_boost = boost_applied[order]
     
-    return scores
-
-def normalize_score(score: float) -> float:
-    """Schaal 1-10 score niet-lineair naar 0.0–1.0"""
-    if score >= 9:
-        return 1.0
-    elif score >= 7:
-        return 0.8
-    elif score >= 5:
-        return 0.5
-    elif score >= 3:
-        return 0.2
+    # 🎯 NIEUW: Apply soft preferences
+    if soft_preferences:
+        logging.info(f"🚀 Applying {len(soft_preferences)} soft preferences...")
+        order, ranked_percentages, ranked_boost = apply_soft_preferences_ranked(
+            matrix, order, ranked_percentages, ranked_boost, soft_preferences
+        )
+        total_found = len(order)
     else:
-        return 0.0
+        logging.info("ℹ️ No soft preferences to apply")
+        total_found = len(matrix)
+    
+    # Enkel voor de teruggegeven matches de volledige result dicts opbouwen
+    top = order[:MATCH_SOFT_TOP_K]
+    top_totals = total_scores[top] if total_scores is not None else matrix.weighted_totals(gewichten, top)
+    matches = [
+        build_match_result(matrix, i, gewichten, top_totals[rank], ranked_percentages[rank], ranked_boost[rank])
+        for rank, i in enumerate(top)
+    ]
+    
+    logging.info(f"✅ Enhanced matching succesvol: {total_found} matches gevonden")
+    
+    return {
+        "success": True,
+        "matches": matches,  # Return top k (10) matches instead of 3 to see boost effect
+        "total_found": total_found,
+        "filters_applied": {
+            "type_dienst": type_dienst,
+            "bedrag": bedrag,
+            "bank_filter": bank_filter,
+            "soft_preferences": soft_preferences,  # Include in response
+            "gewichten": {
+                "kosten": get_weight(kosten_belangrijk),
+                "duurzaamheid": get_weight(duurzaamheid_belangrijk),
+                "begeleiding": get_weight(begeleiding_belangrijk),
+                "functionaliteiten": get_weight(functionaliteiten_belangrijk),
+                "rendement": get_weight(rendement_belangrijk)
+            }
+        }
+    }
+
+def score_matrix_key(user_preferences: Dict[str, Any]) -> tuple:
+    """De voorkeuren waar de score matrix van afhangt (niet de belangrijkheden of soft preferences)"""
+    return (
+        user_preferences.get("type_dienst"),
+        user_preferences.get("bedrag", 0),
+        _canonical_bank_filter(user_preferences.get("bank_filter"))
+    )
+
+async def prepare_match(user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Speculatief: catalogus ophalen en de score matrix opbouwen voor type, bedrag en bank filter van deze voorkeuren.
+    Kan parallel lopen met de tekst analyse; match_prepared past daarna enkel nog gewichten en soft preferences toe.
+    """
+    snapshot = await catalog.get_snapshot()
+    matrix, population = await asyncio.to_thread(
+        resolve_score_matrix, snapshot, user_preferences.get("type_dienst"), user_preferences.get("bedrag", 0),
+        user_preferences.get('bank_filter', {})
+    )
+    return {
+        "snapshot": snapshot,
+        "key": score_matrix_key(user_preferences),
+        "matrix": matrix,
+        "population": population
+    }
 
-def calculate_weighted_score(scores: Dict[str, float], gewichten: Dict[str, float]) -> float:
-    """Bereken gewogen gemiddelde van genormaliseerde scores"""
-    total_weighted_score = 0
-    total_weight = 0
+async def match_prepared(user_preferences: Dict[str, Any], prepared: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    match_diensten_enhanced op basis van een voorberekende score matrix (prepare_match).
+    Als type, bedrag of bank filter intussen gewijzigd zijn (of de catalogus vernieuwd is) -> gewone matching.
+    """
+    if (
+        prepared is None
+        or prepared["key"] != score_matrix_key(user_preferences)
+        or prepared["snapshot"].version != (await catalog.get_snapshot()).version
+    ):
+        logging.info("🔁 Voorberekende score matrix niet bruikbaar, gewone matching")
+        return await match_diensten_enhanced(user_preferences)
 
-    for criterium, score in scores.items():
-        if criterium in gewichten and score is not None:
-            gewicht = gewichten[criterium]
-            total_weighted_score += normalize_score(score) * gewicht
-            total_weight += gewicht
+    async def compute():
+        try:
+            logging.info(f"⚡ Enhanced matching op voorberekende score matrix: {user_preferences}")
+            return rank_soft_matches(user_preferences, prepared["matrix"], prepared["population"])
+        except Exception as e:
+            logging.error(f"Error in enhanced matching: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Enhanced matching error: {str(e)}")
 
-    if total_weight == 0:
-        return sum(normalize_score(s) for s in scores.values() if s is not None) / len([s for s in scores.values() if s is not None])
-    
-    return total_weighted_score / total_weight
+    return await serve_cached_match("enhanced_v2", ENHANCED_ECHO_DEFAULTS, user_preferences, compute)
 
-def score_to_match_percentage(score: float) -> int:
+async def open_match_session(user_preferences: Dict[str, Any], response: Dict[str, Any]) -> str:
     """
-    Zet genormaliseerde totaalscore (0–1) om naar een percentage (0–100)
-    met sigmoid-schaal voor betere spreiding.
+    Sessie entry voor dit match resultaat. De score matrix wordt pas bij het eerste vervolg endpoint
+    opgebouwd (session_prepared): de meeste matches krijgen geen vervolg, ook cache hits niet.
     """
-    score = min(max(score, 0), 1)
-    a = 12     # scherpte van de curve
-    c = 0.6    # middenwaarde (score = 0.6 → 50%)
-    percentage = 100 / (1 + math.exp(-a * (score - c)))
-    return int(round(percentage))
+    return await match_sessions.create(user_preferences, response)
+
+async def session_preferences(result_id: Optional[str], user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Voorkeuren van de sessie, aangevuld/overschreven met de meegestuurde voorkeuren"""
+    entry = await match_sessions.get(result_id) if result_id else None
+    preferences = {**entry["preferences"], **user_preferences} if entry is not None else dict(user_preferences)
+    preferences.pop("result_id", None)
+    return preferences
+
+async def session_prepared(result_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Catalogus + score matrix van de sessie: lazy opgebouwd bij het eerste gebruik en daarna gedeeld"""
+    entry = await match_sessions.get(result_id) if result_id else None
+    if entry is None:
+        return None
+    if entry["prepared"] is None:
+        entry["prepared"] = asyncio.create_task(prepare_match(entry["preferences"]))
+    try:
+        # shield: een geannuleerde aanvraag mag de gedeelde taak niet annuleren
+        return await asyncio.shield(entry["prepared"])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logging.error(f"Voorberekenen score matrix voor sessie {result_id} mislukt: {str(e)}")
+        entry["prepared"] = None
+        return None
+
+async def prepare_session_match(result_id: Optional[str], user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Score matrix uit de sessie als hij bij deze voorkeuren past, anders prepare_match"""
+    prepared = await session_prepared(result_id)
+    if (
+        prepared is None
+        or prepared["key"] != score_matrix_key(user_preferences)
+        or prepared["snapshot"].version != (await catalog.get_snapshot()).version
+    ):
+        prepared = await prepare_match(user_preferences)
+    return prepared
+
+async def match_from_session(result_id: Optional[str], user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """match_diensten_enhanced, vanaf de score matrix van de sessie als die nog bruikbaar is"""
+    return await match_prepared(user_preferences, await session_prepared(result_id))
+
+@router.get("/match-results/{result_id}")
+async def get_match_result(result_id: str):
+    """Voorkeuren + match response van een eerder match resultaat"""
+    entry = await match_sessions.get(result_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Match resultaat niet gevonden of verlopen")
+    return {"success": True, "result_id": result_id, "preferences": entry["preferences"], **entry["response"]}
+
+def recalculate_ranking(user_preferences: Dict[str, Any], matrix, weight_adjustments: Dict[str, float],
+                        preferred_match_id: Optional[str], boost_factor: float):
+    """
+    /recalculate-matches over de volledige score matrix: de match scores van alle diensten (bank boost en
+    soft preferences inbegrepen), daarna per dienst de weight_ aanpassing ((score - 5) * (gewicht - 1) * 3,
+    gemiddeld over de criteria) en de preferred/boost/reduce factor. Diensten buiten de vorige top k
+    kunnen zo stijgen. Returnt (top MATCH_SOFT_TOP_K matches, aantal diensten na exclusies).
+    """
+    if matrix is None or not len(matrix):
+        return [], 0
+
+    bank_filter = user_preferences.get('bank_filter') or {}
+    soft_preferences = user_preferences.get('soft_preferences') or []
+    boost_banks = bank_filter.get('banks', []) if bank_filter.get('type') == 'boost' else []
+    gewichten = get_weights(user_preferences)
+
+    total_scores = matrix.weighted_totals(gewichten)
+    boost_applied = np.zeros(len(matrix), dtype=bool)
+    if boost_banks:
+        boost_applied = matrix.bank_mask(boost_banks, "contains")
+        total_scores = np.where(boost_applied, np.minimum(10.0, total_scores + 1.0), total_scores)
+    percentages = match_percentages(total_scores)
+    order = rank_indices(percentages)
+    ranked_percentages = percentages[order]
+    ranked_boost = boost_applied[order]
+    if soft_preferences:
+        order, ranked_percentages, ranked_boost = apply_soft_preferences_ranked(
+            matrix, order, ranked_percentages, ranked_boost, soft_preferences
+        )
+    if not len(order):
+        return [], 0
+
+    original_scores = ranked_percentages.astype(float)
+    adjusted_scores = original_scores.copy()
+
+    # Gewicht aanpassingen: enkel criteria waarvoor de dienst een score heeft tellen mee
+    total_adjustment = np.zeros(len(order))
+    adjustment_count = np.zeros(len(order))
+    for criteria, weight in weight_adjustments.items():
+        if criteria not in CRITERIA:
+            continue
+        criteria_scores = matrix.values[order, CRITERIA.index(criteria)]
+        valid = ~np.isnan(criteria_scores)
+        impact = (np.nan_to_num(criteria_scores) - 5.0) * (weight - 1.0) * 3  # Max 3 punten impact
+        total_adjustment = total_adjustment + np.where(valid, impact, 0.0)
+        adjustment_count = adjustment_count + valid
+    adjusted = adjustment_count > 0
+    adjusted_scores[adjusted] = np.clip(
+        original_scores[adjusted] + total_adjustment[adjusted] / adjustment_count[adjusted], 0, 100
+    )
+
+    # Preferred match bonus, anders boost (alle) of reduce (alles behalve de beste)
+    preferred = np.zeros(len(order), dtype=bool)
+    if preferred_match_id:
+        preferred = np.array([f"dienst_{matrix.diensten[i].get('dienst_id')}" == preferred_match_id for i in order], dtype=bool)
+    adjusted_scores[preferred] = np.minimum(100, adjusted_scores[preferred] * boost_factor)
+    if boost_factor < 1.0:
+        reduce = ~preferred & (original_scores < original_scores.max())
+        adjusted_scores[reduce] = adjusted_scores[reduce] * boost_factor
+    elif boost_factor > 1.0:
+        adjusted_scores[~preferred] = np.minimum(100, adjusted_scores[~preferred] * boost_factor)
+
+    # Afronden vóór het sorteren (zoals de matchScore die de client krijgt), stabiel bij gelijke scores.
+    # Python round i.p.v. np.round: die laatste wijkt af bij x.x5 waarden
+    adjusted_scores = np.array([round(score, 1) for score in adjusted_scores.tolist()])
+    top = top_k_indices(adjusted_scores, MATCH_SOFT_TOP_K)
+    top_totals = total_scores[order[top]]
+    matches = []
+    for rank, position in enumerate(top):
+        match = build_match_result(
+            matrix, order[position], gewichten, top_totals[rank], ranked_percentages[position], ranked_boost[position]
+        )
+        match["matchScore"] = float(adjusted_scores[position])
+        matches.append(match)
+    return matches, len(order)
+
+def build_match_result(matrix: ScoreMatrix, i: int, gewichten: Dict[str, float], total_score, match_score, boost_applied=None) -> Dict[str, Any]:
+    """Bouw het volledige match result dict voor dienst i van de score matrix"""
+    dienst = matrix.diensten[i]
+    dienst_id = dienst.get("dienst_id")
+    naam_aanbieder = dienst.get("naam_aanbieder", "Onbekende aanbieder")
+    kosten_data = matrix.kosten_lookup.get(dienst_id, {})
+    rendement_data = matrix.rendementen_lookup.get(dienst_id, {})
+    
+    details = {
+        "minimum_bedrag": dienst.get("minimum"),
+        "tco": kosten_data.get("tco"),
+        "rendement_5j": rendement_data.get("rendement_5j"),
+        "sterren_score": dienst.get("sterren_score"),
+        "kenmerken": dienst.get("kenmerken"),
+        "scores": matrix.scores_for(i),
+        "gewichten": dict(gewichten),
+        "total_score": float(total_score)
+    }
+    if boost_applied is not None:
+        details["boost_applied"] = bool(boost_applied)
+    
+    return {
+        "id": f"dienst_{dienst_id}",
+        "name": naam_aanbieder,
+        "logo": f"{naam_aanbieder.lower().replace(' ', '_')}.svg",
+        "description": f"{dienst.get('type_aanbod')} van {naam_aanbieder}",
+        "strengths": parse_db_strengths(dienst.get("sterktes", "")),
+        "weaknesses": parse_db_weaknesses(dienst.get("zwaktes", "")),
+        "matchScore": int(match_score),
+        "rating": dienst.get("sterren_score", 0),
+        "details": details
+    }
 
 def parse_db_strengths(sterktes_str: str) -> List[str]:
     """Parse database sterktes string"""
@@ -1,9 +1,12 @@
 # backend/app/api/reports.py
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
-from ..services.report_generator import ReportGenerator
+from ..services.report_generator import report_generator
+from ..services.pdf_renderer import pdf_renderer, RenderQueueFull, PDF_RENDER_QUEUE_TIMEOUT_SECONDS
+from ..utils.charts import chart_cache_stats
+import asyncio
 import json
 
 router = APIRouter()
@@ -44,9 +47,6 @@ async def debug_data(request: ReportRequest):
 async def test_template():
     """Test alleen template rendering"""
     try:
-        from ..services.report_generator import ReportGenerator
-        generator = ReportGenerator()
-        
         # Dummy data
         dummy_data = {
             'user_profile': {'bedrag': 50000, 'type_dienst': 'Test'},
@@ -56,21 +56,24 @@ async def test_template():
             'weasyprint_available': True
         }
         
-        html = generator._render_template(dummy_data)
-        return HTMLResponse(content=html)
+        html = await asyncio.to_thread(report_generator._stream_template, dummy_data)
+        return StreamingResponse(html, media_type="text/html")
         
     except Exception as e:
         return {"error": str(e)}
 
+@router.get("/render-stats")
+async def render_stats():
+    """Queue diepte en render tijden van de PDF worker pool + SVG chart cache"""
+    return {"status": "ok", **pdf_renderer.stats(), "charts": chart_cache_stats()}
+
 @router.post("/generate-report")
 async def generate_report(request: ReportRequest):
     """Genereer PDF rapport voor gebruiker (met HTML fallback)"""
     try:
         print("🔄 Starting report generation...")
-        generator = ReportGenerator()
-        
         print("🔄 Calling generator.generate_report...")
-        content, media_type = await generator.generate_report(
+        content, media_type = await report_generator.generate_report(
             user_data=request.user_data,
             matches=request.matches,
             claude_analysis=request.claude_analysis,
@@ -89,15 +92,19 @@ async def generate_report(request: ReportRequest):
                 }
             )
         else:
-            # HTML fallback
-            return Response(
-                content=content,
+            # HTML fallback (gestreamd uit Template.generate())
+            return StreamingResponse(
+                content,
                 media_type="text/html",
                 headers={
                     "Content-Disposition": "inline; filename=beleggings_rapport.html"
                 }
             )
         
+    except RenderQueueFull as e:
+        # Backpressure: client later opnieuw laten proberen i.p.v. de render pool te overladen
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(int(PDF_RENDER_QUEUE_TIMEOUT_SECONDS))})
     except Exception as e:
         print(f"🚨 Report generation error: {str(e)}")
         import traceback
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query
 from app.core.supabase_client import supabase
+from app.services.catalog import catalog
 import logging
-from typing import Optional, List
+import re
+from typing import Optional, List, Dict, Any
 
 router = APIRouter(tags=["tables"])
 
@@ -11,6 +13,46 @@ ALLOWED_TABLES = {
     "kosten", "praktische_notities", "rendementen"
 }
 
+# Enkel eenvoudige kolomlijsten kunnen uit de snapshot bediend worden (geen embeds/casts)
+SIMPLE_SELECT = re.compile(r"^\s*(\*|[A-Za-z_][A-Za-z0-9_]*(\s*,\s*[A-Za-z_][A-Za-z0-9_]*)*)\s*$")
+
+def matches_eq_filter(value: Any, filter_value: str) -> bool:
+    """Benader PostgREST 'eq.' vergelijking van een kolomwaarde met een query string"""
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return filter_value.lower() == str(value).lower()
+    if isinstance(value, (int, float)):
+        try:
+            return float(filter_value) == value
+        except ValueError:
+            return False
+    return str(value) == filter_value
+
+def query_snapshot_table(rows: List[Dict[str, Any]], select: str, limit: Optional[int], offset: Optional[int],
+                         filter_column: Optional[str], filter_value: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Voer de tabel query uit op de snapshot; None als de query niet exact lokaal kan"""
+    if not SIMPLE_SELECT.match(select) or (limit or 0) < 0 or (offset or 0) < 0:
+        return None
+
+    columns = [c.strip() for c in select.split(",")]
+    if rows and any(c != "*" and c not in rows[0] for c in columns):
+        return None
+
+    if filter_column and filter_value:
+        if rows and filter_column not in rows[0]:
+            return None
+        rows = [row for row in rows if matches_eq_filter(row.get(filter_column), filter_value)]
+
+    if offset:
+        rows = rows[offset:]
+    if limit:
+        rows = rows[:limit]
+
+    if "*" in columns:
+        return rows
+    return [{c: row.get(c) for c in columns} for row in rows]
+
 @router.get("/{table_name}")
 async def get_table_data(
     table_name: str,
@@ -27,7 +69,19 @@ async def get_table_data(
         raise HTTPException(status_code=404, detail=f"Tabel '{table_name}' niet toegestaan")
     
     try:
-        # Bouw query string
+        # Eerst uit de in-memory catalogus bedienen
+        snapshot = await catalog.get_snapshot()
+        data = query_snapshot_table(snapshot.rows(table_name), select, limit, offset, filter_column, filter_value)
+        
+        if data is not None:
+            return {
+                "success": True,
+                "table": table_name,
+                "count": len(data),
+                "data": data
+            }
+        
+        # Complexe select/filter: rechtstreeks naar Supabase
         query_params = f"select={select}"
         
         if filter_column and filter_value:
@@ -1,20 +1,20 @@
 # app/api/text_processing.py
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response
 from typing import Dict, Any
 import logging
 import os
-from anthropic import Anthropic
+from app.core.model_router import model_router
+from app.services.text_analyzer import text_analyzer
+from app.api.matching import prepare_session_match, match_prepared, session_preferences, match_from_session
+import asyncio
 import json
 
 # Import matching logic
-from ..utils.matcher import calculate_bank_scores
+from ..utils.matcher import calculate_bank_scores, MATCH_CACHE_CONTROL
 
 router = APIRouter()
 
-# Initialize Anthropic client
-anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
 def build_belgian_analysis_prompt(free_text: str, current_preferences: Dict[str, Any]) -> str:
     """
     Build intelligent context-aware prompt for Belgian investment services analysis
@@ -143,6 +143,11 @@ Geef ALLEEN geldige JSON terug, geen andere tekst."""
 
     return prompt
 
+@router.get("/text-analysis-stats")
+async def get_text_analysis_stats():
+    """Hoeveel tekst analyses lokaal vs. via Claude afgehandeld werden"""
+    return {"success": True, **text_analyzer.stats()}
+
 @router.post("/debug-text-analysis") 
 async def debug_text_analysis(request: Request):
     """Debug endpoint voor text analysis zonder Claude API call"""
@@ -186,6 +191,7 @@ async def process_user_text(request: Request):
     """Process user text with Claude API and return analysis"""
     try:
         # Parse JSON body manually with proper encoding
+        deadline = model_router.deadline("text_quick")
         request_data = await request.json()
         logging.info(f"Text processing aanvraag: {request_data}")
         
@@ -207,45 +213,38 @@ async def process_user_text(request: Request):
             # Fallback: remove problematic characters
             free_text = free_text.encode('ascii', errors='ignore').decode('ascii')
         
-        # Build context-aware prompt for Claude (ASCII safe)
-        analysis_prompt = build_belgian_analysis_prompt(free_text, current_preferences)
+        # Eenduidige tekst lokaal analyseren (< 1 ms), enkel ambigue tekst naar Claude
+        analysis_result = text_analyzer.analyze(free_text, current_preferences)
+        if analysis_result is None:
+            # Build context-aware prompt for Claude (ASCII safe)
+            analysis_prompt = build_belgian_analysis_prompt(free_text, current_preferences)
         
-        # Ensure prompt is ASCII safe for Claude API
-        try:
-            analysis_prompt = analysis_prompt.encode('ascii', errors='replace').decode('ascii')
-        except UnicodeError:
-            analysis_prompt = analysis_prompt.replace('ë', 'e').replace('ï', 'i').replace('é', 'e')
-        
-        # Call Claude API
-        message = anthropic_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=1500,
-            temperature=0.1,
-            messages=[
-                {
-                    "role": "user", 
-                    "content": analysis_prompt
-                }
-            ]
-        )
+            # Ensure prompt is ASCII safe for Claude API
+            try:
+                analysis_prompt = analysis_prompt.encode('ascii', errors='replace').decode('ascii')
+            except UnicodeError:
+                analysis_prompt = analysis_prompt.replace('ë', 'e').replace('ï', 'i').replace('é', 'e')
         
-        # Parse Claude response 
-        claude_response = message.content[0].text.strip()
+            # Call Claude API (binnen het latency budget, anders de foutmelding hieronder)
+            params, timeout = model_router.plan("text_quick", analysis_prompt, deadline)
+            claude_response = await model_router.complete("text_quick", analysis_prompt, params, timeout)
         
-        # Try to parse JSON response
-        import json
-        try:
-            analysis_result = json.loads(claude_response)
-        except json.JSONDecodeError as e:
-            logging.warning(f"Claude response was not valid JSON: {claude_response}")
-            # Fallback response
-            analysis_result = {
-                "preference_updates": {},
-                "soft_preferences": [],
-                "reasoning": "Er was een probleem met het parsen van de analyse",
-                "confidence": "low",
-                "detected_themes": []
-            }
+            # Parse Claude response 
+            claude_response = claude_response.strip()
+        
+            # Try to parse JSON response
+            try:
+                analysis_result = json.loads(claude_response)
+            except json.JSONDecodeError as e:
+                logging.warning(f"Claude response was not valid JSON: {claude_response}")
+                # Fallback response
+                analysis_result = {
+                    "preference_updates": {},
+                    "soft_preferences": [],
+                    "reasoning": "Er was een probleem met het parsen van de analyse",
+                    "confidence": "low",
+                    "detected_themes": []
+                }
         
         return {
             "success": True,
@@ -261,16 +260,19 @@ async def process_user_text(request: Request):
         }
 
 @router.post("/process-text-and-match")
-async def process_text_and_match(request: Request):
+async def process_text_and_match(request: Request, response: Response):
     """Process user text input and update matches accordingly"""
     print("🚀🚀🚀 TEXT PROCESSING ENDPOINT CALLED!")  # ← ZICHTBARE DEBUG
+    prepared_task = None
+    deadline = model_router.deadline("text_analysis")
     
     try:
         request_data = await request.json()
         print(f"📨 Raw request_data: {request_data}")  # ← DEBUG REQUEST
         
         user_input = request_data.get("text", "").strip()
-        current_preferences = request_data.get("preferences", {})
+        result_id = request_data.get("result_id")
+        current_preferences = await session_preferences(result_id, request_data.get("preferences", {}))
         
         print(f"🔍 user_input: '{user_input}' (length: {len(user_input)})")  # ← DEBUG INPUT
         print(f"📊 current_preferences: {current_preferences}")  # ← DEBUG PREFS
@@ -285,62 +287,64 @@ async def process_text_and_match(request: Request):
         logging.info(f"Processing text: {user_input}")
         logging.info(f"Current preferences: {current_preferences}")
         
-        # Step 1: Analyze text with Claude
-        print("🧠 Building Claude prompt...")  # ← DEBUG STEP
-        prompt = build_belgian_analysis_prompt(user_input, current_preferences)
+        # Catalogus + score matrix hangen niet af van de tekst analyse: parallel met Claude voorberekenen
+        # (of uit de match sessie), na de analyse worden enkel nog gewichten en soft preferences toegepast
+        prepared_task = asyncio.create_task(prepare_session_match(result_id, current_preferences))
         
-        try:
-            print("🤖 Calling Claude API...")  # ← DEBUG STEP
-            message = anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            response_text = message.content[0].text
-            print(f"✅ Claude response received: {response_text[:200]}...")  # ← DEBUG RESPONSE
-            logging.info(f"Claude response: {response_text}")
+        # Step 0: Eenduidige tekst lokaal analyseren, enkel ambigue tekst naar Claude
+        analysis_result = text_analyzer.analyze(user_input, current_preferences)
+        
+        if analysis_result is None:
+            # Step 1: Analyze text with Claude
+            print("🧠 Building Claude prompt...")  # ← DEBUG STEP
+            prompt = build_belgian_analysis_prompt(user_input, current_preferences)
+        
+            try:
+                print("🤖 Calling Claude API...")  # ← DEBUG STEP
+                params, timeout = model_router.plan("text_analysis", prompt, deadline)
+                response_text = await model_router.complete("text_analysis", prompt, params, timeout)
+                print(f"✅ Claude response received: {response_text[:200]}...")  # ← DEBUG RESPONSE
+                logging.info(f"Claude response: {response_text}")
             
-        except Exception as claude_error:
-            print(f"❌ Claude API error: {str(claude_error)}")  # ← DEBUG ERROR
-            logging.error(f"Claude API error: {str(claude_error)}")
-            return {
-                "success": False,
-                "error": f"Text analysis error: {str(claude_error)}"
-            }
+            except Exception as claude_error:
+                print(f"❌ Claude API error: {str(claude_error)}")  # ← DEBUG ERROR
+                logging.error(f"Claude API error: {str(claude_error)}")
+                return {
+                    "success": False,
+                    "error": f"Text analysis error: {str(claude_error)}"
+                }
         
-        # Step 2: Parse JSON response
-        try:
-            print("📋 Parsing Claude JSON response...")  # ← DEBUG STEP
-            import json
-            # Extract JSON from Claude response
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                json_text = response_text[json_start:json_end].strip()
-            else:
-                json_text = response_text.strip()
+            # Step 2: Parse JSON response
+            try:
+                print("📋 Parsing Claude JSON response...")  # ← DEBUG STEP
+                # Extract JSON from Claude response
+                if "```json" in response_text:
+                    json_start = response_text.find("```json") + 7
+                    json_end = response_text.find("```", json_start)
+                    json_text = response_text[json_start:json_end].strip()
+                else:
+                    json_text = response_text.strip()
             
-            analysis_result = json.loads(json_text)
-            print(f"✅ JSON parsed successfully: {analysis_result}")  # ← DEBUG PARSED
+                analysis_result = json.loads(json_text)
+                print(f"✅ JSON parsed successfully: {analysis_result}")  # ← DEBUG PARSED
             
-            # Check for safety concerns
-            if analysis_result.get("safety_concern"):
+                # Check for safety concerns
+                if analysis_result.get("safety_concern"):
+                    return {
+                    "success": False,
+                    "error": analysis_result.get("safety_message", "Deze vraag kan niet worden verwerkt"),
+                    "safety_issue": True
+                    }       
+
+            except json.JSONDecodeError as e:
+                print(f"❌ JSON parsing error: {str(e)}")  # ← DEBUG ERROR
+                print(f"❌ Raw response: {response_text}")  # ← DEBUG RAW
+                logging.error(f"JSON parsing error: {str(e)}")
+                logging.error(f"Raw response: {response_text}")
                 return {
-                "success": False,
-                "error": analysis_result.get("safety_message", "Deze vraag kan niet worden verwerkt"),
-                "safety_issue": True
-                }       
-
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {str(e)}")  # ← DEBUG ERROR
-            print(f"❌ Raw response: {response_text}")  # ← DEBUG RAW
-            logging.error(f"JSON parsing error: {str(e)}")
-            logging.error(f"Raw response: {response_text}")
-            return {
-                "success": False,
-                "error": f"Failed to parse analysis: {str(e)}"
-            }
+                    "success": False,
+                    "error": f"Failed to parse analysis: {str(e)}"
+                }
         
 # VERVANG het hele stuk van "Step 3" tot "Step 5" met deze code:
 
@@ -380,17 +384,7 @@ async def process_text_and_match(request: Request):
                 action, rest = pref.split(':', 1)
                 banks = [b.strip() for b in rest.split(',') if b.strip()]
                 soft_preferences_list.append({'action': action.strip(), 'banks': banks})
-
-                try:
-                    action, banks_str = pref.split(':', 1)
-                    banks = [bank.strip() for bank in banks_str.split(',')]
-                    soft_preferences_list.append({
-                        'action': action,
-                        'banks': banks
-                    })
-                    print(f"📋 Parsed soft preference: {action} -> {banks}")
-                except Exception as parse_error:
-                    print(f"⚠️ Error parsing soft preference '{pref}': {parse_error}")
+                print(f"📋 Parsed soft preference: {action.strip()} -> {banks}")
         
         # Add soft_preferences to the request
         if soft_preferences_list:
@@ -418,6 +412,7 @@ async def process_text_and_match(request: Request):
                 from ..utils.matcher import calculate_bank_scores
                 # Fallback to old function
                 new_matches = calculate_bank_scores(updated_preferences)
+                response.headers["Cache-Control"] = MATCH_CACHE_CONTROL
                 
                 return {
                     "success": True,
@@ -431,9 +426,14 @@ async def process_text_and_match(request: Request):
                     "originalText": user_input
                 }
         
-        # 🚀 Call matching with soft_preferences included
+        # 🚀 Call matching with soft_preferences included (op de voorberekende score matrix indien bruikbaar)
         print(f"🎯 Calling matching with preferences: {updated_preferences.keys()}")
-        matches_response = await match_diensten_enhanced(updated_preferences)
+        try:
+            prepared = await prepared_task
+        except Exception as prepare_error:
+            logging.error(f"Voorberekenen score matrix mislukt: {str(prepare_error)}")
+            prepared = None
+        matches_response = await match_prepared(updated_preferences, prepared)
         print(f"🎯 Matches response keys: {matches_response.keys() if isinstance(matches_response, dict) else 'Not a dict'}")
         
         if not matches_response.get("success"):
@@ -476,6 +476,10 @@ async def process_text_and_match(request: Request):
             "success": False,
             "error": f"Text + matching error: {str(e)}"
         }
+    finally:
+        # Vroege return (Claude fout, safety, parse fout): speculatief werk niet laten hangen
+        if prepared_task is not None and not prepared_task.done():
+            prepared_task.cancel()
 
 # NEW: Clarification processing endpoint with REAL re-matching
 # VERVANG je process_clarification functie met deze generieke versie:
@@ -488,7 +492,8 @@ async def process_clarification(request: Request):
         request_data = await request.json()
         clarification_id = request_data.get('clarification_id')
         selected_option = request_data.get('selected_option')
-        current_preferences = request_data.get('preferences', {})
+        result_id = request_data.get('result_id')
+        current_preferences = await session_preferences(result_id, request_data.get('preferences', {}))
 
         print(f"🤔 Processing clarification: {clarification_id}")
         print(f"📋 Selected option: {selected_option}")
@@ -527,13 +532,8 @@ async def process_clarification(request: Request):
                 print(f"⚠️ Geen geldige banknaam ontvangen voor boost_specific")
         
         # ✅ Herbereken matches
-        try:
-            from ..api.matching import match_diensten_enhanced
-        except ImportError:
-            from app.api.matching import match_diensten_enhanced
-
         print(f"🚀 Matching op basis van preferences: {current_preferences}")
-        matches_response = await match_diensten_enhanced(current_preferences)
+        matches_response = await match_from_session(result_id, current_preferences)
 
         if not matches_response.get("success"):
             return {"success": False, "error": "Matching mislukt"}
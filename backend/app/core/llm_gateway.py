@@ -0,0 +1,166 @@
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import importlib
+import logging
+import os
+import time
+
+ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+
+# Maximaal aantal gelijktijdige Claude calls; de rest wacht (zonder de event loop te blokkeren)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# Timeout per call (seconden), inclusief wachten op een vrije plaats
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+class LLMGateway:
+    """
+    Gedeelde async toegang tot Claude voor alle endpoints: één AsyncAnthropic client,
+    een semaphore voor begrensde concurrency, timeouts per call en queue metrics.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, timeout_seconds: float = LLM_TIMEOUT_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self._client = None
+        self._open_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Metrics
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.total_call_seconds = 0.0
+
+    async def open(self):
+        """
+        Maak de async Claude client aan (vanuit de lifespan warm-up of bij de eerste call).
+        De anthropic SDK is traag om te importeren (>1s koud): dat gebeurt pas hier, in een thread.
+        """
+        async with self._open_lock:
+            if self._client is not None:
+                return
+            anthropic = await asyncio.to_thread(importlib.import_module, "anthropic")
+            self._client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, max_retries=LLM_MAX_RETRIES)
+        logging.info(f"✅ LLM gateway geopend (max_concurrency={self.max_concurrency}, timeout={self.timeout_seconds}s)")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            logging.info("LLM gateway gesloten")
+
+    async def complete(self, prompt: str, model: str, max_tokens: int,
+                       temperature: Optional[float] = None, timeout: Optional[float] = None) -> str:
+        """
+        Eén user prompt naar Claude sturen en de tekst van het antwoord teruggeven.
+        Gooit asyncio.TimeoutError als de call (inclusief wachttijd) langer duurt dan timeout.
+        """
+        try:
+            return await asyncio.wait_for(
+                self._complete(prompt, model, max_tokens, temperature),
+                timeout=timeout or self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logging.warning(f"⏱️ Claude call ({model}) duurde langer dan {timeout or self.timeout_seconds}s")
+            raise
+
+    async def stream(self, prompt: str, model: str, max_tokens: int,
+                     temperature: Optional[float] = None, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Zelfde als complete(), maar geeft de tekst stukje per stukje terug zodra Claude hem genereert.
+        De timeout geldt voor de volledige stream (wachten op een plaats + alle tokens).
+        """
+        timeout = timeout or self.timeout_seconds
+        deadline = time.perf_counter() + timeout
+        try:
+            await self._acquire(timeout)
+            started_at = time.perf_counter()
+            try:
+                params = self._params(prompt, model, max_tokens, temperature)
+                async with self._client.messages.stream(**params) as stream:
+                    chunks = stream.text_stream.__aiter__()
+                    while True:
+                        try:
+                            text = await asyncio.wait_for(chunks.__anext__(), timeout=max(0.0, deadline - time.perf_counter()))
+                        except StopAsyncIteration:
+                            break
+                        yield text
+            except asyncio.TimeoutError:
+                raise
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self._release(started_at)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logging.warning(f"⏱️ Claude stream ({model}) duurde langer dan {timeout}s")
+            raise
+
+    def _params(self, prompt: str, model: str, max_tokens: int, temperature: Optional[float]) -> Dict[str, Any]:
+        params = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if temperature is not None:
+            params["temperature"] = temperature
+        return params
+
+    async def _acquire(self, timeout: Optional[float] = None):
+        """Wacht op een vrije plaats (telt mee in de queue diepte)"""
+        # Buiten de lifespan (scripts, tests) de client alsnog lazy openen
+        if self._client is None:
+            await self.open()
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+        finally:
+            self.waiting -= 1
+
+        self.total_wait_seconds += time.perf_counter() - queued_at
+        self.in_flight += 1
+        self.calls += 1
+
+    def _release(self, started_at: float):
+        self.in_flight -= 1
+        self.total_call_seconds += time.perf_counter() - started_at
+        self._semaphore.release()
+
+    async def _complete(self, prompt: str, model: str, max_tokens: int, temperature: Optional[float]) -> str:
+        await self._acquire()
+        started_at = time.perf_counter()
+        try:
+            response = await self._client.messages.create(**self._params(prompt, model, max_tokens, temperature))
+            return response.content[0].text
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._release(started_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(1000 * self.total_wait_seconds / self.calls, 1) if self.calls else 0.0,
+            "avg_call_ms": round(1000 * self.total_call_seconds / self.calls, 1) if self.calls else 0.0
+        }
+
+# Create instance
+llm_gateway = LLMGateway()
@@ -0,0 +1,186 @@
+from app.core.llm_gateway import llm_gateway
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import math
+import os
+import time
+
+# Model tiers van snel naar kwaliteit
+MODEL_TIERS = {
+    "fast": "claude-3-haiku-20240307",
+    "quality": "claude-3-5-sonnet-20241022"
+}
+TIER_ORDER = ["quality", "fast"]  # terugvallen van voorkeur naar sneller
+
+# Latency budget per endpoint (seconden, vanaf het begin van de aanvraag) + Claude instellingen
+LLM_ROUTES = {
+    "report": {
+        "tier": "quality", "max_tokens": 2000, "temperature": 0.3,
+        "budget_seconds": float(os.getenv("LLM_BUDGET_REPORT_SECONDS", "30"))
+    },
+    "insights": {
+        "tier": "quality", "max_tokens": 800, "temperature": 0.3,  # max_tokens INCREASED from 500!
+        "budget_seconds": float(os.getenv("LLM_BUDGET_INSIGHTS_SECONDS", "9"))
+    },
+    "text_analysis": {
+        "tier": "quality", "max_tokens": 1500, "temperature": None,
+        "budget_seconds": float(os.getenv("LLM_BUDGET_TEXT_ANALYSIS_SECONDS", "9"))
+    },
+    "text_quick": {
+        "tier": "fast", "max_tokens": 1500, "temperature": 0.1,
+        "budget_seconds": float(os.getenv("LLM_BUDGET_TEXT_QUICK_SECONDS", "6"))
+    }
+}
+
+# Tijd die overblijft voor het deterministische fallback antwoord na het afbreken van de call
+ROUTER_FALLBACK_MARGIN_SECONDS = float(os.getenv("ROUTER_FALLBACK_MARGIN_SECONDS", "0.5"))
+# Metingen ouder dan dit tellen niet meer mee (een trage tier wordt zo na een tijd opnieuw geprobeerd)
+ROUTER_WINDOW_SECONDS = float(os.getenv("ROUTER_WINDOW_SECONDS", "600"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+# Prompts boven deze lengte (tekens) worden apart gemeten: ze zijn trager
+ROUTER_LARGE_PROMPT_CHARS = int(os.getenv("ROUTER_LARGE_PROMPT_CHARS", "6000"))
+
+# Startwaarden p95 (seconden) zolang er te weinig metingen zijn (optimistisch: de metingen sturen bij)
+DEFAULT_P95_SECONDS = {
+    ("fast", "small"): 2.5, ("fast", "large"): 4.0,
+    ("quality", "small"): 6.0, ("quality", "large"): 10.0
+}
+
+class ModelRouter:
+    """
+    Kiest per aanvraag een model tier binnen het latency budget van het endpoint:
+    de voorkeur tier als zijn p95 (voor deze prompt grootte) binnen de resterende tijd past, anders een snellere.
+    De call wordt afgebroken vlak voor de deadline (asyncio.TimeoutError) zodat de caller zijn
+    deterministische fallback nog binnen het budget kan teruggeven. Elke uitkomst wordt gemeten;
+    een timeout telt als oneindig trage meting, zodat een trage tier vanzelf gemeden wordt.
+    """
+
+    def __init__(self):
+        self._samples: Dict[Tuple[str, str], deque] = {key: deque(maxlen=200) for key in DEFAULT_P95_SECONDS}
+        self.routed: Dict[str, Dict[str, int]] = {route: {} for route in LLM_ROUTES}
+        self.timeouts: Dict[str, int] = {route: 0 for route in LLM_ROUTES}
+        self.errors: Dict[str, int] = {route: 0 for route in LLM_ROUTES}
+
+    def deadline(self, route: str) -> float:
+        """Absolute deadline (time.monotonic) voor een aanvraag die nu begint"""
+        return time.monotonic() + LLM_ROUTES[route]["budget_seconds"]
+
+    @staticmethod
+    def size_bucket(prompt: str) -> str:
+        return "large" if len(prompt) > ROUTER_LARGE_PROMPT_CHARS else "small"
+
+    def p95(self, tier: str, bucket: str) -> float:
+        """Geobserveerde p95 latency (inf als meer dan 5% van de recente calls een timeout was)"""
+        samples = self._samples[(tier, bucket)]
+        cutoff = time.monotonic() - ROUTER_WINDOW_SECONDS
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        if len(samples) < ROUTER_MIN_SAMPLES:
+            return DEFAULT_P95_SECONDS[(tier, bucket)]
+        seconds = sorted(latency for _, latency in samples)
+        return seconds[math.ceil(0.95 * len(seconds)) - 1]
+
+    @staticmethod
+    def params(route: str, tier: str) -> Dict[str, Any]:
+        """Claude parameters voor een route op een bepaalde tier"""
+        config = LLM_ROUTES[route]
+        params = {"model": MODEL_TIERS[tier], "max_tokens": config["max_tokens"]}
+        if config["temperature"] is not None:
+            params["temperature"] = config["temperature"]
+        return params
+
+    def candidates(self, route: str, prompt: str, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Parameters voor een cache lookup, voorkeur eerst: de voorkeur tier, plus de snellere tier enkel als
+        plan() nu zou downgraden. Een antwoord dat onder tijdsdruk van een snellere tier kwam, wordt zo niet
+        geserveerd wanneer de voorkeur tier binnen het budget past (telt niet mee als routing beslissing).
+        """
+        tier, _ = self._choose(route, prompt, deadline)
+        return [self.params(route, t) for t in dict.fromkeys([LLM_ROUTES[route]["tier"], tier])]
+
+    def _choose(self, route: str, prompt: str, deadline: Optional[float]) -> Tuple[str, float]:
+        """(tier, timeout in seconden): van de voorkeur tier naar de snelste; past er geen, dan de snelste"""
+        if deadline is None:
+            deadline = self.deadline(route)
+        timeout = deadline - time.monotonic() - ROUTER_FALLBACK_MARGIN_SECONDS
+        bucket = self.size_bucket(prompt)
+        tiers = TIER_ORDER[TIER_ORDER.index(LLM_ROUTES[route]["tier"]):]
+        # Ook als er geen past de snelste (die meting houdt de p95 actueel)
+        return next((t for t in tiers if self.p95(t, bucket) <= timeout), tiers[-1]), timeout
+
+    def plan(self, route: str, prompt: str, deadline: Optional[float] = None) -> Tuple[Dict[str, Any], float]:
+        """(Claude parameters, timeout in seconden) voor deze prompt binnen de resterende tijd"""
+        config = LLM_ROUTES[route]
+        tier, timeout = self._choose(route, prompt, deadline)
+        if tier != config["tier"]:
+            logging.info(f"🔀 {route}: {tier} i.p.v. {config['tier']} (p95 past niet in {timeout:.1f}s)")
+        self.routed[route][tier] = self.routed[route].get(tier, 0) + 1
+        return self.params(route, tier), timeout
+
+    def _tier(self, model: str) -> str:
+        return next(tier for tier, name in MODEL_TIERS.items() if name == model)
+
+    def record(self, route: str, prompt: str, model: str, seconds: Optional[float]):
+        """Uitkomst van een call: latency in seconden, of None voor een timeout"""
+        if seconds is None:
+            self.timeouts[route] += 1
+        self._samples[(self._tier(model), self.size_bucket(prompt))].append(
+            (time.monotonic(), math.inf if seconds is None else seconds)
+        )
+
+    async def complete(self, route: str, prompt: str, params: Dict[str, Any], timeout: float) -> str:
+        """llm_gateway.complete met de timeout uit plan(); gooit asyncio.TimeoutError als de deadline te dichtbij is"""
+        if timeout <= 0:
+            self.timeouts[route] += 1
+            raise asyncio.TimeoutError(f"Geen tijd meer binnen het {route} budget")
+        start = time.monotonic()
+        try:
+            text = await llm_gateway.complete(prompt, timeout=timeout, **params)
+        except asyncio.TimeoutError:
+            self.record(route, prompt, params["model"], None)
+            raise
+        except Exception:
+            self.errors[route] += 1
+            raise
+        self.record(route, prompt, params["model"], time.monotonic() - start)
+        return text
+
+    async def stream(self, route: str, prompt: str, params: Dict[str, Any], timeout: float) -> AsyncIterator[str]:
+        """Zelfde als complete(), maar als stream (de timeout geldt voor de volledige stream)"""
+        if timeout <= 0:
+            self.timeouts[route] += 1
+            raise asyncio.TimeoutError(f"Geen tijd meer binnen het {route} budget")
+        start = time.monotonic()
+        try:
+            async for chunk in llm_gateway.stream(prompt, timeout=timeout, **params):
+                yield chunk
+        except asyncio.TimeoutError:
+            self.record(route, prompt, params["model"], None)
+            raise
+        except Exception:
+            self.errors[route] += 1
+            raise
+        self.record(route, prompt, params["model"], time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": {
+                route: {
+                    "budget_seconds": config["budget_seconds"],
+                    "preferred_tier": config["tier"],
+                    "routed": self.routed[route],
+                    "timeouts": self.timeouts[route],
+                    "errors": self.errors[route]
+                }
+                for route, config in LLM_ROUTES.items()
+            },
+            "p95_seconds": {
+                f"{tier}/{bucket}": round(self.p95(tier, bucket), 2) if math.isfinite(self.p95(tier, bucket)) else None
+                for tier, bucket in DEFAULT_P95_SECONDS
+            }
+        }
+
+# Create instance
+model_router = ModelRouter()
@@ -1,5 +1,7 @@
 import httpx
 from dotenv import load_dotenv
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import os
 import logging
 
@@ -9,6 +11,31 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Connection pool instellingen (overschrijfbaar via env)
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "10"))
+SUPABASE_MAX_PARALLEL = int(os.getenv("SUPABASE_MAX_PARALLEL", "4"))
+# Rijen per pagina bij volledige tabel reads; moet <= PostgREST max-rows zijn (Supabase standaard 1000)
+SUPABASE_PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# HTTP/2 vereist het 'h2' pakket (httpx[http2]) - anders terugvallen op HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+def parse_content_range_total(content_range: Optional[str]) -> Optional[int]:
+    """Totaal aantal rijen uit een PostgREST Content-Range header ("0-999/12345"); None als onbekend ("*")"""
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
 class SupabaseClient:
     def __init__(self):
         self.base_url = f"{SUPABASE_URL}/rest/v1"
@@ -17,21 +44,107 @@ class SupabaseClient:
             "Authorization": f"Bearer {SUPABASE_KEY}",
             "Content-Type": "application/json"
         }
-    
+        self._client = None
+        self._open_lock = asyncio.Lock()
+
+    async def open(self):
+        """Open de gedeelde, gepoolde HTTP client (aangeroepen vanuit de FastAPI lifespan)"""
+        if self._client is not None and not self._client.is_closed:
+            return
+        async with self._open_lock:
+            # Gelijktijdige eerste aanvragen: enkel de eerste maakt de client aan
+            if self._client is not None and not self._client.is_closed:
+                return
+            self._open()
+
+    def _open(self):
+        http2 = SUPABASE_HTTP2 and HTTP2_AVAILABLE
+        if SUPABASE_HTTP2 and not HTTP2_AVAILABLE:
+            logging.warning("⚠️ 'h2' niet geïnstalleerd - Supabase client gebruikt HTTP/1.1 keep-alive")
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(SUPABASE_READ_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT)
+        )
+        logging.info(f"✅ Supabase client geopend (http2={http2}, max_connections={SUPABASE_MAX_CONNECTIONS})")
+
+    async def close(self):
+        """Sluit de gedeelde HTTP client en alle open verbindingen"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logging.info("Supabase client gesloten")
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        # Buiten de lifespan (scripts, tests) de client alsnog lazy openen
+        if self._client is None or self._client.is_closed:
+            await self.open()
+
+        logging.info(f"Making request to: {self.base_url}{url}")
+
+        response = await self._client.get(url, headers=headers)
+
+        logging.info(f"Response status: {response.status_code} ({response.http_version})")
+        logging.debug(f"Response text: {response.text}")
+
+        # 206 Partial Content: PostgREST antwoord op een range met Prefer: count=exact
+        if response.status_code not in (200, 206):
+            raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+        return response
+
     async def select(self, table: str, query: str = "*"):
-        url = f"{self.base_url}/{table}?select={query}"
-        logging.info(f"Making request to: {url}")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            
-            logging.info(f"Response status: {response.status_code}")
-            logging.info(f"Response text: {response.text}")
-            
-            if response.status_code != 200:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
-                
-            return response.json()
+        response = await self._get(f"/{table}?select={query}")
+        return response.json()
+
+    async def select_all(self, table: str, query: str = "*", order: str = "id.asc",
+                         page_size: int = SUPABASE_PAGE_SIZE):
+        """
+        Volledige tabel in pagina's van page_size (limit/offset), stabiel gesorteerd op order (bv. de primary key).
+        Zonder order garandeert Postgres geen volgorde tussen aparte queries (rijen overgeslagen of dubbel).
+        Stopt pas bij het totaal uit Content-Range (Prefer: count=exact) of bij een lege pagina: een korte pagina
+        kan ook betekenen dat PostgREST max-rows kleiner is dan page_size.
+        """
+        rows, total = [], None
+        while True:
+            response = await self._get(
+                f"/{table}?select={query}&order={order}&limit={page_size}&offset={len(rows)}",
+                headers={"Prefer": "count=exact"} if total is None else None
+            )
+            if total is None:
+                total = parse_content_range_total(response.headers.get("content-range"))
+            page = response.json()
+            rows.extend(page)
+            if not page or (total is not None and len(rows) >= total):
+                break
+
+        if total is not None and len(rows) != total:
+            logging.warning(f"⚠️ {table}: {len(rows)} rijen gelezen, Content-Range meldde {total} (tabel gewijzigd tijdens lezen?)")
+        return rows
+
+    async def select_many(self, queries: List[Tuple[str, str]], max_concurrency: int = SUPABASE_MAX_PARALLEL,
+                          paged: bool = False, orders: Optional[Dict[str, str]] = None):
+        """
+        Voer onafhankelijke selects gelijktijdig uit (max_concurrency tegelijk).
+        queries: lijst van (table, query) tuples - resultaten in dezelfde volgorde
+        paged: elke tabel volledig lezen via select_all(), gesorteerd volgens orders[table]
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(table: str, query: str):
+            async with semaphore:
+                if paged:
+                    return await self.select_all(table, query, order=(orders or {}).get(table, "id.asc"))
+                return await self.select(table, query)
+
+        return await asyncio.gather(*(run(table, query) for table, query in queries))
 
 # Create instance
-supabase = SupabaseClient()
\ No newline at end of file
+supabase = SupabaseClient()
@@ -0,0 +1,40 @@
+from app.core.llm_gateway import llm_gateway
+from app.utils.templates import get_template
+from typing import Dict, Optional
+import asyncio
+import logging
+import os
+import time
+
+# Na startup op de achtergrond de trage imports/clients klaarzetten, zodat de eerste gebruiker er niet op wacht.
+# Uit (false) = alles lazy bij het eerste gebruik (snelste opstart, tragere eerste aanvraag).
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+# Duur per stap van de laatste warm-up (ms), of de foutmelding
+warmup_timings: Dict[str, object] = {}
+
+def _load_templates():
+    """Het rapport template in de gedeelde Jinja2 Environment compileren"""
+    get_template("report_template.html")
+
+async def warm_up():
+    """Stappen los van elkaar: een mislukte stap (bv. ontbrekend pakket) is niet fataal"""
+    steps = {
+        "llm_client": llm_gateway.open,
+        "templates": lambda: asyncio.to_thread(_load_templates)
+    }
+    for name, step in steps.items():
+        started_at = time.perf_counter()
+        try:
+            await step()
+            warmup_timings[name] = round(1000 * (time.perf_counter() - started_at), 1)
+        except Exception as e:
+            warmup_timings[name] = f"error: {str(e)}"
+            logging.warning(f"⚠️ Warm-up stap {name} mislukt: {str(e)}")
+    logging.info(f"🔥 Warm-up klaar: {warmup_timings}")
+
+def start_warmup() -> Optional[asyncio.Task]:
+    """Warm-up als achtergrondtaak (None als STARTUP_WARMUP uit staat)"""
+    if not STARTUP_WARMUP:
+        return None
+    return asyncio.create_task(warm_up())
@@ -0,0 +1,198 @@
+# backend/app/services/catalog.py
+from app.core.supabase_client import supabase
+from app.utils.bank_names import BankNameIndex
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+import asyncio
+import inspect
+import bisect
+import hashlib
+import json
+import logging
+import os
+
+# Alle catalogus tabellen (zelfde set als ALLOWED_TABLES in app/api/tables.py)
+CATALOG_TABLES = [
+    "aanbieders", "diensten", "kosten", "functionaliteiten",
+    "rendementen", "beheerstijl", "praktische_notities"
+]
+
+# Stabiele sortering per tabel voor het pagineren (primary key); aparte limit/offset queries zonder
+# order kunnen rijen overslaan of dubbel teruggeven, en by_dienst() hangt af van de rij volgorde
+CATALOG_TABLE_ORDER = {
+    "aanbieders": "aanbieder_id.asc",
+    "diensten": "dienst_id.asc",
+    "kosten": "dienst_id.asc",
+    "functionaliteiten": "dienst_id.asc",
+    "rendementen": "dienst_id.asc",
+    "beheerstijl": "dienst_id.asc",
+    "praktische_notities": "dienst_id.asc"
+}
+
+# De catalogus verandert enkele keren per week - standaard elk uur verversen
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", "3600"))
+
+class CatalogSnapshot:
+    """Onveranderlijke in-memory kopie van alle catalogus tabellen met indexen"""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], loaded_at: datetime):
+        self.tables = tables
+        self.loaded_at = loaded_at
+        # Versie = hash van de inhoud: wijzigt enkel als de data effectief verandert
+        payload = json.dumps(tables, sort_keys=True, default=str).encode("utf-8")
+        self.version = hashlib.sha1(payload).hexdigest()[:12]
+
+        # Index per dienst_id: laatste rij wint (zelfde gedrag als de oude bulk lookups)
+        self._by_dienst = {}
+        self._rows_by_dienst = {}
+        for table, rows in tables.items():
+            if rows and "dienst_id" in rows[0]:
+                single, multi = {}, defaultdict(list)
+                for row in rows:
+                    single[row.get("dienst_id")] = row
+                    multi[row.get("dienst_id")].append(row)
+                self._by_dienst[table] = single
+                self._rows_by_dienst[table] = dict(multi)
+
+        # Gesorteerde unieke minimum bedragen: bedragen tussen twee drempels hebben dezelfde diensten
+        self.minimum_thresholds = sorted({
+            d.get("minimum") for d in tables.get("diensten", [])
+            if isinstance(d.get("minimum"), (int, float))
+        })
+
+        self.aanbieders_by_id = {a.get("aanbieder_id"): a for a in tables.get("aanbieders", [])}
+        self.diensten_by_aanbieder = defaultdict(list)
+        for dienst in tables.get("diensten", []):
+            self.diensten_by_aanbieder[dienst.get("aanbieder_id")].append(dienst)
+        self._bank_index = None
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.get(table, [])
+
+    def by_dienst(self, table: str) -> Dict[Any, Dict[str, Any]]:
+        """Lookup dienst_id -> rij voor tabellen met een dienst_id kolom"""
+        return self._by_dienst.get(table, {})
+
+    def rows_for_dienst(self, table: str, dienst_id) -> List[Dict[str, Any]]:
+        return self._rows_by_dienst.get(table, {}).get(dienst_id, [])
+
+    def aanbieder(self, aanbieder_id) -> Optional[Dict[str, Any]]:
+        return self.aanbieders_by_id.get(aanbieder_id)
+
+    @property
+    def bank_index(self) -> BankNameIndex:
+        """Alias index van alle aanbiedernamen (lazy: pas opgebouwd bij de eerste bank filter)"""
+        if self._bank_index is None:
+            self._bank_index = BankNameIndex.from_snapshot(self)
+        return self._bank_index
+
+    def bedrag_bucket(self, bedrag) -> int:
+        """Aantal minimum drempels <= bedrag (zelfde bucket = zelfde bedrag filter resultaat)"""
+        return bisect.bisect_right(self.minimum_thresholds, bedrag)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "counts": {table: len(rows) for table, rows in self.tables.items()}
+        }
+
+class Catalog:
+    """Laadt de catalogus bij startup en ververst hem op de achtergrond (TTL of admin trigger)"""
+
+    def __init__(self, ttl_seconds: int = CATALOG_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._listeners = []
+        self.last_error = None
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def add_listener(self, callback: Callable[[CatalogSnapshot], Any]):
+        """
+        Callback die wordt aangeroepen wanneer een nieuwe catalogus versie actief wordt.
+        Gewone functies lopen samen in een thread (mogen blokkeren), coroutine functies op de event loop.
+        """
+        self._listeners.append(callback)
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Huidige snapshot; laadt synchroon als er nog geen is (bv. startup faalde)"""
+        if self._snapshot is None:
+            async with self._lock:
+                # Andere aanvraag kan intussen al geladen hebben
+                if self._snapshot is None:
+                    await self._load()
+        return self._snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        async with self._lock:
+            return await self._load()
+
+    async def _load(self) -> CatalogSnapshot:
+        # Gepagineerd: PostgREST kapt een select zonder limit af op max-rows
+        results = await supabase.select_many([(table, "*") for table in CATALOG_TABLES], paged=True,
+                                             orders=CATALOG_TABLE_ORDER)
+        # Content hash (json.dumps van alle tabellen) + indexen opbouwen buiten de event loop
+        snapshot = await asyncio.to_thread(CatalogSnapshot, dict(zip(CATALOG_TABLES, results)), datetime.now())
+
+        previous = self._snapshot
+        self._snapshot = snapshot
+        self.last_error = None
+        logging.info(f"📚 Catalogus geladen: versie {snapshot.version} ({sum(len(r) for r in results)} rijen)")
+
+        if previous is None or previous.version != snapshot.version:
+            blocking = [listener for listener in self._listeners if not inspect.iscoroutinefunction(listener)]
+            await asyncio.to_thread(self._notify, snapshot, blocking)
+            for listener in self._listeners:
+                if inspect.iscoroutinefunction(listener):
+                    try:
+                        await listener(snapshot)
+                    except Exception as e:
+                        logging.error(f"Error in catalog listener: {str(e)}")
+        return snapshot
+
+    @staticmethod
+    def _notify(snapshot: CatalogSnapshot, listeners: List[Callable[[CatalogSnapshot], Any]]):
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logging.error(f"Error in catalog listener: {str(e)}")
+
+    async def start(self):
+        """Eerste load + achtergrond refresh loop starten (vanuit de FastAPI lifespan)"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Niet fataal: get_snapshot() probeert opnieuw bij de eerste aanvraag
+            self.last_error = str(e)
+            logging.error(f"Error bij laden catalogus: {str(e)}")
+
+        if self._task is None and self.ttl_seconds > 0:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                logging.error(f"Error bij verversen catalogus: {str(e)}")
+
+# Create instance
+catalog = Catalog()
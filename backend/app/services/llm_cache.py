@@ -0,0 +1,166 @@
+# backend/app/services/llm_cache.py
+from app.services.catalog import catalog
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Persistente cache van Claude antwoorden (overleeft herstarts en wordt gedeeld door workers)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+class LLMResponseCache:
+    """
+    SQLite LRU cache voor Claude completions, gesleuteld op een hash van (prompt, model, temperature, max_tokens).
+    Een entry is enkel geldig voor dezelfde catalogus versie en prompt template versie:
+    na een nieuwe catalogus versie worden oude entries opgeruimd.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    catalog_version TEXT,
+                    template_version TEXT,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    latency_seconds REAL,
+                    created_at REAL,
+                    last_used_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used_at)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(prompt: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps({
+            "prompt": prompt,
+            "model": params.get("model"),
+            "temperature": params.get("temperature"),
+            "max_tokens": params.get("max_tokens")
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _catalog_version() -> Optional[str]:
+        snapshot = catalog.snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def _get(self, keys: List[str], template_version: str) -> Optional[str]:
+        """Eerste key (in volgorde) met een geldige entry"""
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                f"SELECT key, response, latency_seconds FROM llm_responses WHERE key IN ({', '.join('?' * len(keys))}) "
+                "AND catalog_version IS ? AND template_version = ?",
+                (*keys, self._catalog_version(), template_version)
+            ).fetchall()
+            if not rows:
+                self.misses += 1
+                return None
+            key, response, latency_seconds = min(rows, key=lambda row: keys.index(row[0]))
+            conn.execute("UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+            self.saved_seconds += latency_seconds or 0.0
+            return response
+
+    def _put(self, key: str, template_version: str, model: str, response: str, latency_seconds: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, self._catalog_version(), template_version, model, response, latency_seconds, now, now)
+            )
+            # LRU: minst recent gebruikte entries boven de limiet verwijderen
+            evicted = conn.execute(
+                "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            conn.commit()
+            self.evictions += max(evicted, 0)
+
+    async def get(self, prompt: str, params: Dict[str, Any], template_version: str) -> Optional[str]:
+        """Gecachte completion voor deze prompt + parameters, of None"""
+        return await self.get_any(prompt, [params], template_version)
+
+    async def get_any(self, prompt: str, params_list: List[Dict[str, Any]], template_version: str) -> Optional[str]:
+        """
+        Gecachte completion voor deze prompt met de eerste parameters (bv. model) uit params_list
+        die een entry hebben, of None. Eén lookup: telt als één hit of miss.
+        """
+        try:
+            keys = [self.make_key(prompt, params) for params in params_list]
+            return await asyncio.to_thread(self._get, keys, template_version)
+        except sqlite3.Error as e:
+            logging.error(f"Error bij lezen LLM cache: {str(e)}")
+            return None
+
+    async def put(self, prompt: str, params: Dict[str, Any], template_version: str, response: str, latency_seconds: float):
+        try:
+            await asyncio.to_thread(self._put, self.make_key(prompt, params), template_version,
+                                    params.get("model"), response, latency_seconds)
+        except sqlite3.Error as e:
+            logging.error(f"Error bij schrijven LLM cache: {str(e)}")
+
+    def _invalidate(self, catalog_version: str) -> int:
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM llm_responses WHERE catalog_version IS NOT ?", (catalog_version,)).rowcount
+            conn.commit()
+        return removed
+
+    async def invalidate_catalog(self, snapshot):
+        """Catalog listener: antwoorden van vorige catalogus versies kunnen niet meer geraakt worden"""
+        try:
+            removed = await asyncio.to_thread(self._invalidate, snapshot.version)
+            if removed > 0:
+                logging.info(f"🧹 LLM cache: {removed} entries van oude catalogus versies verwijderd")
+        except sqlite3.Error as e:
+            logging.error(f"Error bij opruimen LLM cache: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Telt de entries in SQLite: vanuit een async endpoint via asyncio.to_thread aanroepen"""
+        lookups = self.hits + self.misses
+        try:
+            with self._lock:
+                entries = self._connection().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_latency_seconds": round(self.saved_seconds, 2),
+            "evictions": self.evictions
+        }
+
+# Create instance
+llm_cache = LLMResponseCache()
+catalog.add_listener(llm_cache.invalidate_catalog)
@@ -0,0 +1,74 @@
+# backend/app/services/match_cache.py
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import copy
+import logging
+import os
+import time
+
+MATCH_CACHE_SIZE = int(os.getenv("MATCH_CACHE_SIZE", "1024"))
+MATCH_CACHE_TTL_SECONDS = int(os.getenv("MATCH_CACHE_TTL_SECONDS", "900"))
+
+class MatchResultCache:
+    """
+    LRU + TTL cache voor match responses, gesleuteld op een gecanonicaliseerde vorm van de voorkeuren.
+    Entries worden bij opslaan en teruggeven gekopieerd zodat callers ze vrij kunnen aanpassen.
+    """
+
+    def __init__(self, max_size: int = MATCH_CACHE_SIZE, ttl_seconds: int = MATCH_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Bewaar een kopie van value (enkel succesvolle responses) en geef value zelf terug"""
+        if self.max_size <= 0 or not value.get("success"):
+            return value
+        self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        if self._entries:
+            logging.info(f"🧹 Match cache geleegd ({len(self._entries)} entries)")
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+# Create instance
+match_cache = MatchResultCache()
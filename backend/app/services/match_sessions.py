@@ -0,0 +1,143 @@
+# backend/app/services/match_sessions.py
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+MATCH_SESSION_TTL_SECONDS = int(os.getenv("MATCH_SESSION_TTL_SECONDS", "1800"))
+MATCH_SESSION_MAX_ENTRIES = int(os.getenv("MATCH_SESSION_MAX_ENTRIES", "2000"))
+# Enkel de eerste matches van een response worden bewaard (de resultaten pagina toont er 10);
+# vervolg endpoints herrekenen vanaf de score matrix, niet vanaf de bewaarde matches
+MATCH_SESSION_MAX_MATCHES = int(os.getenv("MATCH_SESSION_MAX_MATCHES", "10"))
+# Optioneel: SQLite bestand zodat andere uvicorn workers een result_id ook kennen (leeg = enkel in geheugen)
+MATCH_SESSION_DB_PATH = os.getenv("MATCH_SESSION_DB_PATH", "")
+
+class MatchSessionStore:
+    """
+    Server-side toestand van een match resultaat, opvraagbaar via result_id door de vervolg endpoints
+    (insights, rapport, tekst, clarification, herberekening) zodat die niet opnieuw moeten matchen.
+    Een entry bevat de voorkeuren, de match response (ingekort tot max_matches matches) en 'prepared':
+    catalogus snapshot + score matrix (een taak, enkel in geheugen, lazy gestart door de eerste gebruiker).
+    Met MATCH_SESSION_DB_PATH worden voorkeuren en response ook in SQLite bewaard.
+    """
+
+    def __init__(self, ttl_seconds: int = MATCH_SESSION_TTL_SECONDS, max_entries: int = MATCH_SESSION_MAX_ENTRIES,
+                 db_path: str = MATCH_SESSION_DB_PATH, max_matches: int = MATCH_SESSION_MAX_MATCHES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_matches = max_matches
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._conn = None
+        self._lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS match_sessions (
+                    result_id TEXT PRIMARY KEY,
+                    preferences TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_match_sessions_created ON match_sessions (created_at)")
+            self._conn.commit()
+        return self._conn
+
+    async def create(self, preferences: Dict[str, Any], response: Dict[str, Any],
+                     prepared: Optional[asyncio.Future] = None) -> str:
+        """Nieuwe entry; prepared = taak/future die de voorberekende score matrix oplevert (of None: lazy)"""
+        result_id = uuid.uuid4().hex
+        if len(response.get("matches") or []) > self.max_matches:
+            response = {**response, "matches": response["matches"][:self.max_matches]}
+        self._remember(result_id, {"preferences": preferences, "response": response, "prepared": prepared})
+        self.created += 1
+        if self.db_path:
+            try:
+                await asyncio.to_thread(self._insert, result_id, json.dumps(preferences, default=str),
+                                        json.dumps(response, default=str))
+            except sqlite3.Error as e:
+                logging.error(f"Error bij schrijven match sessie: {str(e)}")
+        return result_id
+
+    async def get(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """Entry voor result_id (zonder 'prepared' als hij uit SQLite komt), of None als hij onbekend/verlopen is"""
+        if not result_id:
+            return None
+        entry = self._entries.get(result_id)
+        if entry is not None:
+            stored_at, value = entry
+            if time.monotonic() - stored_at <= self.ttl_seconds:
+                self._entries.move_to_end(result_id)
+                self.hits += 1
+                return value
+            del self._entries[result_id]
+
+        value = None
+        if self.db_path:
+            try:
+                value = await asyncio.to_thread(self._select, result_id)
+            except sqlite3.Error as e:
+                logging.error(f"Error bij lezen match sessie: {str(e)}")
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(result_id, value)
+        return value
+
+    def _remember(self, result_id: str, value: Dict[str, Any]):
+        self._entries[result_id] = (time.monotonic(), value)
+        self._entries.move_to_end(result_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _insert(self, result_id: str, preferences: str, response: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO match_sessions VALUES (?, ?, ?, ?)", (result_id, preferences, response, now))
+            conn.execute("DELETE FROM match_sessions WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.commit()
+
+    def _select(self, result_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT preferences, response FROM match_sessions WHERE result_id = ? AND created_at >= ?",
+                (result_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"preferences": json.loads(row[0]), "response": json.loads(row[1]), "prepared": None}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_matches": self.max_matches,
+            "ttl_seconds": self.ttl_seconds,
+            "sqlite": self.db_path or None,
+            "created": self.created,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+# Create instance
+match_sessions = MatchSessionStore()
@@ -0,0 +1,182 @@
+# backend/app/services/pdf_renderer.py
+# WeasyPrint layout is CPU-zwaar (honderden ms tot seconden per rapport): renderen gebeurt in een pool van
+# warme worker processen i.p.v. op de event loop. Elke worker laadt WeasyPrint en de fonts één keer.
+# De rapport template heeft zijn CSS inline (<style>): er worden geen externe stylesheets meegegeven.
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+# Maximaal aantal renders in de pool + wachtrij; daarboven wacht een aanvraag (backpressure)...
+PDF_RENDER_MAX_PENDING = int(os.getenv("PDF_RENDER_MAX_PENDING", str(PDF_RENDER_WORKERS * 4)))
+# ...en na zo lang wachten geeft hij het op (RenderQueueFull -> 503)
+PDF_RENDER_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_QUEUE_TIMEOUT_SECONDS", "5"))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+# Workers al bij startup opstarten (anders bij het eerste rapport)
+PDF_RENDER_PREWARM = os.getenv("PDF_RENDER_PREWARM", "false").lower() == "true"
+
+class RenderQueueFull(Exception):
+    """Alle render plaatsen bezet en de wachttijd is verstreken"""
+
+# --- In de worker processen ---------------------------------------------------
+
+_HTML = None
+
+def _init_worker():
+    """Initializer per worker: WeasyPrint importeren en fonts laden met een mini document"""
+    global _HTML
+    logging.getLogger('weasyprint').setLevel(logging.ERROR)
+    logging.getLogger('fontTools').setLevel(logging.ERROR)
+    from weasyprint import HTML
+
+    _HTML = HTML
+    HTML(string="<p>warm</p>").write_pdf()
+
+def _render_pdf(html_content: str) -> bytes:
+    return _HTML(string=html_content).write_pdf()
+
+def _ping() -> int:
+    return os.getpid()
+
+# --- In het API proces --------------------------------------------------------
+
+class PDFRenderService:
+    """
+    Process pool voor HTML -> PDF. render() wacht op een vrije plaats (max PDF_RENDER_MAX_PENDING renders
+    tegelijk in de pool + wachtrij) en gooit RenderQueueFull als dat langer duurt dan de queue timeout.
+    Een plaats blijft bezet tot de render in de worker echt klaar is. Een render die de timeout overschrijdt
+    kan niet onderbroken worden: de pool wordt dan gerecycled (workers gestopt, renders die er nog in zaten
+    falen met BrokenProcessPool). Een gecrashte worker breekt de pool: de volgende render start een nieuwe.
+    """
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, max_pending: int = PDF_RENDER_MAX_PENDING,
+                 timeout_seconds: float = PDF_RENDER_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor = None
+        self._slots = None
+
+        # Metrics
+        self.pending = 0
+        self.rendered = 0
+        self.rejected = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.total_wait_seconds = 0.0
+        self.total_render_seconds = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: schone workers zonder de threads/event loop van het API proces
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            logging.info(f"🖨️ PDF render pool gestart ({self.workers} workers)")
+        return self._executor
+
+    async def start(self, prewarm: bool = PDF_RENDER_PREWARM):
+        """Optioneel alle workers meteen opstarten zodat het eerste rapport geen opstartkost betaalt"""
+        if not prewarm:
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        await asyncio.gather(*[loop.run_in_executor(pool, _ping) for _ in range(self.workers)])
+        logging.info("✅ PDF render workers opgewarmd")
+
+    def _recycle(self, pool: ProcessPoolExecutor):
+        """Pool met een hangende render weggooien: de workers stoppen zodat hun plaatsen vrijkomen"""
+        if self._executor is pool:
+            self._executor = None
+        self.recycled += 1
+        # Een lopende taak kan niet geannuleerd worden; na terminate() breekt de pool en falen de futures
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logging.warning(f"♻️ PDF render pool gerecycled na een render van meer dan {self.timeout_seconds}s")
+
+    async def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def render(self, html_content: str) -> bytes:
+        """HTML -> PDF bytes"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        queued_at = time.perf_counter()
+        self.pending += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=PDF_RENDER_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RenderQueueFull(f"PDF rendering bezet ({self.max_pending} rapporten in behandeling)")
+        finally:
+            self.pending -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        try:
+            pool = self._pool()
+            future = asyncio.get_running_loop().run_in_executor(pool, _render_pdf, html_content)
+        except Exception:
+            self.errors += 1
+            self._slots.release()
+            raise
+        # De plaats komt pas vrij als de worker klaar is (ook na een timeout of een geannuleerde aanvraag)
+        future.add_done_callback(self._render_done)
+
+        try:
+            # shield: wait_for mag enkel het wachten opgeven, niet de future (die de plaats bezet houdt)
+            pdf_bytes = await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_seconds)
+            self.rendered += 1
+            return pdf_bytes
+        except asyncio.TimeoutError:
+            self.errors += 1
+            self.timeouts += 1
+            self._recycle(pool)
+            raise
+        except BrokenProcessPool:
+            self.errors += 1
+            if self._executor is pool:
+                self._executor = None
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.total_render_seconds += time.perf_counter() - started_at
+
+    def _render_done(self, future: asyncio.Future):
+        self._slots.release()
+        # Niemand wacht nog op de future na een timeout: exception hier ophalen (geen "never retrieved")
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "timeout_seconds": self.timeout_seconds,
+            "started": self._executor is not None,
+            "queue_depth": self.pending,
+            "rendered": self.rendered,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+            "avg_wait_ms": round(1000 * self.total_wait_seconds / self.rendered, 1) if self.rendered else 0.0,
+            "avg_render_ms": round(1000 * self.total_render_seconds / self.rendered, 1) if self.rendered else 0.0
+        }
+
+# Create instance
+pdf_renderer = PDFRenderService()
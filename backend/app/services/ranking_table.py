@@ -0,0 +1,166 @@
+# backend/app/services/ranking_table.py
+from app.utils.scoring import CRITERIA, ScoreMatrix, get_weight, match_percentages, top_k_indices
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import itertools
+import logging
+import os
+import time
+import numpy as np
+
+# Per gewichten combinatie enkel de top k bewaren (>= MATCH_TOP_K en MATCH_SOFT_TOP_K in matching.py)
+RANKING_TABLE_TOP_K = int(os.getenv("RANKING_TABLE_TOP_K", "30"))
+# Grotere populaties niet voorberekenen (243 rankings kosten dan te veel build tijd): enkel de matrix cachen
+RANKING_TABLE_MAX_DIENSTEN = int(os.getenv("RANKING_TABLE_MAX_DIENSTEN", "20000"))
+
+# Alle mogelijke gewichten per criterium (heel_ en zeer_belangrijk vallen samen)
+WEIGHT_LEVELS = sorted({get_weight(level) for level in ["heel_belangrijk", "zeer_belangrijk", "belangrijk", "geen_voorkeur"]})
+WEIGHT_SHAPE = (len(WEIGHT_LEVELS),) * len(CRITERIA)
+
+def weight_combo_index(gewichten: Dict[str, float]) -> Optional[int]:
+    """Rij in de ranking tabel voor een gewichten dict (zelfde volgorde als itertools.product)"""
+    try:
+        levels = [WEIGHT_LEVELS.index(gewichten[criterium]) for criterium in CRITERIA]
+    except (KeyError, ValueError):
+        return None
+    return int(np.ravel_multi_index(levels, WEIGHT_SHAPE))
+
+class RankedPopulation:
+    """
+    Eén populatie diensten (type cluster + bedrag bucket) met de top k ranking voor elke
+    gewichten combinatie: orders[combo] = de top k dienst indices gesorteerd op matchScore,
+    percentages[combo] = de bijhorende matchScores. Geheugen: combos x k, onafhankelijk van n.
+    Boven max_diensten wordt enkel de score matrix bewaard (orders = None).
+    """
+
+    def __init__(self, matrix: ScoreMatrix, top_k: int = RANKING_TABLE_TOP_K,
+                 max_diensten: int = RANKING_TABLE_MAX_DIENSTEN):
+        self.matrix = matrix
+        n = len(matrix)
+        self.top_k = min(top_k, n)
+        self.orders = None
+        self.percentages = None
+        if n > max_diensten:
+            return
+
+        combos = int(np.prod(WEIGHT_SHAPE))
+        self.orders = np.zeros((combos, self.top_k), dtype=np.int32)
+        self.percentages = np.zeros((combos, self.top_k), dtype=np.int16)
+        if n:
+            for combo_index, combo in enumerate(itertools.product(WEIGHT_LEVELS, repeat=len(CRITERIA))):
+                percentages = match_percentages(matrix.weighted_totals(dict(zip(CRITERIA, combo))))
+                order = top_k_indices(percentages, self.top_k)
+                self.orders[combo_index] = order
+                self.percentages[combo_index] = percentages[order]
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.orders is None else self.orders.nbytes + self.percentages.nbytes
+
+    def ranked(self, gewichten: Dict[str, float], limit: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (order, percentages) van de top `limit` voor deze gewichten, of None als dat niet voorberekend is
+        (onbekende gewichten, te grote populatie of limit > top_k)
+        """
+        if self.orders is None or (limit > self.top_k and self.top_k < len(self.matrix)):
+            return None
+        combo_index = weight_combo_index(gewichten)
+        if combo_index is None:
+            return None
+        return self.orders[combo_index][:limit], self.percentages[combo_index][:limit].astype(np.int64)
+
+class RankingTable:
+    """
+    Gematerialiseerde rankings voor de volledige wizard voorkeurruimte, opnieuw opgebouwd
+    (in een achtergrond thread) na elke nieuwe catalogus versie.
+    Populaties die voor meerdere bedrag buckets identiek zijn worden gedeeld.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._populations = {}
+        self._pending_version = None
+        self._task = None
+        self.build_seconds = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, snapshot, type_key, bedrag) -> Optional[RankedPopulation]:
+        """Voorberekende populatie voor (type, bedrag) - None als de tabel (nog) niet voor deze versie bestaat"""
+        if self.version != snapshot.version or not isinstance(bedrag, (int, float)):
+            self.misses += 1
+            return None
+        population = self._populations.get((type_key, snapshot.bedrag_bucket(bedrag)))
+        if population is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return population
+
+    def schedule_build(self, snapshot, base_populations: Dict[Any, List[Dict[str, Any]]]):
+        """Start de precompute voor een nieuwe snapshot op de achtergrond (catalog listener)"""
+        self._pending_version = snapshot.version
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._build(snapshot, base_populations)
+            return
+        self._task = loop.create_task(asyncio.to_thread(self._build, snapshot, base_populations))
+
+    def _build(self, snapshot, base_populations: Dict[Any, List[Dict[str, Any]]]):
+        start = time.perf_counter()
+        kosten_lookup = snapshot.by_dienst("kosten")
+        functionaliteiten_lookup = snapshot.by_dienst("functionaliteiten")
+        rendementen_lookup = snapshot.by_dienst("rendementen")
+        thresholds = snapshot.minimum_thresholds
+        position = {minimum: k for k, minimum in enumerate(thresholds)}
+        bank_index = snapshot.bank_index
+
+        populations = {}
+        shared = {}
+        try:
+            for type_key, diensten in base_populations.items():
+                # Niet-numerieke minimums kunnen niet in buckets: die aanvragen blijven live berekend
+                minimums = [d.get("minimum") for d in diensten]
+                if any(m is not None and not isinstance(m, (int, float)) for m in minimums):
+                    continue
+
+                for bucket in range(len(thresholds) + 1):
+                    # bedrag in bucket b voldoet aan elk minimum onder de b-de drempel
+                    rows = tuple(
+                        i for i, minimum in enumerate(minimums)
+                        if minimum is None or position[minimum] < bucket
+                    )
+                    share_key = (type_key, rows)
+                    if share_key not in shared:
+                        matrix = ScoreMatrix([diensten[i] for i in rows], kosten_lookup,
+                                             functionaliteiten_lookup, rendementen_lookup, bank_index)
+                        shared[share_key] = RankedPopulation(matrix)
+                    populations[(type_key, bucket)] = shared[share_key]
+        except Exception as e:
+            logging.error(f"Error bij opbouwen ranking tabel: {str(e)}")
+            return
+
+        if self._pending_version != snapshot.version:
+            return  # intussen is er al een nieuwere catalogus versie
+
+        self._populations = populations
+        self.version = snapshot.version
+        self.build_seconds = round(time.perf_counter() - start, 3)
+        logging.info(f"📊 Ranking tabel opgebouwd: {len(shared)} populaties x {int(np.prod(WEIGHT_SHAPE))} gewichten ({self.build_seconds}s)")
+
+    def stats(self) -> Dict[str, Any]:
+        unique = {id(p): p for p in self._populations.values()}.values()
+        return {
+            "version": self.version,
+            "entries": len(self._populations),
+            "populations": len(unique),
+            "bytes": sum(p.nbytes for p in unique),
+            "top_k": RANKING_TABLE_TOP_K,
+            "build_seconds": self.build_seconds,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Create instance
+ranking_table = RankingTable()
@@ -1,35 +1,29 @@
 # backend/app/services/report_generator.py
 from fastapi import HTTPException
 from fastapi.responses import HTMLResponse
-from jinja2 import Environment, FileSystemLoader
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Voor server gebruik
-import seaborn as sns
+import asyncio
 import io
 import base64
 from datetime import datetime
+import importlib.util
 import os
+from .pdf_renderer import pdf_renderer, RenderQueueFull
+from ..utils.charts import generate_charts, cost_values
+from ..utils.templates import get_environment, render_template, stream_template
 
-# Try WeasyPrint import with fallback
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-    print("✅ WeasyPrint successfully imported")
-except ImportError as e:
-    WEASYPRINT_AVAILABLE = False
-    print(f"⚠️ WeasyPrint not available: {e}")
+# WeasyPrint wordt enkel in de PDF render workers geïmporteerd; hier volstaat te weten of hij er is
+WEASYPRINT_AVAILABLE = importlib.util.find_spec("weasyprint") is not None
+if WEASYPRINT_AVAILABLE:
+    print("✅ WeasyPrint available (PDF render workers)")
+else:
+    print("⚠️ WeasyPrint not available")
     print("📄 Will generate HTML reports instead")
 
 class ReportGenerator:
-    def __init__(self):
-        # Template directory setup
-        template_dir = os.path.join(os.path.dirname(__file__), '../templates')
-        self.jinja_env = Environment(loader=FileSystemLoader(template_dir))
-        
-        # Styling setup
-        plt.style.use('seaborn-v0_8' if hasattr(plt.style, 'seaborn-v0_8') else 'default')
-        sns.set_palette("husl")
+    @property
+    def jinja_env(self):
+        # Gedeelde Environment: templates worden één keer gecompileerd, niet per generator/aanvraag
+        return get_environment()
     
     async def generate_report(self, user_data: dict, matches: list, claude_analysis: str, format: str = "pdf"):
         """Hoofdfunctie voor rapport generatie"""
@@ -41,17 +35,17 @@ class ReportGenerator:
             charts = self._generate_charts(matches)
             report_data.update(charts)
             
-            # 3. HTML template renderen
-            html_content = self._render_template(report_data)
-            
-            # 4. PDF of HTML returneren
+            # 3. PDF (volledige HTML nodig voor WeasyPrint) of HTML fallback als stream
+            # (in een thread: het eerste deel wordt vooraf gerenderd, een template fout daarin wordt een 500)
             if format == "pdf" and WEASYPRINT_AVAILABLE:
-                pdf_bytes = self._generate_pdf(html_content)
+                html_content = await asyncio.to_thread(self._render_template, report_data)
+                pdf_bytes = await self._generate_pdf(html_content)
                 return pdf_bytes, "application/pdf"
             else:
-                # Fallback naar HTML
-                return html_content, "text/html"
+                return await asyncio.to_thread(self._stream_template, report_data), "text/html"
             
+        except RenderQueueFull:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
     
@@ -76,49 +70,36 @@ class ReportGenerator:
         }
     
     def _generate_charts(self, matches: list) -> dict:
-        """Genereer base64 encoded charts"""
-        charts = {}
-        
-        # Kosten vergelijking chart
-        if len(matches) >= 2:
-            charts['cost_chart'] = self._create_cost_chart(matches)
+        """Genereer inline SVG charts (kosten, rendement, score); matplotlib PNG enkel als fallback"""
+        try:
+            return generate_charts(matches)
+        except Exception as e:
+            print(f"⚠️ SVG chart error: {str(e)} - matplotlib fallback")
         
+        charts = {}
+        cost_chart = self._create_cost_chart(matches)
+        if cost_chart:
+            charts['cost_chart'] = f'<img src="{cost_chart}" alt="Kostenvergelijking Top 3 Matches" />'
         return charts
     
     def _create_cost_chart(self, matches: list) -> str:
-        """Maak kosten vergelijking bar chart"""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Verbeterde data extractie
-        names = []
-        costs = []
-        
-        for i, match in enumerate(matches[:3]):
-            # Probeer verschillende velden voor naam
-            name = (match.get('naam_aanbieder') or 
-                   match.get('name') or 
-                   match.get('aanbieder_naam') or 
-                   f'Partij {i+1}')
-            names.append(name[:15])
-            
-            # Probeer verschillende velden voor kosten
-            cost = (match.get('tco') or 
-                   match.get('totale_kosten') or 
-                   match.get('kosten') or 
-                   match.get('TCO') or 
-                   0)
-            
-            # Als kosten 0 zijn, probeer een realistische schatting
-            if cost == 0:
-                bedrag = match.get('bedrag', 50000)
-                cost = bedrag * 0.02  # 2% als fallback
-            
-            costs.append(cost)
+        """Maak kosten vergelijking bar chart (matplotlib PNG fallback)"""
+        try:
+            import matplotlib
+            matplotlib.use('Agg')  # Voor server gebruik
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("⚠️ matplotlib not available for chart fallback")
+            return None
         
-        print(f"🎨 Chart data - Names: {names}, Costs: {costs}")
+        data = cost_values(matches)
+        if data is None:
+            print("⚠️ No valid cost data for chart")
+            return None
+        names, costs = data
         
-        # Alleen grafiek maken als we geldige data hebben
-        if all(cost > 0 for cost in costs):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        try:
             bars = ax.bar(names, costs, color=['#2E8B57', '#4682B4', '#CD853F'])
             
             ax.set_title('Totale Kosten per Jaar (TCO)', fontsize=16, fontweight='bold')
@@ -135,39 +116,35 @@ class ReportGenerator:
             
             # Convert to base64
             buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
+            fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
             chart_b64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
             return f"data:image/png;base64,{chart_b64}"
-        else:
-            print("⚠️ No valid cost data for chart")
-            plt.close()
-            return None
+        finally:
+            plt.close(fig)
     
     def _render_template(self, data: dict) -> str:
         """Render HTML template"""
-        template = self.jinja_env.get_template('report_template.html')
-        return template.render(**data)
+        return render_template('report_template.html', **data)
     
-    def _generate_pdf(self, html_content: str) -> bytes:
-        """Convert HTML to PDF met WeasyPrint"""
+    def _stream_template(self, data: dict):
+        """Render HTML template in stukken (voor StreamingResponse)"""
+        return stream_template('report_template.html', **data)
+    
+    async def _generate_pdf(self, html_content: str) -> bytes:
+        """Convert HTML to PDF met WeasyPrint (in de render worker pool, niet op de event loop)"""
         if not WEASYPRINT_AVAILABLE:
             raise Exception("WeasyPrint is not available")
         
         try:
-            import logging
-            # Disable WeasyPrint verbose logging
-            logging.getLogger('weasyprint').setLevel(logging.ERROR)
-            logging.getLogger('fontTools').setLevel(logging.ERROR)
-            
-            # Simple PDF generation without external CSS for now
-            html_doc = HTML(string=html_content)
-            pdf_bytes = html_doc.write_pdf()
-            
-            return pdf_bytes
+            # Simple PDF generation without external CSS for now (de template heeft zijn CSS inline)
+            return await pdf_renderer.render(html_content)
+        
+        except RenderQueueFull:
+            raise
             
         except Exception as e:
             print(f"🚨 WeasyPrint error: {str(e)}")
-            raise Exception(f"WeasyPrint PDF generation failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"WeasyPrint PDF generation failed: {str(e)}")
+
+# Create instance
+report_generator = ReportGenerator()
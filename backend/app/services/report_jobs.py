@@ -0,0 +1,286 @@
+# backend/app/services/report_jobs.py
+# Persistente job queue voor trage rapport generatie (match + context + Claude + PDF):
+# POST geeft meteen een job id terug, een begrensde pool van workers voert de jobs uit.
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from collections import deque
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+REPORT_JOBS_PATH = os.getenv("REPORT_JOBS_PATH", "report_jobs.sqlite3")
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "3"))
+# Wachttijd vóór een nieuwe poging: REPORT_JOB_RETRY_BACKOFF_SECONDS * 2^(poging - 1)
+REPORT_JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("REPORT_JOB_RETRY_BACKOFF_SECONDS", "2"))
+# Een 'running' job die langer dan dit geleden gestart is (crash, herstart) wordt opnieuw opgepikt
+REPORT_JOB_LEASE_SECONDS = float(os.getenv("REPORT_JOB_LEASE_SECONDS", "300"))
+# Afgewerkte jobs (done/failed) blijven zo lang opvraagbaar
+REPORT_JOB_RETENTION_SECONDS = float(os.getenv("REPORT_JOB_RETENTION_SECONDS", "86400"))
+REPORT_JOB_POLL_SECONDS = float(os.getenv("REPORT_JOB_POLL_SECONDS", "1"))
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class ReportJobQueue:
+    """
+    SQLite job queue (overleeft herstarts, gedeeld door uvicorn workers) met een pool van async workers.
+    Jobs met een hogere prioriteit gaan voor, daarna first in first out. Mislukte jobs worden met
+    exponentiële backoff opnieuw geprobeerd, behalve bij client fouten (HTTPException met status < 500).
+    """
+
+    def __init__(self, path: str = REPORT_JOBS_PATH, workers: int = REPORT_JOB_WORKERS,
+                 max_attempts: int = REPORT_JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._handlers: Dict[str, JobHandler] = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Metrics (dit proces)
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self._wait_seconds = deque(maxlen=500)
+        self._run_seconds = deque(maxlen=500)
+
+    def register(self, kind: str, handler: JobHandler):
+        """Coroutine die een job van dit type uitvoert: payload dict -> JSON serialiseerbaar resultaat"""
+        self._handlers[kind] = handler
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS report_jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    available_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_report_jobs_queue ON report_jobs (status, priority DESC, created_at)"
+            )
+        return self._conn
+
+    # --- Lifecycle -------------------------------------------------------------
+
+    async def start(self):
+        """Workers starten (aangeroepen vanuit de FastAPI lifespan)"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._purge)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logging.info(f"✅ Rapport job queue gestart ({self.workers} workers, {self.path})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- API -------------------------------------------------------------------
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> str:
+        if kind not in self._handlers:
+            raise ValueError(f"Onbekend job type: {kind}")
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._insert, job_id, kind, json.dumps(payload, default=str), priority)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    # --- SQLite (in een thread) ------------------------------------------------
+
+    def _insert(self, job_id: str, kind: str, payload: str, priority: int):
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO report_jobs (id, kind, payload, priority, status, max_attempts, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, payload, priority, self.max_attempts, now, now)
+            )
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Volgende beschikbare job atomair op 'running' zetten (ook verlopen leases van gecrashte workers)"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM report_jobs "
+                    "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND started_at < ?) "
+                    "ORDER BY priority DESC, created_at LIMIT 1",
+                    (now, now - REPORT_JOB_LEASE_SECONDS)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE report_jobs SET status = 'running', attempts = attempts + 1, started_at = ? WHERE id = ?",
+                        (now, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None,
+                available_at: Optional[float] = None):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE report_jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "available_at = COALESCE(?, available_at) WHERE id = ?",
+                (status, result, error, time.time() if status in ("done", "failed") else None, available_at, job_id)
+            )
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT * FROM report_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = {
+                "job_id": row["id"],
+                "kind": row["kind"],
+                "status": row["status"],
+                "priority": row["priority"],
+                "attempts": row["attempts"],
+                "max_attempts": row["max_attempts"],
+                "created_at": row["created_at"],
+                "started_at": row["started_at"],
+                "finished_at": row["finished_at"]
+            }
+            if row["status"] == "queued":
+                job["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM report_jobs WHERE status = 'queued' "
+                    "AND (priority > ? OR (priority = ? AND created_at < ?))",
+                    (row["priority"], row["priority"], row["created_at"])
+                ).fetchone()[0]
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+    def _purge(self):
+        """Afgewerkte jobs ouder dan de retentie verwijderen"""
+        with self._lock:
+            removed = self._connection().execute(
+                "DELETE FROM report_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - REPORT_JOB_RETENTION_SECONDS,)
+            ).rowcount
+        if removed > 0:
+            logging.info(f"🧹 Rapport jobs: {removed} afgewerkte jobs verwijderd")
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute("SELECT status, COUNT(*) FROM report_jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    # --- Workers ---------------------------------------------------------------
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                row = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                logging.error(f"Error bij ophalen rapport job: {str(e)}")
+                row = None
+
+            if row is None:
+                # Wachten op een nieuwe job (of periodiek kijken voor retries en jobs van andere processen)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=REPORT_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(row)
+
+    async def _run(self, row: sqlite3.Row):
+        job_id, kind, attempt = row["id"], row["kind"], row["attempts"] + 1
+        if attempt == 1:
+            self._wait_seconds.append(time.time() - row["created_at"])
+        started_at = time.perf_counter()
+        self.running += 1
+        try:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise ValueError(f"Onbekend job type: {kind}")
+            result = await handler(json.loads(row["payload"]))
+            await asyncio.to_thread(self._finish, job_id, "done", json.dumps(result, default=str))
+            self.completed += 1
+            logging.info(f"✅ Rapport job {job_id} klaar (poging {attempt})")
+        except asyncio.CancelledError:
+            # Shutdown: job terug in de queue zodat een volgende start hem meteen oppikt
+            # (shield: een tweede cancel mag de schrijfactie in de thread niet afbreken)
+            await asyncio.shield(asyncio.to_thread(self._finish, job_id, "queued", None, "Onderbroken door herstart"))
+            raise
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+            permanent = isinstance(e, ValueError) or 400 <= getattr(e, "status_code", 500) < 500
+            if permanent or attempt >= row["max_attempts"]:
+                await asyncio.to_thread(self._finish, job_id, "failed", None, error)
+                self.failed += 1
+                logging.error(f"❌ Rapport job {job_id} mislukt na {attempt} poging(en): {error}")
+            else:
+                backoff = REPORT_JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                await asyncio.to_thread(self._finish, job_id, "queued", None, error, time.time() + backoff)
+                self.retries += 1
+                logging.warning(f"🔁 Rapport job {job_id} poging {attempt} mislukt, opnieuw over {backoff}s: {error}")
+        finally:
+            self.running -= 1
+            self._run_seconds.append(time.perf_counter() - started_at)
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            counts = await asyncio.to_thread(self._counts)
+        except sqlite3.Error:
+            counts = {}
+        waits = sorted(self._wait_seconds)
+        runs = sorted(self._run_seconds)
+        return {
+            "path": self.path,
+            "workers": self.workers,
+            "queue_depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "running_here": self.running,
+            "completed": self.completed,
+            "failures": self.failed,
+            "retries": self.retries,
+            "avg_wait_ms": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+            "p95_wait_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+            "avg_run_ms": round(1000 * sum(runs) / len(runs), 1) if runs else 0.0,
+            "p95_run_ms": round(1000 * runs[int(0.95 * (len(runs) - 1))], 1) if runs else 0.0
+        }
+
+# Create instance
+report_jobs = ReportJobQueue()
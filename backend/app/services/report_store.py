@@ -0,0 +1,206 @@
+# backend/app/services/report_store.py
+# Content-addressed opslag voor de HTML rapporten in reports/ (geserveerd via /api/static):
+# de bestandsnaam is een hash van de inhoud-bepalende input, dus identieke rapporten worden één keer geschreven
+# en een URL verandert nooit van inhoud (immutable caching). Een achtergrondtaak ruimt op naar leeftijd en totale grootte.
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import time
+
+REPORTS_DIR = os.getenv("REPORTS_DIR", "reports")
+# Rapporten die langer dan dit niet opgevraagd of opnieuw gegenereerd zijn worden verwijderd
+REPORT_RETENTION_SECONDS = float(os.getenv("REPORT_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# Maximale totale grootte van reports/ (bytes, inclusief .gz); daarboven gaan de oudste eerst weg
+REPORT_STORE_MAX_BYTES = int(os.getenv("REPORT_STORE_MAX_BYTES", str(200 * 1024 * 1024)))
+REPORT_RETENTION_INTERVAL_SECONDS = float(os.getenv("REPORT_RETENTION_INTERVAL_SECONDS", "3600"))
+
+# Inhoud achter een URL wijzigt nooit (hash in de naam)
+REPORT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+TEMP_PREFIX = ".tmp-"
+
+@lru_cache(maxsize=16)
+def _file_digest(path: str, mtime_ns: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def template_version(path: str) -> str:
+    """Hash van het template bestand: een aangepast template geeft nieuwe rapport sleutels"""
+    return _file_digest(path, os.stat(path).st_mtime_ns)
+
+class ReportStore:
+    """
+    Schrijft rapporten onder <prefix>_<hash>.<ext> met een gzip kopie ernaast (.gz), atomair via
+    een tijdelijk bestand + os.replace: een lezer ziet nooit een half geschreven rapport en
+    gelijktijdige aanvragen voor hetzelfde rapport overschrijven elkaar met identieke inhoud.
+    """
+
+    def __init__(self, directory: str = REPORTS_DIR, retention_seconds: float = REPORT_RETENTION_SECONDS,
+                 max_bytes: int = REPORT_STORE_MAX_BYTES):
+        self.directory = directory
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self._task = None
+
+        # Metrics
+        self.hits = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Stabiele hash van JSON serialiseerbare input (dict volgorde speelt geen rol)"""
+        material = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+    def get_or_create(self, prefix: str, key: str, render: Callable[[], str], extension: str = "html") -> Tuple[str, bool]:
+        """(bestandsnaam, nieuw geschreven); render() wordt enkel aangeroepen als het rapport nog niet bestaat"""
+        filename = f"{prefix}_{key}.{extension}"
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path):
+            # mtime = laatste gebruik, zodat de retentie recent opgevraagde rapporten laat staan
+            now = time.time()
+            for existing in (path, f"{path}.gz"):
+                try:
+                    os.utime(existing, (now, now))
+                except FileNotFoundError:
+                    pass
+            self.hits += 1
+            return filename, False
+
+        content = render().encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        # Eerst de .gz, dan het origineel: bestaat het origineel, dan is de gzip kopie er ook
+        self._write_atomic(f"{path}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+        self._write_atomic(path, content)
+        self.writes += 1
+        return filename, True
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    # --- Retentie --------------------------------------------------------------
+
+    def purge(self) -> int:
+        """Verwijder rapporten ouder dan de retentie, daarna de oudste tot onder max_bytes; geeft het aantal terug"""
+        now = time.time()
+        groups: Dict[str, list] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat_result = entry.stat()
+            if entry.name.startswith(TEMP_PREFIX):
+                # Achtergebleven van een onderbroken schrijfactie
+                if now - stat_result.st_mtime > 3600:
+                    self._unlink(entry.path)
+                continue
+            base = entry.name[:-3] if entry.name.endswith(".gz") else entry.name
+            group = groups.setdefault(base, [0.0, 0, []])
+            group[0] = max(group[0], stat_result.st_mtime)
+            group[1] += stat_result.st_size
+            group[2].append(entry.path)
+
+        removed = 0
+        total = sum(size for _, size, _ in groups.values())
+        for mtime, size, paths in sorted(groups.values(), key=lambda group: group[0]):
+            if now - mtime <= self.retention_seconds and total <= self.max_bytes:
+                break
+            for path in paths:
+                self._unlink(path)
+            total -= size
+            removed += 1
+
+        if removed > 0:
+            self.evictions += removed
+            logging.info(f"🧹 Rapporten: {removed} verwijderd ({total / 1024 / 1024:.1f} MB over)")
+        return removed
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    async def start(self):
+        """Retentie taak starten (vanuit de FastAPI lifespan)"""
+        if self._task is None and REPORT_RETENTION_INTERVAL_SECONDS > 0:
+            self._task = asyncio.create_task(self._retention_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _retention_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.purge)
+            except Exception as e:
+                logging.error(f"Error bij opruimen rapporten: {str(e)}")
+            await asyncio.sleep(REPORT_RETENTION_INTERVAL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "hits": self.hits,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "retention_seconds": self.retention_seconds,
+            "max_bytes": self.max_bytes
+        }
+
+class ReportStaticFiles(StaticFiles):
+    """
+    StaticFiles voor reports/: immutable Cache-Control en, als de client gzip accepteert,
+    de voorgecomprimeerde .gz kopie i.p.v. het origineel.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        gzip_path = f"{full_path}.gz"
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+
+        if "gzip" in request_headers.get("accept-encoding", "") and os.path.isfile(gzip_path):
+            response = FileResponse(gzip_path, status_code=status_code, stat_result=os.stat(gzip_path),
+                                    media_type=media_type, headers={"Content-Encoding": "gzip"})
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        response.headers["Cache-Control"] = REPORT_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+# Create instance
+report_store = ReportStore()
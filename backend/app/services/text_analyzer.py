@@ -0,0 +1,233 @@
+# backend/app/services/text_analyzer.py
+# Lokale, regelgebaseerde analyse van vrije tekst ("geen KBC", "lage kosten zijn belangrijk", "duurzaam graag").
+# Geeft hetzelfde schema terug als de Claude analyse (build_belgian_analysis_prompt); enkel eenduidige tekst
+# wordt lokaal afgehandeld, de rest gaat naar het LLM.
+
+from app.services.catalog import catalog
+from app.utils.bank_names import normalize_bank_name
+from typing import Dict, Any, Optional, Tuple
+import logging
+import os
+import re
+import time
+
+# Minimale dekking (herkende / inhoudelijke woorden) om de LLM call over te slaan
+LOCAL_ANALYSIS_MIN_CONFIDENCE = float(os.getenv("LOCAL_ANALYSIS_MIN_CONFIDENCE", "0.85"))
+
+# Belangrijkheid van laag naar hoog (zeer_belangrijk telt als heel_belangrijk, zelfde gewicht)
+IMPORTANCE_LADDER = ["geen_voorkeur", "belangrijk", "heel_belangrijk"]
+
+# Lemma tabel: woordvorm -> criterium (zelfde keys als preference_updates in de Claude prompt)
+CRITERIA_LEMMAS = {
+    "kosten": "kosten", "kost": "kosten", "tarieven": "kosten", "tarief": "kosten",
+    "instapkosten": "kosten", "beheerskosten": "kosten", "transactiekosten": "kosten", "fees": "kosten",
+    "duurzaam": "duurzaamheid", "duurzame": "duurzaamheid", "duurzaamheid": "duurzaamheid",
+    "esg": "duurzaamheid", "groen": "duurzaamheid", "groene": "duurzaamheid", "ethisch": "duurzaamheid", "ethische": "duurzaamheid",
+    "begeleiding": "begeleiding", "advies": "begeleiding", "adviseur": "begeleiding", "persoonlijke": "begeleiding",
+    "functionaliteiten": "functionaliteiten", "functionaliteit": "functionaliteiten", "app": "functionaliteiten",
+    "tools": "functionaliteiten", "platform": "functionaliteiten",
+    "rendement": "rendement", "rendementen": "rendement", "opbrengst": "rendement", "return": "rendement"
+}
+
+# Bank gazetteer: genormaliseerde alias tokens -> naam voor soft preferences (substring van naam_aanbieder)
+BANK_ALIASES = {
+    ("kbc",): "KBC", ("belfius",): "Belfius", ("bnp",): "BNP Paribas Fortis", ("bnp", "paribas"): "BNP Paribas Fortis",
+    ("bnp", "paribas", "fortis"): "BNP Paribas Fortis", ("fortis",): "BNP Paribas Fortis", ("ing",): "ING",
+    ("crelan",): "Crelan", ("argenta",): "Argenta", ("keytrade",): "Keytrade", ("triodos",): "Triodos",
+    ("bolero",): "Bolero", ("degiro",): "Degiro", ("saxo",): "Saxo", ("beobank",): "Beobank",
+    ("delen",): "Delen", ("degroof",): "Degroof", ("degroof", "petercam"): "Degroof", ("nagelmackers",): "Nagelmackers"
+}
+
+NEGATORS = {"geen", "niet", "nooit", "zonder", "onbelangrijk", "uitsluiten", "uitgesloten", "sluit", "behalve", "vermijden", "vermijd"}
+# "geen kosten" / "zonder kosten" = kosten vermijden (dus belangrijk), niet "kosten maken niet uit": naar het LLM
+OBJECT_NEGATORS = {"geen", "zonder"}
+INTENSIFIERS = {"heel", "zeer", "erg", "echt", "super", "cruciaal", "essentieel", "prioriteit", "topprioriteit",
+                "verhoog", "verhogen", "meer", "absoluut", "zeker"}
+# Vergelijkingen tussen criteria ("kosten zijn belangrijker dan rendement", "minder belangrijk",
+# "rendement is (niet) het belangrijkste") zeggen iets over de volgorde, niet over één belangrijkheid: naar het LLM
+COMPARATIVES = {"belangrijker", "minder", "belangrijkst", "belangrijkste"}
+COMPARATIVE_CUES = {"meer", "beter", "betere", "hoger", "hogere", "lager", "lagere", "liever"}
+# Sterke bank voorkeur ("Absoluut [bank]" / "Zeker [bank]" in de prompt) -> boost_banks
+STRONG_BANK_CUES = {"absoluut", "zeker", "sowieso", "perse"}
+# Woorden die een criterium kwalificeren zonder betekenis te veranderen
+QUALIFIERS = {"lage", "laag", "lagere", "weinig", "belangrijk", "graag", "liefst", "voorkeur", "goede", "goed",
+              "hoog", "hogere", "hoger", "beter", "betere", "sterke", "sterk", "aandacht", "vind", "vindt", "telt", "maakt"}
+# "hoge kosten" draait de betekenis om ("geen hoge kosten" = kosten belangrijk)
+INVERTING = {"hoge", "dure", "duur", "veel"}
+STOPWORDS = {
+    "ik", "wil", "wilt", "willen", "de", "het", "een", "zijn", "is", "mijn", "voor", "me", "mij", "dat", "die", "van", "bij",
+    "met", "op", "te", "ook", "wel", "moet", "moeten", "mag", "dan", "er", "zo", "nog", "aub", "alsjeblieft", "u", "je",
+    "we", "wij", "ons", "onze", "hebben", "heb", "heeft", "maak", "maken", "worden", "wordt", "word", "in", "aan", "om",
+    "uit", "dus", "toch", "gewoon", "beetje", "iets", "bank", "banken", "belgië", "belgie", "alstublieft", "please",
+    "mogelijk", "lijkt", "vooral"
+}
+# Bewust ambigu volgens de prompt (clarifications): altijd naar het LLM
+AMBIGUOUS = {"goedkoop", "goedkope", "goedkoopste", "kantoor", "kantoren", "service", "flexibiliteit", "flexibel", "groot",
+             "grote", "online", "alleen", "enkel", "uitsluitend", "regio", "veilig", "risico", "pensioen", "belasting"}
+
+CLAUSE_SPLIT = re.compile(r"[,.;!\n]+|\s+(?:en|maar|of)\s+")
+TOKEN = re.compile(r"[a-z0-9à-ÿ]+")
+
+def importance_level(importance: str) -> int:
+    """Positie op IMPORTANCE_LADDER (onbekend of ontbrekend = geen_voorkeur)"""
+    if importance == "zeer_belangrijk":
+        importance = "heel_belangrijk"
+    return IMPORTANCE_LADDER.index(importance) if importance in IMPORTANCE_LADDER else 0
+
+class LocalTextAnalyzer:
+    """
+    Deterministische analyse per zinsdeel: criteria (lemma tabel), banken (gazetteer), negatie en intensifiers.
+    Confidence = aandeel herkende inhoudswoorden; onder de drempel (of bij ambigue woorden, vergelijkingen
+    of "geen <criterium>") -> None (LLM pad).
+    Telt hoeveel aanvragen elk pad afhandelt.
+    """
+
+    def __init__(self, min_confidence: float = LOCAL_ANALYSIS_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.local_hits = 0
+        self.llm_calls = 0
+        self.local_seconds = 0.0
+        self._gazetteer_version = None
+        self._gazetteer = dict(BANK_ALIASES)
+
+    def _bank_aliases(self) -> Dict[Tuple[str, ...], str]:
+        """Statische aliassen + aanbiedernamen uit de huidige catalogus (genormaliseerd, zonder 'bank')"""
+        snapshot = catalog.snapshot
+        if snapshot is not None and snapshot.version != self._gazetteer_version:
+            gazetteer = dict(BANK_ALIASES)
+            for name in snapshot.bank_index.names:
+                tokens = tuple(t for t in TOKEN.findall(normalize_bank_name(name)) if t not in STOPWORDS)
+                if tokens and tokens not in gazetteer:
+                    gazetteer[tokens] = name
+            self._gazetteer = gazetteer
+            self._gazetteer_version = snapshot.version
+        return self._gazetteer
+
+    def analyze(self, text: str, current_preferences: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Analyse in het Claude response schema, of None als de tekst naar het LLM moet"""
+        start = time.perf_counter()
+        result = self._analyze(text or "", current_preferences or {})
+        if result is None:
+            self.llm_calls += 1
+        else:
+            self.local_hits += 1
+            self.local_seconds += time.perf_counter() - start
+            logging.info(f"⚡ Lokale tekst analyse (confidence {result['confidence_score']}): {result['reasoning']}")
+        return result
+
+    def _analyze(self, text: str, current_preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if "?" in text:
+            return None  # vragen zijn per definitie niet eenduidig
+        aliases = self._bank_aliases()
+        max_alias = max(len(alias) for alias in aliases)
+        preference_updates = {}
+        soft_preferences = []
+        reasons = []
+        content = recognized = 0
+
+        for clause in CLAUSE_SPLIT.split(text.lower()):
+            tokens = TOKEN.findall(clause)
+            if "dan" in tokens and COMPARATIVE_CUES.intersection(tokens):
+                return None  # "meer ... dan", "liever ... dan": vergelijking
+            negations = intensified = inverted = 0
+            strong_bank = False
+            criteria, banks = [], []
+            previous = None
+
+            i = 0
+            while i < len(tokens):
+                # Langste bank alias eerst ("bnp paribas fortis" vóór "bnp")
+                for size in range(min(max_alias, len(tokens) - i), 0, -1):
+                    bank = aliases.get(tuple(tokens[i:i + size]))
+                    if bank:
+                        banks.append(bank)
+                        content += size
+                        recognized += size
+                        i += size
+                        break
+                else:
+                    token = tokens[i]
+                    i += 1
+                    if token in AMBIGUOUS or token in COMPARATIVES:
+                        return None
+                    if token in STOPWORDS:
+                        continue
+                    content += 1
+                    negated_object, previous = previous in OBJECT_NEGATORS, token
+                    if token in CRITERIA_LEMMAS:
+                        if negated_object:
+                            return None
+                        criteria.append(CRITERIA_LEMMAS[token])
+                    elif token in NEGATORS:
+                        negations += 1
+                    elif token in INTENSIFIERS or token in STRONG_BANK_CUES:
+                        intensified += 1
+                        strong_bank = strong_bank or token in STRONG_BANK_CUES
+                    elif token in INVERTING:
+                        inverted += 1
+                    elif token not in QUALIFIERS:
+                        continue  # onbekend woord: telt mee als inhoud, niet als herkend
+                    recognized += 1
+
+            if not criteria and not banks:
+                if negations or intensified or inverted:
+                    return None  # negatie/intensifier zonder onderwerp: niet eenduidig
+                continue
+            if criteria and banks:
+                return None  # bank + criterium in één zinsdeel ("KBC voor lage kosten"): laat het LLM beslissen
+
+            negated = (negations + inverted) % 2 == 1
+            if inverted and not negations:
+                return None  # "hoge kosten" zonder negatie
+
+            for bank in banks:
+                if negated:
+                    soft_preferences.append(f"exclude_banks:{bank}")
+                    reasons.append(f"{bank} uitsluiten")
+                elif strong_bank:
+                    soft_preferences.append(f"boost_banks:{bank}")
+                    reasons.append(f"sterke voorkeur voor {bank}")
+                else:
+                    return None  # "voorkeur voor [bank]" is ambigu -> clarification via het LLM
+
+            for criterium in dict.fromkeys(criteria):
+                level = importance_level(current_preferences.get(f"{criterium}_belangrijkheid", "geen_voorkeur"))
+                if negated:
+                    importance = "geen_voorkeur"
+                elif intensified:
+                    importance = "heel_belangrijk"
+                else:
+                    importance = IMPORTANCE_LADDER[min(len(IMPORTANCE_LADDER) - 1, level + 1)]
+                if preference_updates.get(criterium, importance) != importance:
+                    return None  # tegenstrijdige uitspraken over hetzelfde criterium
+                preference_updates[criterium] = importance
+                reasons.append(f"{criterium} -> {importance}")
+
+        if not preference_updates and not soft_preferences:
+            return None
+        confidence = recognized / content if content else 0.0
+        if confidence < self.min_confidence:
+            return None
+
+        return {
+            "preference_updates": preference_updates,
+            "soft_preferences": list(dict.fromkeys(soft_preferences)),
+            "clarifications_needed": [],
+            "reasoning": "Lokale analyse: " + ", ".join(reasons),
+            "confidence": "high",
+            "confidence_score": round(confidence, 2),
+            "analysis_path": "local"
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.local_hits + self.llm_calls
+        return {
+            "min_confidence": self.min_confidence,
+            "local": self.local_hits,
+            "llm": self.llm_calls,
+            "local_rate": round(self.local_hits / total, 4) if total else 0.0,
+            "avg_local_ms": round(1000 * self.local_seconds / self.local_hits, 3) if self.local_hits else 0.0
+        }
+
+# Create instance
+text_analyzer = LocalTextAnalyzer()
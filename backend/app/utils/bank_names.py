@@ -0,0 +1,135 @@
+# backend/app/utils/bank_names.py
+# Voorgecompileerde index van aanbiedernamen voor bank filters en soft preferences
+
+from collections import OrderedDict
+from typing import Any, Iterable, List
+import numpy as np
+import os
+import threading
+
+# Max. aantal opgeloste (modus, banken) lijsten per index (LRU): bank lijsten komen uit gebruikersinvoer
+BANK_NAME_RESOLVE_CACHE_SIZE = int(os.getenv("BANK_NAME_RESOLVE_CACHE_SIZE", "1024"))
+
+def normalize_bank_name(text: str) -> str:
+    """Genormaliseerde banknaam zoals bij soft boosts: lowercase zonder 'bank'/'belgië'"""
+    return text.lower().replace("bank", "").replace("belgië", "").strip()
+
+# Vergelijkingsmodi: query komt (na dezelfde transformatie) letterlijk voor in de naam
+#   boost    -> soft boost_banks (genormaliseerd)
+#   exclude  -> soft exclude_banks (case-insensitive)
+#   contains -> bank_filter boost (letterlijk, case-sensitive)
+NAME_VARIANTS = {
+    "boost": normalize_bank_name,
+    "exclude": str.lower,
+    "contains": lambda text: text
+}
+
+def name_matches(name: str, banks: Iterable[str], mode: str) -> bool:
+    """Scalar vergelijking (zonder index) volgens een NAME_VARIANTS modus"""
+    variant = NAME_VARIANTS[mode]
+    return any(variant(bank) in variant(name) for bank in banks)
+
+class SubstringTrie:
+    """
+    Trie over alle suffixen van een set namen: elke knoop houdt (als bitmask) bij welke namen de
+    substring tot die knoop bevatten. 'query in naam' voor alle namen tegelijk = één walk van O(len(query)).
+    """
+
+    def __init__(self, names: List[str]):
+        self._children = [{}]
+        self._masks = [0]
+        for name_id, name in enumerate(names):
+            bit = 1 << name_id
+            self._masks[0] |= bit  # lege query zit in elke naam
+            for start in range(len(name)):
+                node = 0
+                for char in name[start:]:
+                    child = self._children[node].get(char)
+                    if child is None:
+                        child = len(self._children)
+                        self._children[node][char] = child
+                        self._children.append({})
+                        self._masks.append(0)
+                    node = child
+                    self._masks[node] |= bit
+
+    def __len__(self):
+        return len(self._children)
+
+    def containing(self, query: str) -> int:
+        """Bitmask van de namen die query als substring bevatten"""
+        node = 0
+        for char in query:
+            node = self._children[node].get(char)
+            if node is None:
+                return 0
+        return self._masks[node]
+
+class BankNameIndex:
+    """
+    Alias index over alle aanbiedernamen van een catalogus snapshot:
+    - elke unieke naam krijgt een integer id
+    - per modus een voorgenormaliseerde substring trie
+    Opgeloste bank lijsten worden gememoïseerd (LRU), zodat scoring enkel integer ids vergelijkt.
+    Thread-safe: resolve() wordt vanuit meerdere asyncio.to_thread workers tegelijk aangeroepen.
+    """
+
+    def __init__(self, names: Iterable[str], max_resolved: int = BANK_NAME_RESOLVE_CACHE_SIZE):
+        self.names = list(dict.fromkeys(name for name in names if isinstance(name, str)))
+        self.ids = {name: name_id for name_id, name in enumerate(self.names)}
+        self._tries = {mode: SubstringTrie([variant(name) for name in self.names]) for mode, variant in NAME_VARIANTS.items()}
+        self.max_resolved = max_resolved
+        self._resolved = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "BankNameIndex":
+        """Namen uit de aanbieders tabel + naam_aanbieder van alle diensten"""
+        names = [
+            aanbieder.get("naam") or aanbieder.get("naam_aanbieder") or aanbieder.get("name")
+            for aanbieder in snapshot.rows("aanbieders")
+        ]
+        names += [dienst.get("naam_aanbieder") for dienst in snapshot.rows("diensten")]
+        # Standaardnaam van de score matrix voor diensten zonder aanbiedernaam
+        return cls(names + ["Onbekende aanbieder"])
+
+    def __len__(self):
+        return len(self.names)
+
+    def name_id(self, name) -> int:
+        """Integer id van een naam, -1 als de naam niet in de index zit"""
+        return self.ids.get(name, -1) if isinstance(name, str) else -1
+
+    def name_ids(self, names: Iterable[Any]) -> np.ndarray:
+        return np.array([self.name_id(name) for name in names], dtype=np.int64)
+
+    def resolve(self, banks: Iterable[str], mode: str) -> np.ndarray:
+        """Gesorteerde ids van alle namen die (volgens mode) een van de banken bevatten"""
+        key = (mode, tuple(banks))
+        with self._lock:
+            resolved = self._resolved.get(key)
+            if resolved is not None:
+                self._resolved.move_to_end(key)
+                return resolved
+
+        # Tries zijn read-only: opzoeken buiten de lock
+        variant = NAME_VARIANTS[mode]
+        mask = 0
+        for bank in key[1]:
+            mask |= self._tries[mode].containing(variant(bank))
+        resolved = np.array([name_id for name_id in range(len(self.names)) if mask >> name_id & 1], dtype=np.int64)
+        with self._lock:
+            self._resolved[key] = resolved
+            self._resolved.move_to_end(key)
+            while len(self._resolved) > self.max_resolved:
+                self._resolved.popitem(last=False)
+        return resolved
+
+    def matches(self, name, banks: Iterable[str], mode: str) -> bool:
+        """name_matches via de index; namen buiten de index vallen terug op de scalar vergelijking"""
+        name_id = self.name_id(name)
+        if name_id < 0:
+            return name_matches(name, banks, mode)
+        resolved = self.resolve(banks, mode)
+        position = np.searchsorted(resolved, name_id)
+        return bool(position < len(resolved) and resolved[position] == name_id)
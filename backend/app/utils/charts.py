@@ -0,0 +1,131 @@
+# backend/app/utils/charts.py
+# Compacte inline SVG grafieken voor het rapport (kosten, rendement, match score), rechtstreeks uit de match data.
+# Enkele KB markup i.p.v. een 300 dpi PNG in base64; identieke waarden -> zelfde SVG uit de cache.
+
+from functools import lru_cache
+from html import escape
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+
+CHART_COLORS = ['#2E8B57', '#4682B4', '#CD853F']
+CHART_WIDTH = 600
+CHART_HEIGHT = 320
+CHART_PADDING = {"top": 48, "right": 20, "bottom": 44, "left": 20}
+
+def match_name(match: Dict[str, Any], index: int) -> str:
+    """Naam zoals in de oude matplotlib grafiek (eerste 15 tekens)"""
+    name = (match.get('naam_aanbieder') or
+            match.get('name') or
+            match.get('aanbieder_naam') or
+            f'Partij {index + 1}')
+    return name[:15]
+
+def cost_values(matches: List[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, ...], Tuple[float, ...]]]:
+    """(namen, TCO) van de top 3, met 2% van het bedrag als schatting bij ontbrekende kosten; None zonder geldige data"""
+    names, costs = [], []
+    for i, match in enumerate(matches[:3]):
+        details = match.get('details') or {}
+        cost = (match.get('tco') or
+                match.get('totale_kosten') or
+                match.get('kosten') or
+                match.get('TCO') or
+                details.get('tco') or
+                0)
+        if cost == 0:
+            cost = match.get('bedrag', 50000) * 0.02  # 2% als fallback
+        names.append(match_name(match, i))
+        costs.append(float(cost))
+    if len(costs) < 2 or not all(cost > 0 for cost in costs):
+        return None
+    return tuple(names), tuple(costs)
+
+def rendement_values(matches: List[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, ...], Tuple[float, ...]]]:
+    """(namen, 5-jaars rendement in %) voor de top 3 matches die een rendement hebben"""
+    names, values = [], []
+    for i, match in enumerate(matches[:3]):
+        rendement = match.get('rendement_5j', (match.get('details') or {}).get('rendement_5j'))
+        if isinstance(rendement, (int, float)):
+            names.append(match_name(match, i))
+            values.append(float(rendement))
+    if len(values) < 2:
+        return None
+    # Rendement als fractie opgeslagen (0.054) -> procent
+    if all(abs(value) <= 1 for value in values):
+        values = [value * 100 for value in values]
+    return tuple(names), tuple(values)
+
+def score_values(matches: List[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, ...], Tuple[float, ...]]]:
+    """(namen, match score in %) voor de top 3"""
+    names, values = [], []
+    for i, match in enumerate(matches[:3]):
+        score = match.get('matchScore', match.get('score'))
+        if isinstance(score, (int, float)):
+            names.append(match_name(match, i))
+            values.append(float(score))
+    return (tuple(names), tuple(values)) if len(values) >= 2 else None
+
+def format_value(value: float, kind: str) -> str:
+    if kind == "euro":
+        return f'€{value:,.0f}'
+    if kind == "percent":
+        return f'{value:.1f}%'
+    return f'{value:.0f}%'
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def bar_chart_svg(title: str, labels: Sequence[str], values: Sequence[float], kind: str) -> str:
+    """Staafgrafiek als inline SVG; gecachet op (titel, labels, waarden, formaat)"""
+    pad = CHART_PADDING
+    plot_width = CHART_WIDTH - pad["left"] - pad["right"]
+    plot_height = CHART_HEIGHT - pad["top"] - pad["bottom"]
+
+    # Schaal inclusief 0 zodat negatieve rendementen onder de as komen
+    low, high = min(0.0, *values), max(0.0, *values)
+    span = (high - low) or 1.0
+    def y(value: float) -> float:
+        return pad["top"] + (high - value) / span * plot_height
+    baseline = y(0.0)
+
+    slot = plot_width / len(values)
+    bar_width = slot * 0.6
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" '
+        f'width="100%" role="img" aria-label="{escape(title)}" font-family="Inter, Arial, sans-serif">',
+        f'<text x="{CHART_WIDTH / 2:.0f}" y="26" text-anchor="middle" font-size="16" font-weight="bold" fill="#1f2937">{escape(title)}</text>',
+        f'<line x1="{pad["left"]}" y1="{baseline:.1f}" x2="{CHART_WIDTH - pad["right"]}" y2="{baseline:.1f}" stroke="#9ca3af"/>'
+    ]
+    for i, (label, value) in enumerate(zip(labels, values)):
+        x = pad["left"] + i * slot + (slot - bar_width) / 2
+        top = min(y(value), baseline)
+        height = max(abs(baseline - y(value)), 1.0)
+        center = x + bar_width / 2
+        value_y = top - 6 if value >= 0 else baseline - 6
+        parts.append(
+            f'<rect x="{x:.1f}" y="{top:.1f}" width="{bar_width:.1f}" height="{height:.1f}" rx="3" '
+            f'fill="{CHART_COLORS[i % len(CHART_COLORS)]}"/>'
+            f'<text x="{center:.1f}" y="{value_y:.1f}" text-anchor="middle" font-size="13" font-weight="bold" '
+            f'fill="#1f2937">{escape(format_value(value, kind))}</text>'
+            f'<text x="{center:.1f}" y="{CHART_HEIGHT - pad["bottom"] + 22}" text-anchor="middle" font-size="12" '
+            f'fill="#4b5563">{escape(label)}</text>'
+        )
+    parts.append('</svg>')
+    return "".join(parts)
+
+def generate_charts(matches: List[Dict[str, Any]]) -> Dict[str, str]:
+    """cost_chart / rendement_chart / score_chart als SVG markup (enkel de grafieken waarvoor er data is)"""
+    charts = {}
+    specs = [
+        ("cost_chart", "Totale Kosten per Jaar (TCO)", cost_values, "euro"),
+        ("rendement_chart", "Rendement over 5 jaar", rendement_values, "percent"),
+        ("score_chart", "Match score", score_values, "score")
+    ]
+    for key, title, extract, kind in specs:
+        data = extract(matches)
+        if data is not None:
+            charts[key] = bar_chart_svg(title, data[0], data[1], kind)
+    return charts
+
+def chart_cache_stats() -> Dict[str, int]:
+    info = bar_chart_svg.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
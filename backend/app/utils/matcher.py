@@ -1,186 +1,179 @@
-# Fix voor calculate_bank_scores functie
-# Dit zorgt ervoor dat de filter altijd correct werkt en de data nooit gecached wordt
+# backend/app/utils/matcher.py
+# Legacy bank matcher (/api/match, /api/generate-report): BANK_DATA wordt bij import gecompileerd
+# tot lookup arrays, zodat scoren en de min_rating filter enkele vectoroperaties zijn.
+# Caching wordt tegengehouden via Cache-Control headers op de endpoints (niet meer via _nocache).
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from app.data.bank_data import BANK_DATA
-import time
+from app.utils.scoring import top_k_indices
+import logging
+import numpy as np
 
-def calculate_bank_scores(user_preferences: Dict[str, Any]) -> List[Dict]:
+# (voorkeur key, recommendation_points key, match label, penalty label) - volgorde van de key_matches
+CRITERIA = [
+    ("investment_goal", "investment_goal", "Beleggingsdoel", "Niet optimaal voor beleggingsdoel"),
+    ("investment_horizon", "investment_horizon", "Beleggingshorizon", "Niet optimaal voor tijdshorizon"),
+    ("management_style", "management_style", "Beheerstijl", "Niet optimaal voor beheerstijl"),
+    ("preference", "preferences", "Voorkeur", "Niet optimaal voor voorkeur")
+]
+
+# Match resultaten hangen af van de request body en mogen niet door browsers/proxies bewaard worden
+MATCH_CACHE_CONTROL = "no-store"
+
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+def _to_int(value, default: int = 0) -> int:
+    """Robuuste int conversie zoals bij de ratings: None of ongeldige waarden -> default"""
+    try:
+        return int(value) if value is not None else default
+    except (ValueError, TypeError):
+        return default
+
+def _clamp(value: int) -> int:
+    """Python int binnen het int64 bereik brengen (vergelijkingen met de arrays blijven gelijk)"""
+    return min(max(value, INT64_MIN), INT64_MAX)
+
+class CompiledBankData:
     """
-    Calculate scores for each bank based on user preferences with forced filtering
+    BANK_DATA als parallelle arrays (rij = bank):
+    - points[criterium]: (banken x opties) recommendation points, met een extra nulkolom
+      voor opties die een bank niet kent (zelfde als .get(option, 0))
+    - has_criterion[criterium]: bank heeft recommendation_points voor dit criterium
+    - ratings, amount_min/amount_max (+ has_amount_range)
     """
-    # Genereer een timestamp om te zien of deze functie opnieuw wordt aangeroepen
-    current_timestamp = time.time()
-    print(f"[DEBUG {current_timestamp}] Functie aangeroepen met user_preferences: {user_preferences}")
-    
-    # VERBETERD: Robuuste min_rating verwerking
+
+    def __init__(self, banks: List[Dict[str, Any]]):
+        self.banks = banks
+        n = len(banks)
+        self.ratings = np.array([_to_int(bank.get("rating", 0)) for bank in banks], dtype=np.int64)
+
+        self.options = {}
+        self.points = {}
+        self.has_criterion = {}
+        for _, points_key, _, _ in CRITERIA:
+            tables = [bank.get("recommendation_points", {}).get(points_key) for bank in banks]
+            self.has_criterion[points_key] = np.array([points_key in bank.get("recommendation_points", {}) for bank in banks], dtype=bool)
+            options = {}
+            for table in tables:
+                for option in (table or {}):
+                    options.setdefault(option, len(options))
+            points = np.zeros((n, len(options) + 1), dtype=np.int64)
+            for i, table in enumerate(tables):
+                for option, value in (table or {}).items():
+                    points[i, options[option]] = value
+            self.options[points_key] = options
+            self.points[points_key] = points
+
+        ranges = [bank.get("target_profiles", {}).get("amount_range") for bank in banks]
+        self.has_amount_range = np.array(["amount_range" in bank.get("target_profiles", {}) for bank in banks], dtype=bool)
+        self.amount_min = np.array([r[0] if r else 0 for r in ranges], dtype=np.int64)
+        self.amount_max = np.array([r[1] if r else 0 for r in ranges], dtype=np.int64)
+
+    def column(self, points_key: str, option) -> np.ndarray:
+        """Recommendation points van alle banken voor één optie (0 voor onbekende opties)"""
+        options = self.options[points_key]
+        return self.points[points_key][:, options.get(option, len(options))]
+
+# Eenmalig bij import
+COMPILED_BANK_DATA = CompiledBankData(BANK_DATA)
+
+def parse_min_rating(min_rating_raw) -> Optional[int]:
+    """min_rating uit JSON/frontend formaten (string, number); 0 of ongeldig = geen filter"""
     min_rating = None
-    min_rating_raw = user_preferences.get("min_rating")
-    
-    print(f"[DEBUG {current_timestamp}] min_rating_raw: {min_rating_raw} (type: {type(min_rating_raw).__name__})")
-    
-    # Behandel alle mogelijke vormen waarin min_rating kan binnenkomen
     try:
-        # Converteer van JSON/frontend formaten (string, number)
         if isinstance(min_rating_raw, str) and min_rating_raw.strip():
             min_rating = int(min_rating_raw)
         elif isinstance(min_rating_raw, (int, float)):
             min_rating = int(min_rating_raw)
-        
-        # Behandel edge cases
         if min_rating == 0:
             min_rating = None
     except (ValueError, TypeError) as e:
-        print(f"[DEBUG {current_timestamp}] Error bij min_rating conversie: {e}")
+        logging.debug(f"Error bij min_rating conversie: {e}")
         min_rating = None
-    
-    print(f"[DEBUG {current_timestamp}] min_rating na verwerking: {min_rating}")
-    
-    # Andere user preferences ophalen - robuuster gemaakt
-    investment_goal = user_preferences.get("investment_goal", "")
-    investment_horizon = user_preferences.get("investment_horizon", "")
-    management_style = user_preferences.get("management_style", "")
-    preference = user_preferences.get("preference", "")
-    
-    # Robuuste conversie van amount
-    amount = 0
+    return min_rating
+
+def parse_amount(amount_raw) -> int:
+    """Bedrag als int ("25000" of numeriek), 0 bij ontbrekende of ongeldige waarden"""
     try:
-        amount_raw = user_preferences.get("amount", 0)
         if amount_raw is not None:
-            # Verwerk string formaten ("25000") en numerieke waarden
             if isinstance(amount_raw, str) and amount_raw.strip():
-                amount = int(amount_raw)
+                return int(amount_raw)
             elif isinstance(amount_raw, (int, float)):
-                amount = int(amount_raw)
+                return int(amount_raw)
     except (ValueError, TypeError) as e:
-        print(f"[DEBUG {current_timestamp}] Error bij amount conversie: {e}")
-        amount = 0
-    
-    # Maak een kopie van BANK_DATA om te voorkomen dat we een gecachte versie gebruiken
-    current_bank_data = list(BANK_DATA)
-    print(f"[DEBUG {current_timestamp}] Aantal banken geladen: {len(current_bank_data)}")
-    
-    # Log de ratings van alle banken voor debugging
-    for bank in current_bank_data:
-        bank_id = bank.get("id", "unknown")
-        bank_rating = bank.get("rating", 0)
-        print(f"[DEBUG {current_timestamp}] Bank {bank_id} heeft rating: {bank_rating}")
-    
-    bank_scores = []
-    filtered_banks = []  # Bijhouden welke banken worden uitgefilterd
-    
-    for bank in current_bank_data:
-        bank_id = bank.get("id", "unknown")
-        bank_name = bank.get("name", "Unknown Bank")
-        
-        # Robuuste verwerking van bank_rating
-        bank_rating = 0
-        try:
-            rating_raw = bank.get("rating", 0)
-            bank_rating = int(rating_raw) if rating_raw is not None else 0
-        except (ValueError, TypeError):
-            bank_rating = 0
-        
-        # KERNPROBLEEM FIX: Striktere en expliciete filtering op min_rating
-        # Dit zou het probleem moeten oplossen waarbij banken met een te lage rating toch worden getoond
-        if min_rating is not None:
-            if bank_rating < min_rating:
-                print(f"[DEBUG {current_timestamp}] ⛔ Bank {bank_id} GEFILTERD: rating {bank_rating} < min_rating {min_rating}")
-                filtered_banks.append(f"{bank_name} (rating: {bank_rating})")
-                continue
-            else:
-                print(f"[DEBUG {current_timestamp}] ✅ Bank {bank_id} GEACCEPTEERD: rating {bank_rating} >= min_rating {min_rating}")
-        
-        # Rest van de scoring logica blijft hetzelfde...
-        score = 0
+        logging.debug(f"Error bij amount conversie: {e}")
+    return 0
+
+def calculate_bank_scores(user_preferences: Dict[str, Any], top_k: int = 3) -> List[Dict]:
+    """
+    Calculate scores for each bank based on user preferences with forced min_rating filtering.
+    Alle banken worden in één keer gescoord op de gecompileerde arrays; key_matches en
+    key_mismatches worden pas opgebouwd voor de top_k banken.
+    """
+    data = COMPILED_BANK_DATA
+    min_rating = parse_min_rating(user_preferences.get("min_rating"))
+    amount = parse_amount(user_preferences.get("amount", 0))
+
+    # Score per criterium: enkel als de voorkeur ingevuld is en de bank het criterium kent
+    scores = np.zeros(len(data.banks), dtype=np.int64)
+    criterion_points = []
+    for preference_key, points_key, match_label, penalty_label in CRITERIA:
+        option = user_preferences.get(preference_key, "")
+        if not option:
+            continue
+        points = np.where(data.has_criterion[points_key], data.column(points_key, option), 0)
+        scores += points
+        criterion_points.append((points_key, option, points, match_label, penalty_label))
+
+    # Bedrag buiten bereik: -10 (higher penalty if amount is out of range)
+    clamped = _clamp(amount)
+    in_range = (data.amount_min <= clamped) & (clamped <= data.amount_max)
+    scores -= np.where(data.has_amount_range & ~in_range, 10, 0)
+
+    # Normalize score to percentage (max score could be 40)
+    percentages = np.clip(np.trunc(scores / 40 * 100).astype(np.int64), 0, 100)
+
+    # Strikte min_rating filter op de ratings array
+    eligible = np.arange(len(data.banks))
+    if min_rating is not None:
+        eligible = eligible[data.ratings >= _clamp(min_rating)]
+        logging.debug(f"min_rating {min_rating}: {len(eligible)} banken over")
+
+    # Top k op match score (stabiel: bij gelijke score blijft de BANK_DATA volgorde)
+    top = eligible[top_k_indices(percentages[eligible], top_k)]
+
+    final_results = []
+    for i in top:
+        bank = data.banks[i]
         matches = []
         penalties = []
-        
-        # Calculate score based on investment goal
-        if investment_goal and "investment_goal" in bank.get("recommendation_points", {}):
-            goal_score = bank["recommendation_points"]["investment_goal"].get(investment_goal, 0)
-            score += goal_score
-            if goal_score > 7:
-                matches.append(f"Beleggingsdoel: {investment_goal}")
-            elif goal_score < 3:
-                penalties.append(f"Niet optimaal voor beleggingsdoel: {investment_goal}")
-        
-        # Calculate score based on investment horizon
-        if investment_horizon and "investment_horizon" in bank.get("recommendation_points", {}):
-            horizon_score = bank["recommendation_points"]["investment_horizon"].get(investment_horizon, 0)
-            score += horizon_score
-            if horizon_score > 7:
-                matches.append(f"Beleggingshorizon: {investment_horizon}")
-            elif horizon_score < 3:
-                penalties.append(f"Niet optimaal voor tijdshorizon: {investment_horizon}")
-
-        # Calculate score based on management style
-        if management_style and "management_style" in bank.get("recommendation_points", {}):
-            style_score = bank["recommendation_points"]["management_style"].get(management_style, 0)
-            score += style_score
-            if style_score > 7:
-                matches.append(f"Beheerstijl: {management_style}")
-            elif style_score < 3:
-                penalties.append(f"Niet optimaal voor beheerstijl: {management_style}")
-
-        # Calculate score based on preference
-        if preference and "preferences" in bank.get("recommendation_points", {}):
-            pref_score = bank["recommendation_points"]["preferences"].get(preference, 0)
-            score += pref_score
-            if pref_score > 7:
-                matches.append(f"Voorkeur: {preference}")
-            elif pref_score < 3:
-                penalties.append(f"Niet optimaal voor voorkeur: {preference}")
-
-        # Check if amount is in range
-        if "amount_range" in bank.get("target_profiles", {}):
+        for points_key, option, points, match_label, penalty_label in criterion_points:
+            if not data.has_criterion[points_key][i]:
+                continue
+            if points[i] > 7:
+                matches.append(f"{match_label}: {option}")
+            elif points[i] < 3:
+                penalties.append(f"{penalty_label}: {option}")
+        if data.has_amount_range[i]:
             min_amount, max_amount = bank["target_profiles"]["amount_range"]
-            if min_amount <= amount <= max_amount:
+            if in_range[i]:
                 matches.append(f"Bedrag: €{amount}")
+            elif amount < min_amount:
+                penalties.append(f"Bedrag te laag (minimum €{min_amount})")
             else:
-                score -= 10  # Higher penalty if amount is out of range
-                if amount < min_amount:
-                    penalties.append(f"Bedrag te laag (minimum €{min_amount})")
-                else:
-                    penalties.append(f"Bedrag te hoog (maximum €{max_amount})")
-        
-        # Normalize score to percentage (max score could be 40)
-        match_percentage = min(max(int((score / 40) * 100), 0), 100)
-        
-        bank_scores.append({
+                penalties.append(f"Bedrag te hoog (maximum €{max_amount})")
+
+        final_results.append({
             "id": bank["id"],
             "name": bank["name"],
             "logo": bank.get("logo", ""),
             "description": bank.get("description", ""),
             "strengths": bank.get("strengths", []),
             "weaknesses": bank.get("weaknesses", []),
-            "matchScore": match_percentage,
+            "matchScore": int(percentages[i]),
             "key_matches": matches,
             "key_mismatches": penalties,
-            "rating": bank_rating  # Gebruik de geconverteerde bank_rating
+            "rating": int(data.ratings[i])
         })
-    
-    # Log uitgefilterde banken
-    print(f"[DEBUG {current_timestamp}] Uitgefilterde banken: {', '.join(filtered_banks) if filtered_banks else 'geen'}")
-    
-    # Sort results by match score
-    bank_scores.sort(key=lambda x: x["matchScore"], reverse=True)
-    
-    # EXTRA VEILIGHEID: Nogmaals filteren na sortering om ZEKER te zijn dat banken met te lage rating er niet in zitten
-    if min_rating is not None:
-        # Verwijder opnieuw banken met een te lage rating, zelfs al zouden ze een hoge score hebben
-        bank_scores = [bank for bank in bank_scores if bank["rating"] >= min_rating]
-        print(f"[DEBUG {current_timestamp}] EXTRA FILTERING: {len(bank_scores)} banken over na extra rating check")
-    
-    # Debug welke banken in de top 3 zitten vóór retourneren
-    print(f"[DEBUG {current_timestamp}] DEFINITIEVE RESULTATEN:")
-    for i, bank in enumerate(bank_scores[:3], 1):
-        print(f"[DEBUG {current_timestamp}] Top {i}: {bank['id']} - Score: {bank['matchScore']}, Rating: {bank['rating']}")
-    
-    # Voeg een force-unique indicator toe aan resultaten om caching tegen te gaan
-    final_results = bank_scores[:3]
-    for bank in final_results:
-        bank["_nocache"] = current_timestamp
-    
-    # Return top 3 banks
-    return final_results
\ No newline at end of file
+
+    return final_results
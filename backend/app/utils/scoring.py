@@ -0,0 +1,290 @@
+# backend/app/utils/scoring.py
+# Scoring helpers voor match_diensten_enhanced + kolomgebaseerde (NumPy) scoring engine
+
+import logging
+import math
+from typing import Dict, Any, List, Optional
+import numpy as np
+from app.utils.bank_names import BankNameIndex, name_matches
+
+# Volgorde van de criteria = volgorde van de scores/gewichten dicts in de match details
+CRITERIA = ["duurzaamheid", "begeleiding", "functionaliteiten", "kosten", "rendement"]
+
+def get_weight(importance: str) -> float:
+    """Converteer gebruikers belangrijkheid naar numeriek gewicht"""
+    weights = {
+        "heel_belangrijk": 0.3,
+        "zeer_belangrijk": 0.3,
+        "belangrijk": 0.15,
+        "geen_voorkeur": 0.05
+    }
+    return weights.get(importance, 0.05)
+
+def _is_numeric(val) -> bool:
+    return val is not None and isinstance(val, (int, float))
+
+def percentile_score_array(values: List[Any], reverse: bool = False) -> np.ndarray:
+    """
+    Percentiel scores (1-10) als float array, NaN voor niet-numerieke waarden.
+    Eén sortering + searchsorted in plaats van list.index per element (O(n log n)).
+    Gelijke waarden krijgen dezelfde rank:
+    reverse=True  -> rank = aantal strikt grotere waarden (eerste positie in aflopende lijst)
+    reverse=False -> rank = (aantal waarden <= val) - 1 (laatste positie in oplopende lijst)
+    """
+    scores = np.full(len(values), np.nan)
+    valid_indices = [i for i, val in enumerate(values) if _is_numeric(val)]
+    if not valid_indices:
+        return scores
+
+    valid_values = np.array([values[i] for i in valid_indices], dtype=float)
+    sorted_values = np.sort(valid_values)
+    n = len(sorted_values)
+    upper = np.searchsorted(sorted_values, valid_values, side="right")
+
+    if reverse:
+        # Voor kosten: lagere waarde = hogere score
+        rank = n - upper
+    else:
+        # Voor rendement: hogere waarde = hogere score
+        rank = upper - 1
+
+    # Converteer naar 1-10 schaal
+    if n > 1:
+        percentile = rank / (n - 1)
+    else:
+        percentile = np.full(n, 0.5)
+    scores[valid_indices] = np.clip((percentile * 9).astype(np.int64) + 1, 1, 10)
+    return scores
+
+def calculate_percentile_scores_batch(columns: List[Any]) -> List[List[int]]:
+    """
+    Percentiel scores voor meerdere kolommen in één aanroep.
+    columns: lijst van (values, reverse) tuples - bv. TCO (reverse=True) en rendement_5j
+    """
+    results = []
+    for values, reverse in columns:
+        scores = percentile_score_array(values, reverse=reverse)
+        results.append([None if np.isnan(s) else int(s) for s in scores])
+    return results
+
+def calculate_percentile_scores(values: List[Any], reverse: bool = False) -> List[int]:
+    """
+    Bereken percentiel-based scores van 1-10 voor een lijst van waarden
+    reverse=True: lagere waarde = hogere score (voor kosten)
+    reverse=False: hogere waarde = hogere score (voor rendement)
+    """
+    return calculate_percentile_scores_batch([(values, reverse)])[0]
+
+def normalize_score(score: float) -> float:
+    """Schaal 1-10 score niet-lineair naar 0.0–1.0"""
+    if score >= 9:
+        return 1.0
+    elif score >= 7:
+        return 0.8
+    elif score >= 5:
+        return 0.5
+    elif score >= 3:
+        return 0.2
+    else:
+        return 0.0
+
+def calculate_weighted_score(scores: Dict[str, float], gewichten: Dict[str, float]) -> float:
+    """Bereken gewogen gemiddelde van genormaliseerde scores"""
+    total_weighted_score = 0
+    total_weight = 0
+
+    for criterium, score in scores.items():
+        if criterium in gewichten and score is not None:
+            gewicht = gewichten[criterium]
+            total_weighted_score += normalize_score(score) * gewicht
+            total_weight += gewicht
+
+    if total_weight == 0:
+        return sum(normalize_score(s) for s in scores.values() if s is not None) / len([s for s in scores.values() if s is not None])
+
+    return total_weighted_score / total_weight
+
+def score_to_match_percentage(score: float) -> int:
+    """
+    Zet genormaliseerde totaalscore (0–1) om naar een percentage (0–100)
+    met sigmoid-schaal voor betere spreiding.
+    """
+    score = min(max(score, 0), 1)
+    a = 12     # scherpte van de curve
+    c = 0.6    # middenwaarde (score = 0.6 → 50%)
+    percentage = 100 / (1 + math.exp(-a * (score - c)))
+    return int(round(percentage))
+
+# ---------------------------------------------------------------------------
+# Kolomgebaseerde scoring engine
+# ---------------------------------------------------------------------------
+
+def get_weights(user_preferences: Dict[str, Any]) -> Dict[str, float]:
+    """Gewichten per criterium uit de *_belangrijkheid voorkeuren"""
+    return {
+        criterium: get_weight(user_preferences.get(f"{criterium}_belangrijkheid", "geen_voorkeur"))
+        for criterium in CRITERIA
+    }
+
+def normalize_scores(values: np.ndarray) -> np.ndarray:
+    """Gevectoriseerde normalize_score (zelfde trapfunctie)"""
+    return np.select(
+        [values >= 9, values >= 7, values >= 5, values >= 3],
+        [1.0, 0.8, 0.5, 0.2],
+        default=0.0
+    )
+
+def match_percentages(total_scores: np.ndarray) -> np.ndarray:
+    """
+    score_to_match_percentage voor een hele kolom.
+    Totaalscores nemen maar een handvol verschillende waarden aan: de sigmoid wordt
+    per unieke waarde met exact dezelfde scalar functie berekend (bit-identiek).
+    """
+    if len(total_scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    unique_scores, inverse = np.unique(total_scores, return_inverse=True)
+    unique_percentages = np.array([score_to_match_percentage(float(s)) for s in unique_scores], dtype=np.int64)
+    return unique_percentages[inverse]
+
+def rank_indices(percentages: np.ndarray) -> np.ndarray:
+    """Indices gesorteerd op matchScore (hoog naar laag), stabiel zoals list.sort"""
+    return np.argsort(-percentages, kind="stable")
+
+def top_k_indices(percentages: np.ndarray, k: int) -> np.ndarray:
+    """
+    Zelfde resultaat als rank_indices(percentages)[:k], maar zonder de volledige kolom te sorteren:
+    np.partition bepaalt de drempel, enkel de kandidaten worden (stabiel) gesorteerd.
+    """
+    n = len(percentages)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return rank_indices(percentages)
+
+    threshold = np.partition(percentages, n - k)[n - k]
+    above = np.flatnonzero(percentages > threshold)
+    # Bij gelijke scores wint de laagste index (zoals de stabiele volledige sortering)
+    ties = np.flatnonzero(percentages == threshold)[:k - len(above)]
+    candidates = np.sort(np.concatenate([above, ties]))
+    return candidates[rank_indices(percentages[candidates])]
+
+class ScoreMatrix:
+    """
+    De vijf criteria van een set diensten als NumPy matrix (rijen = diensten, kolommen = CRITERIA).
+    Ontbrekende (None) scores tellen niet mee in het gewogen gemiddelde, net als in
+    calculate_weighted_score.
+    """
+
+    def __init__(self, diensten: List[Dict[str, Any]], kosten_lookup: Dict, functionaliteiten_lookup: Dict, rendementen_lookup: Dict,
+                 bank_index: Optional[BankNameIndex] = None):
+        self.diensten = diensten
+        self.kosten_lookup = kosten_lookup
+        self.rendementen_lookup = rendementen_lookup
+
+        tco_scores, rendement_scores = calculate_percentile_scores_batch([
+            ([kosten_lookup.get(d['dienst_id'], {}).get('tco') for d in diensten], True),
+            ([rendementen_lookup.get(d['dienst_id'], {}).get('rendement_5j') for d in diensten], False)
+        ])
+
+        # Ruwe waarden (zoals ze in details.scores terechtkomen)
+        self.raw = {
+            'duurzaamheid': [d.get('score_duurzaamheid', 5) for d in diensten],
+            'begeleiding': [d.get('score_persoonlijke_begeleiding', 5) for d in diensten],
+            'functionaliteiten': [functionaliteiten_lookup.get(d['dienst_id'], {}).get('score_functionaliteiten', 5) for d in diensten],
+            'kosten': [s if s is not None else 5 for s in tco_scores],
+            'rendement': [s if s is not None else 5 for s in rendement_scores]
+        }
+
+        n = len(diensten)
+        self.values = np.full((n, len(CRITERIA)), np.nan)
+        for j, criterium in enumerate(CRITERIA):
+            column = self.raw[criterium]
+            self.values[:, j] = [np.nan if v is None else v for v in column]
+        self.valid = ~np.isnan(self.values)
+        self.normalized = normalize_scores(np.nan_to_num(self.values))
+        self.names = [d.get("naam_aanbieder", "Onbekende aanbieder") for d in diensten]
+        self.named = np.array(["naam_aanbieder" in d for d in diensten], dtype=bool)
+
+        # Aanbiedernamen als integer ids: bank filters vergelijken enkel ids (np.isin)
+        self.bank_index = bank_index if bank_index is not None else BankNameIndex(self.names)
+        self.name_ids = self.bank_index.name_ids(self.names)
+
+    def __len__(self):
+        return len(self.diensten)
+
+    def scores_for(self, i: int) -> Dict[str, Any]:
+        return {criterium: self.raw[criterium][i] for criterium in CRITERIA}
+
+    def weighted_totals(self, gewichten: Dict[str, float], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Gewogen gemiddelde van de genormaliseerde scores voor alle diensten (of enkel `rows`).
+        Criteria worden in dezelfde volgorde geaccumuleerd als calculate_weighted_score,
+        zodat de floats identiek zijn.
+        """
+        valid_matrix = self.valid if rows is None else self.valid[rows]
+        normalized = self.normalized if rows is None else self.normalized[rows]
+        n = len(valid_matrix)
+        total = np.zeros(n)
+        total_weight = np.zeros(n)
+        for j, criterium in enumerate(CRITERIA):
+            gewicht = gewichten[criterium]
+            valid = valid_matrix[:, j]
+            total = total + np.where(valid, normalized[:, j] * gewicht, 0.0)
+            total_weight = total_weight + np.where(valid, gewicht, 0.0)
+        return total / total_weight
+
+    def weighted_totals_many(self, gewichten_list: List[Dict[str, float]]) -> np.ndarray:
+        """
+        weighted_totals voor meerdere gewichten sets tegelijk: (profielen x diensten) matrix.
+        Zelfde accumulatie volgorde per criterium, dus rij p == weighted_totals(gewichten_list[p]).
+        """
+        weights = np.array([[gewichten[criterium] for criterium in CRITERIA] for gewichten in gewichten_list], dtype=float)
+        shape = (len(gewichten_list), len(self.diensten))
+        total = np.zeros(shape)
+        total_weight = np.zeros(shape)
+        for j in range(len(CRITERIA)):
+            valid = self.valid[:, j][np.newaxis, :]
+            gewicht = weights[:, j][:, np.newaxis]
+            total = total + np.where(valid, self.normalized[:, j][np.newaxis, :] * gewicht, 0.0)
+            total_weight = total_weight + np.where(valid, gewicht, 0.0)
+        return total / total_weight
+
+    def bank_mask(self, banks: List[str], mode: str) -> np.ndarray:
+        """Boolean mask van diensten waarvan de aanbiedernaam (volgens mode) een van de banken bevat"""
+        mask = np.isin(self.name_ids, self.bank_index.resolve(banks, mode))
+        # Namen buiten de index (bv. niet-string waarden) via de scalar vergelijking
+        for i in np.flatnonzero(self.name_ids < 0):
+            mask[i] = isinstance(self.names[i], str) and name_matches(self.names[i], banks, mode)
+        return mask
+
+def apply_soft_preferences_ranked(matrix: ScoreMatrix, order: np.ndarray, percentages: np.ndarray,
+                                  boost_applied: np.ndarray, soft_preferences: List[Dict[str, Any]]):
+    """
+    Soft preferences toepassen op een gerangschikte kolom (zelfde semantiek als de vroegere
+    apply_soft_preferences op match dicts): boost_banks x1.4 (max 99), exclude_banks verwijdert.
+    Returnt (order, percentages, boost_applied) opnieuw stabiel gesorteerd op percentage.
+    """
+    logging.info(f"🚀 Applying soft preferences: {soft_preferences}")
+    percentages = percentages.copy()
+    boost_applied = boost_applied.copy()
+
+    for preference in soft_preferences:
+        action = preference.get('action')
+
+        if action == 'boost_banks':
+            banks_to_boost = preference.get('banks', [])
+            boost_factor = 1.4  # 40% boost
+            mask = matrix.bank_mask(banks_to_boost, "boost")[order]
+            percentages[mask] = np.minimum(99, (percentages[mask] * boost_factor).astype(np.int64))  # Cap at 99%
+            boost_applied[mask] = True
+            logging.info(f"✅ Soft boosted {int(mask.sum())} banks matching {banks_to_boost}")
+
+        elif action == 'exclude_banks':
+            banks_to_exclude = preference.get('banks', [])
+            keep = ~matrix.bank_mask(banks_to_exclude, "exclude")[order]
+            logging.info(f"❌ Excluded {int((~keep).sum())} banks")
+            order, percentages, boost_applied = order[keep], percentages[keep], boost_applied[keep]
+
+    # Re-sort na toepassen van de voorkeuren
+    resort = rank_indices(percentages)
+    return order[resort], percentages[resort], boost_applied[resort]
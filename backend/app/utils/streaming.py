@@ -0,0 +1,42 @@
+# backend/app/utils/streaming.py
+# Helpers voor server-sent events: frames opbouwen en Claude tekst in complete regels/secties opdelen
+
+from typing import Any, AsyncIterator, Dict, List
+import json
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # proxies (nginx/Render) niet laten bufferen
+}
+
+def sse_event(event: str, data: Any) -> str:
+    """Eén SSE frame: 'event: <naam>' + JSON data (default=str voor datums e.d.)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+async def iter_lines(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Tekst stukjes van een stream als complete regels (zonder newline), laatste regel ook zonder newline"""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+async def iter_markdown_sections(chunks: AsyncIterator[str]) -> AsyncIterator[Dict[str, str]]:
+    """
+    Markdown als opeenvolgende secties: een sectie is klaar zodra de volgende '#' header begint.
+    Elke sectie = {"heading": headertekst (of "" voor tekst vóór de eerste header), "markdown": volledige tekst}.
+    """
+    heading = ""
+    lines: List[str] = []
+    async for line in iter_lines(chunks):
+        if line.lstrip().startswith("#"):
+            if any(l.strip() for l in lines):
+                yield {"heading": heading, "markdown": "\n".join(lines).strip("\n")}
+            lines = []
+            heading = line.strip().lstrip("#").strip()
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        yield {"heading": heading, "markdown": "\n".join(lines).strip("\n")}
@@ -0,0 +1,71 @@
+# backend/app/utils/templates.py
+# Eén gedeelde Jinja2 omgeving voor alle rapport templates: templates worden één keer geparsed en gecompileerd
+# (en de bytecode op schijf bewaard voor de volgende opstart), i.p.v. per aanvraag een nieuwe Environment.
+from typing import Any, Iterable, Iterator
+import itertools
+import os
+import tempfile
+import threading
+
+TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../templates'))
+
+# Enkel in development templates opnieuw inlezen als het bestand wijzigt (kost een stat per render)
+APP_ENV = os.getenv("APP_ENV", "production")
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", str(APP_ENV == "development")).lower() == "true"
+# Map voor de gecompileerde template bytecode (leeg = geen bytecode cache)
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv(
+    "TEMPLATE_BYTECODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "beleggingsvergelijker-jinja")
+)
+# Aantal tekens dat stream_template rendert vóór de response vertrekt (een fout daarin wordt nog een 500)
+STREAM_TEMPLATE_BUFFER_CHARS = int(os.getenv("STREAM_TEMPLATE_BUFFER_CHARS", str(256 * 1024)))
+
+_environment = None
+_lock = threading.Lock()
+
+def get_environment():
+    """Gedeelde Environment (jinja2 wordt pas bij het eerste rapport geïmporteerd)"""
+    global _environment
+    if _environment is None:
+        with _lock:
+            if _environment is None:
+                from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+                bytecode_cache = None
+                if TEMPLATE_BYTECODE_CACHE_DIR:
+                    os.makedirs(TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+                    bytecode_cache = FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR)
+                _environment = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    bytecode_cache=bytecode_cache,
+                    auto_reload=TEMPLATE_AUTO_RELOAD,
+                    cache_size=50
+                )
+    return _environment
+
+def get_template(name: str):
+    """Gecompileerd template uit de cache van de gedeelde Environment"""
+    return get_environment().get_template(name)
+
+def render_template(name: str, **context: Any) -> str:
+    return get_template(name).render(**context)
+
+def prefetch(chunks: Iterable[str], buffer_chars: int = STREAM_TEMPLATE_BUFFER_CHARS) -> Iterator[str]:
+    """
+    Haal chunks op tot buffer_chars tekens (of het einde) vóór er iets vertrekt: een fout in dat deel
+    komt hier al naar boven, vóór de 200 headers. Een fout daarna breekt de StreamingResponse af zonder
+    afsluitende chunk, zodat de client een onvolledige overdracht ziet i.p.v. een afgekapte 200.
+    """
+    chunks = iter(chunks)
+    buffered, size = [], 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= buffer_chars:
+            break
+    return itertools.chain(["".join(buffered)], chunks)
+
+def stream_template(name: str, buffer_chars: int = STREAM_TEMPLATE_BUFFER_CHARS, **context: Any) -> Iterator[str]:
+    """
+    Template.generate() voor een StreamingResponse (blokkerend: vanuit async code via asyncio.to_thread).
+    Rapporten kleiner dan buffer_chars zijn dus volledig gerenderd vóór de response begint.
+    """
+    return prefetch(get_template(name).generate(**context), buffer_chars)
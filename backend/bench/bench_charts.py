@@ -0,0 +1,110 @@
+# backend/bench/bench_charts.py
+# Grootte en rendertijd van de rapport HTML met de grafieken als inline SVG (app/utils/charts.py) vs. matplotlib:
+# de vroegere 300-dpi PNG kostengrafiek (base64) en de 150-dpi PNG fallback. Per rapport: grafieken + template.
+# Vereist jinja2 en matplotlib (zoals in productie).
+#
+#   cd backend && python bench/bench_charts.py --reports 50
+import argparse
+import base64
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.charts import bar_chart_svg, cost_values, generate_charts  # noqa: E402
+from app.utils.templates import render_template  # noqa: E402
+
+def synthetic_matches(rng: random.Random):
+    """Top 3 matches met de velden die het rapport en de grafieken gebruiken"""
+    return [{
+        "name": f"Broker {rng.randint(1, 500)}",
+        "matchScore": rng.randint(40, 99),
+        "tco": round(rng.uniform(50, 3000), 2),
+        "rendement_5j": round(rng.uniform(-0.05, 0.12), 4)
+    } for _ in range(3)]
+
+def legacy_png_chart(matches, dpi: int = 300) -> dict:
+    """De vroegere kostengrafiek: matplotlib bar chart (10x6 inch) als base64 PNG"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    names, costs = cost_values(matches)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        bars = ax.bar(names, costs, color=['#2E8B57', '#4682B4', '#CD853F'])
+        ax.set_title('Totale Kosten per Jaar (TCO)', fontsize=16, fontweight='bold')
+        ax.set_ylabel('Kosten (€)', fontsize=12)
+        ax.tick_params(axis='x', rotation=45)
+        for bar, cost in zip(bars, costs):
+            ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height() + 10,
+                    f'€{cost:,.0f}', ha='center', va='bottom', fontweight='bold')
+        plt.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    src = f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+    return {"cost_chart": f'<img src="{src}" alt="Kostenvergelijking Top 3 Matches" />'}
+
+def svg_charts(matches) -> dict:
+    bar_chart_svg.cache_clear()
+    return generate_charts(matches)
+
+MODES = {
+    "png 300 dpi (vroeger)": legacy_png_chart,
+    "png 150 dpi (fallback)": lambda matches: legacy_png_chart(matches, dpi=150),
+    "svg": svg_charts,
+    "svg (cache)": generate_charts
+}
+
+def render_report(matches, charts: dict) -> str:
+    """Zelfde data als ReportGenerator._prepare_report_data + de grafieken"""
+    return render_template(
+        "report_template.html",
+        user_profile={"bedrag": 50000, "type_dienst": "Vermogensbeheer", "kosten_belangrijkheid": "belangrijk"},
+        matches=matches,
+        claude_analysis="Analyse " * 200,
+        generated_date="01 January 2025",
+        total_matches=len(matches),
+        weasyprint_available=True,
+        **charts
+    )
+
+def run(chart_fn, corpus):
+    sizes, timings = [], []
+    for matches in corpus:
+        started_at = time.perf_counter()
+        html = render_report(matches, chart_fn(matches))
+        timings.append(1000 * (time.perf_counter() - started_at))
+        sizes.append(len(html.encode("utf-8")))
+    return statistics.median(sizes), statistics.median(timings), max(timings)
+
+def main(args):
+    try:
+        import jinja2  # noqa: F401
+        import matplotlib  # noqa: F401
+    except ImportError as e:
+        sys.exit(f"{e.name} is niet geïnstalleerd: pip install -r requirements.txt")
+
+    rng = random.Random(42)
+    corpus = [synthetic_matches(rng) for _ in range(args.reports)]
+    # Zelfde rapporten nog eens: de SVG cache wordt geraakt
+    corpus += corpus[:args.reports // 2]
+    # Template compileren en matplotlib laden buiten de meting
+    render_report(corpus[0], legacy_png_chart(corpus[0], dpi=10))
+
+    print(f"{len(corpus)} rapporten (waarvan {args.reports // 2} herhaald)")
+    print(f"{'grafieken':>24} {'HTML (KB)':>10} {'p50 (ms)':>10} {'max (ms)':>10}")
+    for name, chart_fn in MODES.items():
+        size, p50, slowest = run(chart_fn, corpus)
+        print(f"{name:>24} {size / 1024:>10.1f} {p50:>10.2f} {slowest:>10.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=50)
+    main(parser.parse_args())
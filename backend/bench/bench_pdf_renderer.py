@@ -0,0 +1,80 @@
+# backend/bench/bench_pdf_renderer.py
+# Doorvoer van de PDF render pool (WeasyPrint in warme worker processen) met 1 / 4 / 8 workers
+# op een synthetisch corpus van rapporten (wisselende aantallen matches en tekstsecties).
+# Vereist weasyprint (zoals in productie); workers worden vooraf opgewarmd, dus opstartkost telt niet mee.
+#
+#   cd backend && python bench/bench_pdf_renderer.py --workers 1 4 8 --reports 64
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.pdf_renderer import PDFRenderService  # noqa: E402
+
+def synthetic_report(rng: random.Random, index: int) -> str:
+    """Rapport HTML met de structuur van report_template.html: profiel, match tabel en advies secties"""
+    rows = "".join(
+        f"<tr><td>Broker {rng.randint(1, 500)}</td><td>{rng.randint(40, 99)}%</td>"
+        f"<td>€{rng.uniform(50, 3000):.2f}</td><td>{rng.uniform(-5, 12):.1f}%</td></tr>"
+        for _ in range(rng.randint(3, 30))
+    )
+    sections = "".join(
+        f"<h2>Sectie {s + 1}</h2>" + "".join(
+            f"<p>{' '.join(rng.choice(['beleggen', 'kosten', 'rendement', 'duurzaam', 'spreiding', 'risico', 'horizon']) for _ in range(60))}</p>"
+            for _ in range(rng.randint(2, 6))
+        )
+        for s in range(rng.randint(3, 8))
+    )
+    return (
+        f"<html><head><style>body {{ font-family: sans-serif; }} table {{ width: 100%; border-collapse: collapse; }}"
+        f" td {{ border: 1px solid #ddd; padding: 4px; }}</style></head><body>"
+        f"<h1>Beleggingsadvies #{index}</h1><table>{rows}</table>{sections}</body></html>"
+    )
+
+async def run(workers: int, corpus, concurrency: int):
+    service = PDFRenderService(workers=workers, max_pending=max(concurrency, workers))
+    await service.start(prewarm=True)
+    latencies = []
+    queue = list(corpus)
+
+    async def client():
+        while queue:
+            html = queue.pop()
+            started_at = time.perf_counter()
+            await service.render(html)
+            latencies.append(1000 * (time.perf_counter() - started_at))
+
+    try:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+    finally:
+        await service.close()
+    latencies.sort()
+    return len(corpus) / elapsed, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+def main(args):
+    try:
+        import weasyprint  # noqa: F401
+    except ImportError:
+        sys.exit("weasyprint is niet geïnstalleerd: pip install -r requirements.txt")
+
+    rng = random.Random(42)
+    corpus = [synthetic_report(rng, i) for i in range(args.reports)]
+    print(f"{args.reports} rapporten, {args.concurrency or '2 x workers'} gelijktijdige aanvragen (cpu's: {os.cpu_count()})")
+    print(f"{'workers':>8} {'rapporten/s':>12} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for workers in args.workers:
+        throughput, p50, p95 = asyncio.run(run(workers, corpus, args.concurrency or 2 * workers))
+        print(f"{workers:>8} {throughput:>12.2f} {p50:>10.1f} {p95:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--reports", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=0)
+    main(parser.parse_args())
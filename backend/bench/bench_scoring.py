@@ -0,0 +1,105 @@
+# backend/bench/bench_scoring.py
+# Scoring van match_diensten_enhanced op synthetische catalogi (standaard 1k / 10k / 100k diensten):
+# de vroegere per-dienst Python loop vs. de kolomgebaseerde ScoreMatrix engine. Controleert ook dat
+# de top-k (dienst_id + matchScore) identiek is.
+#
+#   cd backend && python bench/bench_scoring.py --sizes 1000 10000 100000 --repeat 5
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.scoring import (  # noqa: E402
+    ScoreMatrix, calculate_percentile_scores_batch, calculate_weighted_score, get_weight, get_weights,
+    match_percentages, score_to_match_percentage, top_k_indices
+)
+
+IMPORTANCES = ["heel_belangrijk", "belangrijk", "geen_voorkeur"]
+TOP_K = 10
+
+def synthetic_catalog(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    diensten, kosten, functionaliteiten, rendementen = [], {}, {}, {}
+    for dienst_id in range(n):
+        diensten.append({
+            "dienst_id": dienst_id,
+            "naam_aanbieder": f"Broker {dienst_id % 500}",
+            "score_duurzaamheid": rng.randint(1, 10),
+            "score_persoonlijke_begeleiding": rng.randint(1, 10)
+        })
+        # Ook ontbrekende waarden, zoals in de echte tabellen
+        if rng.random() > 0.05:
+            kosten[dienst_id] = {"dienst_id": dienst_id, "tco": round(rng.uniform(50, 3000), 2)}
+        if rng.random() > 0.05:
+            functionaliteiten[dienst_id] = {"dienst_id": dienst_id, "score_functionaliteiten": rng.randint(1, 10)}
+        if rng.random() > 0.2:
+            rendementen[dienst_id] = {"dienst_id": dienst_id, "rendement_5j": round(rng.uniform(-0.05, 0.12), 4)}
+    return diensten, kosten, functionaliteiten, rendementen
+
+def legacy_scoring(preferences, diensten, kosten_lookup, functionaliteiten_lookup, rendementen_lookup):
+    """De per-dienst loop van vóór de ScoreMatrix engine (percentielen via de huidige batch functie)"""
+    tco_scores, rendement_scores = calculate_percentile_scores_batch([
+        ([kosten_lookup.get(d['dienst_id'], {}).get('tco') for d in diensten], True),
+        ([rendementen_lookup.get(d['dienst_id'], {}).get('rendement_5j') for d in diensten], False)
+    ])
+    matches = []
+    for i, dienst in enumerate(diensten):
+        dienst_id = dienst.get("dienst_id")
+        scores = {
+            'duurzaamheid': dienst.get('score_duurzaamheid', 5),
+            'begeleiding': dienst.get('score_persoonlijke_begeleiding', 5),
+            'functionaliteiten': functionaliteiten_lookup.get(dienst_id, {}).get('score_functionaliteiten', 5),
+            'kosten': tco_scores[i] if tco_scores[i] is not None else 5,
+            'rendement': rendement_scores[i] if rendement_scores[i] is not None else 5
+        }
+        gewichten = {
+            criterium: get_weight(preferences[f"{criterium}_belangrijkheid"])
+            for criterium in ["duurzaamheid", "begeleiding", "functionaliteiten", "kosten", "rendement"]
+        }
+        total_score = calculate_weighted_score(scores, gewichten)
+        matches.append({
+            "dienst_id": dienst_id,
+            "name": dienst.get("naam_aanbieder"),
+            "matchScore": score_to_match_percentage(total_score),
+            "details": {"scores": scores, "gewichten": gewichten, "total_score": total_score}
+        })
+    matches.sort(key=lambda m: m["matchScore"], reverse=True)
+    return [(m["dienst_id"], m["matchScore"]) for m in matches[:TOP_K]]
+
+def columnar_scoring(preferences, matrix: ScoreMatrix):
+    totals = matrix.weighted_totals(get_weights(preferences))
+    percentages = match_percentages(totals)
+    top = top_k_indices(percentages, TOP_K)
+    return [(matrix.diensten[i]["dienst_id"], int(percentages[i])) for i in top]
+
+def best_of(repeat: int, func, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started_at)
+    return 1000 * best, result
+
+def main(args):
+    rng = random.Random(7)
+    print(f"{'diensten':>9} {'loop (ms)':>11} {'matrix build':>13} {'matrix score':>13} {'speedup':>8}  top-{TOP_K} gelijk")
+    for n in args.sizes:
+        diensten, kosten, functionaliteiten, rendementen = synthetic_catalog(n)
+        preferences = {
+            f"{criterium}_belangrijkheid": rng.choice(IMPORTANCES)
+            for criterium in ["duurzaamheid", "begeleiding", "functionaliteiten", "kosten", "rendement"]
+        }
+        loop_ms, expected = best_of(args.repeat, legacy_scoring, preferences, diensten, kosten, functionaliteiten, rendementen)
+        # De matrix wordt per catalogus snapshot/populatie één keer gebouwd en daarna per aanvraag hergebruikt
+        build_ms, matrix = best_of(1, ScoreMatrix, diensten, kosten, functionaliteiten, rendementen)
+        score_ms, actual = best_of(args.repeat, columnar_scoring, preferences, matrix)
+        print(f"{n:>9} {loop_ms:>11.1f} {build_ms:>13.1f} {score_ms:>13.2f} {loop_ms / score_ms:>7.0f}x  {actual == expected}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,95 @@
+# backend/bench/bench_supabase_client.py
+# Latency per request: nieuwe httpx.AsyncClient per select (oud) vs. de gedeelde gepoolde SupabaseClient,
+# tegen een lokale PostgREST stand-in (HTTP/1.1 keep-alive, optioneel met kunstmatige netwerk latency).
+#
+#   cd backend && python bench/bench_supabase_client.py --requests 200 --rows 500 --rtt-ms 5
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+class PostgRESTStandIn(BaseHTTPRequestHandler):
+    """GET /rest/v1/<tabel>?select=... -> JSON array met ROWS rijen"""
+    protocol_version = "HTTP/1.1"  # keep-alive zoals PostgREST achter een proxy
+    disable_nagle_algorithm = True  # anders domineert delayed ACK (~40 ms) elke response
+    body = b"[]"
+    rtt_seconds = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        # Nieuwe TCP verbinding: kost een extra round-trip (handshake)
+        type(self).connections += 1
+        time.sleep(self.rtt_seconds)
+
+    def do_GET(self):
+        time.sleep(self.rtt_seconds)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def start_server(rows: int, rtt_ms: float) -> ThreadingHTTPServer:
+    PostgRESTStandIn.body = json.dumps([
+        {"dienst_id": i, "aanbieder_id": i % 40, "naam": f"Dienst {i}", "tco": 100 + i % 900} for i in range(rows)
+    ]).encode()
+    PostgRESTStandIn.rtt_seconds = rtt_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PostgRESTStandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def per_call_client(base_url: str, table: str):
+    """Het oude gedrag: een nieuwe client (en verbinding) per select"""
+    import httpx
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{base_url}/rest/v1/{table}?select=*")
+        return response.json()
+
+async def measure(label: str, call, requests: int):
+    # Eén 'match' = vier selects, zoals match_diensten_enhanced voor de catalogus
+    latencies = []
+    connections_before = PostgRESTStandIn.connections
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        for table in ("diensten", "kosten", "functionaliteiten", "rendementen"):
+            await call(table)
+        latencies.append(1000 * (time.perf_counter() - started_at))
+    latencies.sort()
+    print(f"{label:<22} p50 {statistics.median(latencies):7.2f} ms   "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:7.2f} ms   "
+          f"nieuwe verbindingen {PostgRESTStandIn.connections - connections_before}")
+
+async def main(args):
+    server = start_server(args.rows, args.rtt_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ.setdefault("SUPABASE_KEY", "bench")
+    from app.core.supabase_client import supabase
+
+    print(f"PostgREST stand-in op {base_url} ({args.rows} rijen, rtt {args.rtt_ms} ms), {args.requests} x 4 selects")
+    await measure("client per select", lambda table: per_call_client(base_url, table), args.requests)
+    await supabase.open()
+    try:
+        await measure("gedeelde pool", lambda table: supabase.select(table), args.requests)
+    finally:
+        await supabase.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -1,23 +1,58 @@
 # backend/main.py
 
-from fastapi import FastAPI, BackgroundTasks, Request
+from fastapi import FastAPI, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
 import csv
 import os
 from datetime import datetime
-from app.utils.matcher import calculate_bank_scores
+from app.core.supabase_client import supabase
+from app.core.llm_gateway import llm_gateway
+from app.core.warmup import start_warmup
+from app.services.catalog import catalog
+from app.services.report_jobs import report_jobs
+from app.services.pdf_renderer import pdf_renderer
+from app.services.report_store import report_store, ReportStaticFiles
+from app.utils.matcher import calculate_bank_scores, MATCH_CACHE_CONTROL
 from app.utils.pdf_generator import generate_report
 from app.api.banks import router as banks_router
 from app.api.tables import router as tables_router
 from app.api.matching import router as matching_router
 from app.api.ai_report import router as ai_report_router
+from app.api.catalog import router as catalog_router
 # from app.api.reports import router as reports_router  # 👈 TEMPORARY DISABLED
 from app.api.text_processing import router as text_processing_router  # 👈 NEW IMPORT
 
-app = FastAPI(title="Beleggingspartner Vergelijker API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Eén gedeelde, gepoolde Supabase client voor alle routers
+    await supabase.open()
+    # Catalogus in geheugen laden + achtergrond refresh starten
+    await catalog.start()
+    # Workers voor rapport jobs (/api/reports/jobs)
+    await report_jobs.start()
+    # PDF render workers (enkel opgewarmd bij PDF_RENDER_PREWARM=true, anders bij het eerste rapport)
+    await pdf_renderer.start()
+    # Opruimen van reports/ naar leeftijd en totale grootte
+    await report_store.start()
+    # Claude client (anthropic SDK) + templates op de achtergrond klaarzetten; anders lazy bij de eerste call
+    warmup_task = start_warmup()
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+        await report_store.stop()
+        await pdf_renderer.close()
+        await report_jobs.stop()
+        await catalog.stop()
+        await llm_gateway.close()
+        await supabase.close()
+
+app = FastAPI(title="Beleggingspartner Vergelijker API", lifespan=lifespan)
 
 # CORS middleware voor lokale ontwikkeling (SINGLE!)
 app.add_middleware(
@@ -33,7 +68,7 @@ app.add_middleware(
 )
 
 # Zorg ervoor dat de reports directory bestaat
-os.makedirs("reports", exist_ok=True)
+os.makedirs(report_store.directory, exist_ok=True)
 
 # Register API routers (CLEAN ORDER!)
 app.include_router(banks_router, prefix="/api")
@@ -42,9 +77,11 @@ app.include_router(matching_router, prefix="/api")
 app.include_router(ai_report_router, prefix="/api")  # ✅ This should work now!
 # app.include_router(reports_router, prefix="/api/reports")  # 👈 TEMPORARY DISABLED
 app.include_router(text_processing_router, prefix="/api")  # 👈 NEW ROUTER
+app.include_router(catalog_router, prefix="/api/catalog")
 
 # Mount static files AFTER routers
-app.mount("/api/static", StaticFiles(directory="reports"), name="static_reports")
+# Content-addressed rapporten: immutable cache headers + voorgecomprimeerde .gz kopieën
+app.mount("/api/static", ReportStaticFiles(directory=report_store.directory), name="static_reports")
 
 @app.get("/")
 async def root():
@@ -69,20 +106,23 @@ class LeadInfo(BaseModel):
     preferences: UserPreferences
 
 @app.post("/api/match")
-async def match_banks(preferences: UserPreferences):
+async def match_banks(preferences: UserPreferences, response: Response):
     """
     Find matching banks based on user preferences
     """
+    response.headers["Cache-Control"] = MATCH_CACHE_CONTROL
     matches = calculate_bank_scores(preferences.dict())
     return {"matches": matches}
 
 @app.post("/api/generate-report")
-async def create_report(preferences: UserPreferences, request: Request):
+async def create_report(preferences: UserPreferences, request: Request, response: Response):
     """
     Generate a dummy report based on user preferences
     """
+    response.headers["Cache-Control"] = MATCH_CACHE_CONTROL
     matches = calculate_bank_scores(preferences.dict())
-    report_path = generate_report(preferences.dict(), matches)
+    # Hashen, renderen en (gzip) wegschrijven is blokkerend werk: in een thread, niet op de event loop
+    report_path = await asyncio.to_thread(generate_report, preferences.dict(), matches)
     
     # Genereer volledige URL
     base_url = str(request.base_url).rstrip('/')  # e.g. http://localhost:8000 of https://beleggingsvergelijker.onrender.com
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# Tests draaien vanuit backend/ of de repo root: app.* moet importeerbaar zijn
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
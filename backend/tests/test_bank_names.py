@@ -0,0 +1,38 @@
+# backend/tests/test_bank_names.py
+import pytest
+
+from app.utils.bank_names import BankNameIndex, NAME_VARIANTS, name_matches
+
+NAMES = ["KBC Bank", "Belfius Bank België", "ING België", "Bolero", "Keytrade Bank", "Argenta", "BNP Paribas Fortis"]
+
+@pytest.mark.parametrize("mode", list(NAME_VARIANTS))
+@pytest.mark.parametrize("banks", [["KBC"], ["kbc", "ing"], ["Bank"], ["belfius"], ["fortis", "Bolero"], [], ["onbekend"]])
+def test_matches_equals_scalar_comparison(mode, banks):
+    index = BankNameIndex(NAMES)
+    for name in NAMES:
+        assert index.matches(name, banks, mode) == name_matches(name, banks, mode)
+
+def test_resolved_lists_are_bounded():
+    index = BankNameIndex(NAMES, max_resolved=3)
+    for i in range(10):
+        index.resolve([f"bank {i}"], "exclude")
+    assert len(index._resolved) == 3
+
+def test_recently_used_list_is_kept():
+    index = BankNameIndex(NAMES, max_resolved=2)
+    kbc = index.resolve(["KBC"], "contains")
+    index.resolve(["ING"], "contains")
+    assert index.resolve(["KBC"], "contains") is kbc
+    index.resolve(["Bolero"], "contains")
+    assert ("contains", ("KBC",)) in index._resolved
+    assert ("contains", ("ING",)) not in index._resolved
+
+def test_resolve_is_thread_safe_at_capacity():
+    from concurrent.futures import ThreadPoolExecutor
+
+    index = BankNameIndex(NAMES, max_resolved=4)
+    queries = [[f"bank {i % 12}"] for i in range(4000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda banks: index.resolve(banks, "exclude"), queries))
+    assert all(len(resolved) == 0 for resolved in results)
+    assert len(index._resolved) <= 4
@@ -0,0 +1,30 @@
+# backend/tests/test_create_report.py
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from fastapi import Response
+
+import main
+
+def test_report_is_generated_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def fake_generate_report(preferences, matches):
+        threads.append(threading.get_ident())
+        return "/api/static/beleggingsadvies_test.html"
+
+    monkeypatch.setattr(main, "generate_report", fake_generate_report)
+    preferences = main.UserPreferences(
+        investment_goal="groei", investment_horizon=">10 jaar", management_style="zelf doen",
+        preference="lage kosten", amount=10000
+    )
+
+    async def scenario():
+        request = SimpleNamespace(base_url="http://testserver/")
+        result = await main.create_report(preferences, request, Response())
+        return threading.get_ident(), result
+
+    loop_thread, result = asyncio.run(scenario())
+    assert result == {"report_url": "http://testserver/api/static/beleggingsadvies_test.html"}
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,37 @@
+# backend/tests/test_import_time.py
+# Opstarttijd: `import main` (wat uvicorn doet vóór de lifespan) in een vers proces met -X importtime.
+# Budget via IMPORT_TIME_BUDGET_MS; trage SDK's (anthropic, weasyprint, matplotlib) horen lazy geladen te worden.
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+LAZY_MODULES = {"anthropic", "weasyprint", "matplotlib"}
+
+def import_main() -> dict:
+    """Cumulatieve importtijd (ms) per module, zoals gerapporteerd door python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+        env={**os.environ, "STARTUP_WARMUP": "false"}
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative) / 1000
+    return timings
+
+def test_import_main_within_budget():
+    timings = import_main()
+    assert timings["main"] <= IMPORT_TIME_BUDGET_MS, (
+        f"import main duurde {timings['main']:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms); traagste: "
+        + ", ".join(f"{name} {ms:.0f} ms" for name, ms in sorted(timings.items(), key=lambda item: -item[1])[1:6])
+    )
+
+def test_slow_sdks_are_not_imported_at_startup():
+    imported = {name.split(".")[0] for name in import_main()}
+    assert not LAZY_MODULES & imported
@@ -0,0 +1,86 @@
+# backend/tests/test_llm_cache.py
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.llm_cache import LLMResponseCache
+
+def test_invalidate_catalog_runs_off_the_event_loop(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    params = {"model": "stub", "max_tokens": 10}
+
+    async def scenario():
+        await cache.put("vraag", params, "v1", "antwoord", 0.5)
+        assert await cache.get("vraag", params, "v1") == "antwoord"
+
+        loop_thread = threading.get_ident()
+        delete_threads = []
+        invalidate = cache._invalidate
+        cache._invalidate = lambda version: delete_threads.append(threading.get_ident()) or invalidate(version)
+        await cache.invalidate_catalog(SimpleNamespace(version="nieuwe versie"))
+        return loop_thread, delete_threads, await cache.get("vraag", params, "v1")
+
+    loop_thread, delete_threads, cached = asyncio.run(scenario())
+    assert delete_threads and delete_threads[0] != loop_thread
+    assert cached is None
+    assert cache.stats()["entries"] == 0
+
+def cache_and_router(tmp_path, monkeypatch):
+    from app.api import ai_report
+    from app.core.model_router import ModelRouter
+
+    cache = LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    router = ModelRouter()
+    monkeypatch.setattr(ai_report, "llm_cache", cache)
+    monkeypatch.setattr(ai_report, "model_router", router)
+    return ai_report, cache, router
+
+def test_fast_tier_answer_is_not_served_when_quality_fits(tmp_path, monkeypatch):
+    ai_report, cache, router = cache_and_router(tmp_path, monkeypatch)
+    called = []
+
+    async def complete(route, prompt, params, timeout):
+        called.append(params["model"])
+        return "kwaliteit"
+    monkeypatch.setattr(router, "complete", complete)
+
+    async def scenario():
+        # Eerder (bij krappe deadline) door de snelle tier beantwoord
+        await cache.put("prompt", router.params("insights", "fast"), "1", "snel antwoord", 1.0)
+        first = await ai_report.cached_completion("prompt", "insights", "1")
+        second = await ai_report.cached_completion("prompt", "insights", "1")
+        return first, second
+
+    assert asyncio.run(scenario()) == ("kwaliteit", "kwaliteit")
+    assert called == [router.params("insights", "quality")["model"]]
+    assert router.routed["insights"] == {"quality": 1}
+
+def test_fast_tier_hit_is_served_when_router_would_downgrade(tmp_path, monkeypatch):
+    ai_report, cache, router = cache_and_router(tmp_path, monkeypatch)
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("cache hit mag Claude niet aanroepen")
+    monkeypatch.setattr(router, "complete", fail)
+
+    async def scenario():
+        await cache.put("prompt", router.params("insights", "fast"), "1", "snel antwoord", 1.0)
+        # Quality p95 (6s) past niet in de resterende ~2.5s: de router zou de snelle tier kiezen
+        return await ai_report.cached_completion("prompt", "insights", "1", deadline=time.monotonic() + 3)
+
+    assert asyncio.run(scenario()) == "snel antwoord"
+    assert router.routed["insights"] == {}
+    assert (cache.hits, cache.misses) == (1, 0)
+
+def test_preferred_tier_answer_wins(tmp_path):
+    from app.core.model_router import ModelRouter
+
+    cache = LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    router = ModelRouter()
+
+    async def scenario():
+        await cache.put("prompt", router.params("report", "fast"), "1", "snel", 1.0)
+        await cache.put("prompt", router.params("report", "quality"), "1", "kwaliteit", 5.0)
+        return await cache.get_any("prompt", router.candidates("report", "prompt", time.monotonic() + 3), "1")
+
+    assert asyncio.run(scenario()) == "kwaliteit"
@@ -0,0 +1,65 @@
+# backend/tests/test_llm_gateway.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.llm_gateway import LLMGateway
+
+class SlowMessages:
+    """Stub voor client.messages: een trage completion zonder netwerk"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.started = asyncio.Event()
+
+    async def create(self, **params):
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"antwoord op {params['messages'][0]['content']}")])
+
+def gateway_with_stub(delay: float, **kwargs) -> LLMGateway:
+    gateway = LLMGateway(**kwargs)
+    gateway._client = SimpleNamespace(messages=SlowMessages(delay))
+    return gateway
+
+def test_event_loop_keeps_serving_during_slow_completion():
+    async def scenario():
+        gateway = gateway_with_stub(0.5)
+        call = asyncio.create_task(gateway.complete("vraag", model="stub", max_tokens=10))
+        await gateway._client.messages.started.wait()
+
+        # Terwijl de completion loopt, moeten andere coroutines (bv. andere requests) gewoon doorlopen
+        ticks = 0
+        while not call.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return await call, ticks, gateway.stats()
+
+    text, ticks, stats = asyncio.run(scenario())
+    assert text == "antwoord op vraag"
+    assert ticks >= 20
+    assert stats["calls"] == 1 and stats["in_flight"] == 0
+
+def test_concurrency_is_bounded_without_blocking():
+    async def scenario():
+        gateway = gateway_with_stub(0.2, max_concurrency=2)
+        calls = [asyncio.create_task(gateway.complete(f"vraag {i}", model="stub", max_tokens=10)) for i in range(4)]
+        await asyncio.sleep(0.05)
+        busy = (gateway.in_flight, gateway.waiting)
+        await asyncio.gather(*calls)
+        return busy, gateway.stats()
+
+    (in_flight, waiting), stats = asyncio.run(scenario())
+    assert (in_flight, waiting) == (2, 2)
+    assert stats["calls"] == 4 and stats["max_queue_depth"] >= 2
+
+def test_timeout_releases_the_slot():
+    async def scenario():
+        gateway = gateway_with_stub(1.0, max_concurrency=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await gateway.complete("vraag", model="stub", max_tokens=10, timeout=0.05)
+        return gateway.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timeouts"] == 1 and stats["in_flight"] == 0
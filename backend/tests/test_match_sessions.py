@@ -0,0 +1,53 @@
+# backend/tests/test_match_sessions.py
+import asyncio
+
+from app.api import matching
+from app.services.match_sessions import MatchSessionStore
+
+def test_stored_response_is_trimmed():
+    store = MatchSessionStore(max_matches=3)
+    response = {"success": True, "matches": [{"id": f"dienst_{i}"} for i in range(30)], "total_found": 30}
+
+    async def scenario():
+        result_id = await store.create({"bedrag": 1000}, response)
+        return await store.get(result_id)
+
+    entry = asyncio.run(scenario())
+    assert [m["id"] for m in entry["response"]["matches"]] == ["dienst_0", "dienst_1", "dienst_2"]
+    assert entry["response"]["total_found"] == 30
+    assert len(response["matches"]) == 30  # de response van de aanvraag zelf blijft volledig
+
+def test_entries_are_bounded():
+    store = MatchSessionStore(max_entries=5)
+
+    async def scenario():
+        return [await store.create({"bedrag": i}, {"success": True, "matches": []}) for i in range(8)]
+
+    result_ids = asyncio.run(scenario())
+    assert store.stats()["size"] == 5 and store.evictions == 3
+    assert asyncio.run(store.get(result_ids[0])) is None
+
+def test_score_matrix_is_built_lazily_once(monkeypatch):
+    store = MatchSessionStore()
+    builds = []
+
+    async def fake_prepare_match(user_preferences):
+        builds.append(user_preferences)
+        await asyncio.sleep(0.01)
+        return {"key": matching.score_matrix_key(user_preferences), "matrix": None, "population": None}
+
+    monkeypatch.setattr(matching, "match_sessions", store)
+    monkeypatch.setattr(matching, "prepare_match", fake_prepare_match)
+
+    async def scenario():
+        result_id = await matching.open_match_session({"bedrag": 1000}, {"success": True, "matches": []})
+        await asyncio.sleep(0.05)
+        opened_builds = len(builds)
+        # Gelijktijdige vervolg endpoints delen één opbouw
+        prepared = await asyncio.gather(*(matching.session_prepared(result_id) for _ in range(3)))
+        return opened_builds, prepared
+
+    opened_builds, prepared = asyncio.run(scenario())
+    assert opened_builds == 0
+    assert len(builds) == 1
+    assert prepared[0] is prepared[1] is prepared[2]
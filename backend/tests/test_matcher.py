@@ -0,0 +1,120 @@
+# backend/tests/test_matcher.py
+# calculate_bank_scores (gecompileerde arrays) moet exact dezelfde output geven als de vroegere per-bank lus
+import heapq
+import itertools
+
+import pytest
+
+from app.data.bank_data import BANK_DATA
+from app.utils.matcher import calculate_bank_scores
+
+def legacy_calculate_bank_scores(user_preferences, top_k=3):
+    """Bevroren kopie van de vroegere implementatie (zonder debug prints en _nocache)"""
+    min_rating = None
+    min_rating_raw = user_preferences.get("min_rating")
+    try:
+        if isinstance(min_rating_raw, str) and min_rating_raw.strip():
+            min_rating = int(min_rating_raw)
+        elif isinstance(min_rating_raw, (int, float)):
+            min_rating = int(min_rating_raw)
+        if min_rating == 0:
+            min_rating = None
+    except (ValueError, TypeError):
+        min_rating = None
+
+    investment_goal = user_preferences.get("investment_goal", "")
+    investment_horizon = user_preferences.get("investment_horizon", "")
+    management_style = user_preferences.get("management_style", "")
+    preference = user_preferences.get("preference", "")
+
+    amount = 0
+    try:
+        amount_raw = user_preferences.get("amount", 0)
+        if amount_raw is not None:
+            if isinstance(amount_raw, str) and amount_raw.strip():
+                amount = int(amount_raw)
+            elif isinstance(amount_raw, (int, float)):
+                amount = int(amount_raw)
+    except (ValueError, TypeError):
+        amount = 0
+
+    bank_scores = []
+    for bank in BANK_DATA:
+        bank_rating = 0
+        try:
+            rating_raw = bank.get("rating", 0)
+            bank_rating = int(rating_raw) if rating_raw is not None else 0
+        except (ValueError, TypeError):
+            bank_rating = 0
+        if min_rating is not None and bank_rating < min_rating:
+            continue
+
+        score = 0
+        matches = []
+        penalties = []
+        for option, points_key, match_label, penalty_label in [
+            (investment_goal, "investment_goal", "Beleggingsdoel", "Niet optimaal voor beleggingsdoel"),
+            (investment_horizon, "investment_horizon", "Beleggingshorizon", "Niet optimaal voor tijdshorizon"),
+            (management_style, "management_style", "Beheerstijl", "Niet optimaal voor beheerstijl"),
+            (preference, "preferences", "Voorkeur", "Niet optimaal voor voorkeur")
+        ]:
+            if option and points_key in bank.get("recommendation_points", {}):
+                points = bank["recommendation_points"][points_key].get(option, 0)
+                score += points
+                if points > 7:
+                    matches.append(f"{match_label}: {option}")
+                elif points < 3:
+                    penalties.append(f"{penalty_label}: {option}")
+
+        if "amount_range" in bank.get("target_profiles", {}):
+            min_amount, max_amount = bank["target_profiles"]["amount_range"]
+            if min_amount <= amount <= max_amount:
+                matches.append(f"Bedrag: €{amount}")
+            else:
+                score -= 10
+                if amount < min_amount:
+                    penalties.append(f"Bedrag te laag (minimum €{min_amount})")
+                else:
+                    penalties.append(f"Bedrag te hoog (maximum €{max_amount})")
+
+        match_percentage = min(max(int((score / 40) * 100), 0), 100)
+        bank_scores.append((match_percentage, bank_rating, bank, matches, penalties))
+
+    top_banks = heapq.nlargest(top_k, bank_scores, key=lambda entry: entry[0])
+    return [{
+        "id": bank["id"],
+        "name": bank["name"],
+        "logo": bank.get("logo", ""),
+        "description": bank.get("description", ""),
+        "strengths": bank.get("strengths", []),
+        "weaknesses": bank.get("weaknesses", []),
+        "matchScore": match_percentage,
+        "key_matches": matches,
+        "key_mismatches": penalties,
+        "rating": bank_rating
+    } for match_percentage, bank_rating, bank, matches, penalties in top_banks]
+
+def options(points_key: str):
+    """Alle opties uit BANK_DATA, plus leeg (niet ingevuld) en een onbekende optie"""
+    known = sorted({option for bank in BANK_DATA for option in bank.get("recommendation_points", {}).get(points_key, {})})
+    return known + ["", "onbekend"]
+
+# Randen van de amount_range bereiken, string/ongeldige/te grote bedragen en alle min_rating formaten
+AMOUNTS = [0, 2500, "25000", 5000000, 10**20, "geen bedrag"]
+MIN_RATINGS = [None, 0, "4", 5, 3.7, "abc"]
+
+@pytest.mark.parametrize("amount", AMOUNTS)
+@pytest.mark.parametrize("min_rating", MIN_RATINGS)
+def test_equals_legacy_for_every_option_combination(amount, min_rating):
+    for goal, horizon, style, preference in itertools.product(
+        options("investment_goal"), options("investment_horizon"), options("management_style"), options("preferences")
+    ):
+        user_preferences = {
+            "investment_goal": goal, "investment_horizon": horizon, "management_style": style,
+            "preference": preference, "amount": amount, "min_rating": min_rating
+        }
+        for top_k in (3, len(BANK_DATA)):
+            assert calculate_bank_scores(user_preferences, top_k) == legacy_calculate_bank_scores(user_preferences, top_k), user_preferences
+
+def test_missing_preferences_equal_legacy():
+    assert calculate_bank_scores({}) == legacy_calculate_bank_scores({})
@@ -0,0 +1,53 @@
+# backend/tests/test_pdf_renderer.py
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.services import pdf_renderer as pdf_renderer_module
+from app.services.pdf_renderer import PDFRenderService
+
+def fake_render(html_content: str) -> bytes:
+    """Vervangt WeasyPrint in de worker: 'hang' rendert (bijna) eeuwig, 'traag' een paar seconden"""
+    time.sleep({"hang": 60, "traag": 3}.get(html_content, 0.05))
+    return f"%PDF {html_content}".encode()
+
+class StubRenderService(PDFRenderService):
+    """Zelfde pool, maar zonder de WeasyPrint initializer"""
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(pdf_renderer_module, "_render_pdf", fake_render)
+    service = StubRenderService(workers=1, max_pending=1, timeout_seconds=1.0)
+    yield service
+    asyncio.run(service.close())
+
+def test_hung_render_is_recycled_and_frees_its_slot(service):
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await service.render("hang")
+        # De enige plaats moet weer vrij zijn: een volgende render krijgt een nieuwe pool
+        return await asyncio.wait_for(service.render("rapport"), timeout=30)
+
+    assert asyncio.run(scenario()) == b"%PDF rapport"
+    stats = service.stats()
+    assert stats["timeouts"] == 1 and stats["recycled"] == 1 and stats["rendered"] == 1
+
+def test_slot_stays_taken_while_the_worker_is_busy(service, monkeypatch):
+    monkeypatch.setattr(pdf_renderer_module, "PDF_RENDER_QUEUE_TIMEOUT_SECONDS", 0.2)
+
+    async def scenario():
+        first = asyncio.create_task(service.render("traag"))
+        await asyncio.sleep(0.1)
+        first.cancel()  # client weg: de worker rendert nog, de plaats blijft bezet
+        with pytest.raises(pdf_renderer_module.RenderQueueFull):
+            await service.render("rapport")
+
+    asyncio.run(scenario())
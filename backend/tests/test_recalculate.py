@@ -0,0 +1,95 @@
+# backend/tests/test_recalculate.py
+import random
+
+import pytest
+
+from app.api.matching import MATCH_SOFT_TOP_K, recalculate_ranking
+from app.utils.scoring import ScoreMatrix, get_weights, match_percentages
+
+def synthetic_matrix(n: int, seed: int) -> ScoreMatrix:
+    rng = random.Random(seed)
+    diensten, kosten, functionaliteiten, rendementen = [], {}, {}, {}
+    for dienst_id in range(n):
+        diensten.append({
+            "dienst_id": dienst_id,
+            "naam_aanbieder": f"Bank {dienst_id % 7}",
+            "type_aanbod": "Brokerage",
+            "score_duurzaamheid": rng.randint(1, 10),
+            "score_persoonlijke_begeleiding": rng.choice([rng.randint(1, 10), None])
+        })
+        kosten[dienst_id] = {"dienst_id": dienst_id, "tco": round(rng.uniform(50, 3000), 2)}
+        functionaliteiten[dienst_id] = {"dienst_id": dienst_id, "score_functionaliteiten": rng.randint(1, 10)}
+        rendementen[dienst_id] = {"dienst_id": dienst_id, "rendement_5j": round(rng.uniform(-0.05, 0.12), 4)}
+    return ScoreMatrix(diensten, kosten, functionaliteiten, rendementen)
+
+def legacy_adjust(matches, weight_adjustments, preferred_match_id, boost_factor):
+    """De vroegere per-match herberekening (enkel op de meegegeven matches)"""
+    adjusted_matches = []
+    for match in matches:
+        original_score = match["matchScore"]
+        adjusted_score = original_score
+        scores = match["details"]["scores"]
+        total_adjustment, adjustment_count = 0, 0
+        for criteria, weight in weight_adjustments.items():
+            if criteria in scores and scores[criteria] is not None:
+                total_adjustment += (scores[criteria] - 5.0) * (weight - 1.0) * 3
+                adjustment_count += 1
+        if adjustment_count > 0:
+            adjusted_score = max(0, min(100, original_score + total_adjustment / adjustment_count))
+        if preferred_match_id and match["id"] == preferred_match_id:
+            adjusted_score = min(100, adjusted_score * boost_factor)
+        elif boost_factor < 1.0:
+            if original_score < max(m["matchScore"] for m in matches):
+                adjusted_score *= boost_factor
+        elif boost_factor > 1.0:
+            adjusted_score = min(100, adjusted_score * boost_factor)
+        adjusted_matches.append({**match, "matchScore": round(adjusted_score, 1)})
+    adjusted_matches.sort(key=lambda m: m["matchScore"], reverse=True)
+    return adjusted_matches
+
+PREFERENCES = {
+    "kosten_belangrijkheid": "heel_belangrijk",
+    "duurzaamheid_belangrijkheid": "geen_voorkeur",
+    "begeleiding_belangrijkheid": "belangrijk",
+    "functionaliteiten_belangrijkheid": "geen_voorkeur",
+    "rendement_belangrijkheid": "belangrijk"
+}
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("weight_adjustments,preferred_match_id,boost_factor", [
+    ({"duurzaamheid": 1.5}, None, 1.0),
+    ({"kosten": 0.5, "begeleiding": 1.4}, None, 1.0),
+    ({"rendement": 1.3}, "dienst_3", 1.15),
+    ({}, None, 0.95),
+    ({"functionaliteiten": 1.2}, None, 1.1)
+])
+def test_equals_legacy_adjustment_over_full_population(seed, weight_adjustments, preferred_match_id, boost_factor):
+    matrix = synthetic_matrix(200, seed)
+    matches, total_found = recalculate_ranking(PREFERENCES, matrix, weight_adjustments, preferred_match_id, boost_factor)
+
+    # Referentie: de vroegere aanpassing, maar op álle diensten (gerangschikt) i.p.v. de top k van de client
+    percentages = match_percentages(matrix.weighted_totals(get_weights(PREFERENCES)))
+    all_matches = sorted((
+        {"id": f"dienst_{d['dienst_id']}", "matchScore": int(percentages[i]), "details": {"scores": matrix.scores_for(i)}}
+        for i, d in enumerate(matrix.diensten)
+    ), key=lambda m: m["matchScore"], reverse=True)
+    expected = legacy_adjust(all_matches, weight_adjustments, preferred_match_id, boost_factor)[:MATCH_SOFT_TOP_K]
+
+    assert total_found == len(matrix)
+    assert [(m["id"], m["matchScore"]) for m in matches] == [(m["id"], m["matchScore"]) for m in expected]
+
+def test_dienst_outside_previous_top_k_can_rise():
+    matrix = synthetic_matrix(200, 1)
+    before, _ = recalculate_ranking(PREFERENCES, matrix, {}, None, 1.0)
+    after, _ = recalculate_ranking(PREFERENCES, matrix, {"duurzaamheid": 1.5, "kosten": 0.5}, None, 1.0)
+    assert {m["id"] for m in after} - {m["id"] for m in before}
+
+def test_excluded_banks_are_backfilled():
+    matrix = synthetic_matrix(200, 2)
+    before, _ = recalculate_ranking(PREFERENCES, matrix, {}, None, 1.0)
+    excluded = before[0]["name"]
+    preferences = {**PREFERENCES, "soft_preferences": [{"action": "exclude_banks", "banks": [excluded]}]}
+    after, total_found = recalculate_ranking(preferences, matrix, {}, None, 1.0)
+    assert len(after) == MATCH_SOFT_TOP_K
+    assert all(m["name"] != excluded for m in after)
+    assert total_found < len(matrix)
@@ -0,0 +1,49 @@
+# backend/tests/test_report_jobs.py
+import asyncio
+
+from app.services.report_jobs import ReportJobQueue
+
+def test_shutdown_requeues_the_running_job(tmp_path):
+    queue = ReportJobQueue(path=str(tmp_path / "report_jobs.sqlite3"), workers=1)
+    started = asyncio.Event()
+
+    async def slow_report(payload):
+        started.set()
+        await asyncio.sleep(10)
+        return {"url": "nooit"}
+
+    async def scenario():
+        queue.register("slow", slow_report)
+        await queue.start()
+        job_id = await queue.submit("slow", {"bedrag": 1000})
+        await asyncio.wait_for(started.wait(), timeout=5)
+        running = await queue.stats()
+        await queue.stop()
+        return running, await queue.get(job_id), await queue.stats()
+
+    running, job, stats = asyncio.run(scenario())
+    assert running["running"] == 1
+    assert job["status"] == "queued" and job["error"] == "Onderbroken door herstart"
+    assert stats["queue_depth"] == 1 and stats["running"] == 0
+
+def test_completed_job_result(tmp_path):
+    queue = ReportJobQueue(path=str(tmp_path / "report_jobs.sqlite3"), workers=2)
+
+    async def quick_report(payload):
+        return {"bedrag": payload["bedrag"]}
+
+    async def scenario():
+        queue.register("quick", quick_report)
+        await queue.start()
+        job_id = await queue.submit("quick", {"bedrag": 5000})
+        for _ in range(100):
+            job = await queue.get(job_id)
+            if job["status"] == "done":
+                break
+            await asyncio.sleep(0.02)
+        await queue.stop()
+        return job, await queue.stats()
+
+    job, stats = asyncio.run(scenario())
+    assert job["result"] == {"bedrag": 5000}
+    assert stats["done"] == 1 and stats["completed"] == 1
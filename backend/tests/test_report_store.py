@@ -0,0 +1,92 @@
+# backend/tests/test_report_store.py
+import gzip
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.services.report_store import REPORT_CACHE_CONTROL, TEMP_PREFIX, ReportStaticFiles, ReportStore
+
+def test_identical_report_is_rendered_once(tmp_path):
+    store = ReportStore(directory=str(tmp_path))
+    renders = []
+
+    def render():
+        renders.append(1)
+        return "<html>rapport</html>"
+
+    key = store.key({"bedrag": 50000}, ["dienst_1"])
+    first = store.get_or_create("beleggingsadvies", key, render)
+    second = store.get_or_create("beleggingsadvies", store.key({"bedrag": 50000}, ["dienst_1"]), render)
+
+    assert first == (f"beleggingsadvies_{key}.html", True)
+    assert second == (first[0], False)
+    assert len(renders) == 1
+    assert (store.writes, store.hits) == (1, 1)
+
+def test_write_leaves_only_the_report_and_its_gzip_copy(tmp_path):
+    store = ReportStore(directory=str(tmp_path))
+    filename, _ = store.get_or_create("rapport", "abc", lambda: "<html>inhoud</html>")
+
+    assert sorted(os.listdir(tmp_path)) == [filename, f"{filename}.gz"]
+    assert not any(name.startswith(TEMP_PREFIX) for name in os.listdir(tmp_path))
+    assert gzip.decompress((tmp_path / f"{filename}.gz").read_bytes()) == b"<html>inhoud</html>"
+
+def age(tmp_path, filename: str, seconds: float):
+    then = time.time() - seconds
+    for name in (filename, f"{filename}.gz"):
+        os.utime(tmp_path / name, (then, then))
+
+def test_purge_by_age_removes_gzip_copy_too(tmp_path):
+    store = ReportStore(directory=str(tmp_path), retention_seconds=3600)
+    old, _ = store.get_or_create("rapport", "oud", lambda: "<html>oud</html>")
+    new, _ = store.get_or_create("rapport", "nieuw", lambda: "<html>nieuw</html>")
+    age(tmp_path, old, 2 * 3600)
+
+    assert store.purge() == 1
+    assert sorted(os.listdir(tmp_path)) == [new, f"{new}.gz"]
+
+def test_purge_by_size_removes_oldest_first(tmp_path):
+    store = ReportStore(directory=str(tmp_path), retention_seconds=3600)
+    filenames = []
+    for i in range(3):
+        filename, _ = store.get_or_create("rapport", f"r{i}", lambda i=i: f"<html>{'x' * 5000}{i}</html>")
+        age(tmp_path, filename, 100 * (3 - i))
+        filenames.append(filename)
+    # Plaats voor precies de twee nieuwste rapporten (+ hun .gz)
+    store.max_bytes = sum(os.path.getsize(tmp_path / name) for f in filenames[1:] for name in (f, f"{f}.gz"))
+
+    assert store.purge() == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(name for f in filenames[1:] for name in (f, f"{f}.gz"))
+
+def client_for(tmp_path) -> TestClient:
+    app = Starlette(routes=[Mount("/api/static", ReportStaticFiles(directory=str(tmp_path)))])
+    return TestClient(app)
+
+def test_static_mount_serves_gzip_copy_with_immutable_caching(tmp_path):
+    store = ReportStore(directory=str(tmp_path))
+    filename, _ = store.get_or_create("rapport", "abc", lambda: "<html>" + "inhoud " * 500 + "</html>")
+    client = client_for(tmp_path)
+
+    response = client.get(f"/api/static/{filename}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == REPORT_CACHE_CONTROL
+    assert response.headers["content-length"] == str(os.path.getsize(tmp_path / f"{filename}.gz"))
+    assert response.text.startswith("<html>inhoud")
+
+    plain = client.get(f"/api/static/{filename}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["cache-control"] == REPORT_CACHE_CONTROL
+
+def test_static_mount_returns_304_on_matching_etag(tmp_path):
+    store = ReportStore(directory=str(tmp_path))
+    filename, _ = store.get_or_create("rapport", "abc", lambda: "<html>inhoud</html>")
+    client = client_for(tmp_path)
+
+    etag = client.get(f"/api/static/{filename}", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get(f"/api/static/{filename}", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["cache-control"] == REPORT_CACHE_CONTROL
@@ -0,0 +1,68 @@
+# backend/tests/test_scoring.py
+import random
+from typing import Any, List
+
+import pytest
+
+from app.utils.scoring import calculate_percentile_scores, calculate_percentile_scores_batch
+
+def legacy_percentile_scores(values: List[Any], reverse: bool = False) -> List[int]:
+    """De oorspronkelijke per-element implementatie (sorted + list.index), als referentie"""
+    valid_values = [val for val in values if val is not None and isinstance(val, (int, float))]
+    if not valid_values:
+        return [None] * len(values)
+
+    sorted_values = sorted(valid_values, reverse=reverse)
+    scores = [None] * len(values)
+    for i, val in enumerate(values):
+        if val is not None and isinstance(val, (int, float)):
+            if reverse:
+                rank = sorted_values.index(val)
+            else:
+                rank = len(sorted_values) - 1 - sorted_values[::-1].index(val)
+            percentile = rank / (len(sorted_values) - 1) if len(sorted_values) > 1 else 0.5
+            scores[i] = max(1, min(10, int(percentile * 9) + 1))
+    return scores
+
+def random_column(rng: random.Random, n: int) -> List[Any]:
+    """Waarden uit een kleine pool (veel ties), met None en een niet-numerieke waarde ertussen"""
+    pool = [round(rng.uniform(-50, 3000), 2) for _ in range(max(1, n // 4))] + [0, 1, 2.5]
+    column = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.15:
+            column.append(None)
+        elif roll < 0.18:
+            column.append("n.v.t.")
+        else:
+            column.append(rng.choice(pool))
+    return column
+
+@pytest.mark.parametrize("seed", range(50))
+@pytest.mark.parametrize("reverse", [True, False])
+def test_matches_legacy_on_random_inputs(seed, reverse):
+    rng = random.Random(seed)
+    values = random_column(rng, rng.randint(0, 300))
+    assert calculate_percentile_scores(values, reverse=reverse) == legacy_percentile_scores(values, reverse=reverse)
+
+@pytest.mark.parametrize("values", [
+    [],
+    [None, None],
+    [42],
+    [None, 7, None],
+    [5, 5, 5, 5],
+    [1, 2, 2, 3, None, 3, 3],
+    [0.1, 0.2, 0.30000000000000004, 0.3],
+    [True, 1, 0, False, 2]
+])
+@pytest.mark.parametrize("reverse", [True, False])
+def test_matches_legacy_on_edge_cases(values, reverse):
+    assert calculate_percentile_scores(values, reverse=reverse) == legacy_percentile_scores(values, reverse=reverse)
+
+def test_batch_equals_separate_calls():
+    rng = random.Random(123)
+    tco, rendement = random_column(rng, 200), random_column(rng, 200)
+    assert calculate_percentile_scores_batch([(tco, True), (rendement, False)]) == [
+        legacy_percentile_scores(tco, reverse=True),
+        legacy_percentile_scores(rendement, reverse=False)
+    ]
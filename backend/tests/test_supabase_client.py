@@ -0,0 +1,52 @@
+# backend/tests/test_supabase_client.py
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+
+from app.core.supabase_client import SupabaseClient, parse_content_range_total
+
+ROWS = [{"dienst_id": i} for i in range(25)]
+
+def fake_postgrest(max_rows: int, requests: list):
+    """PostgREST stub: sorteert op order, kapt af op max_rows en meldt het totaal bij Prefer: count=exact"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = {k: v[0] for k, v in parse_qs(request.url.query.decode()).items()}
+        requests.append(params)
+        rows = sorted(ROWS, key=lambda r: r["dienst_id"]) if params.get("order") == "dienst_id.asc" else ROWS[::-1]
+        offset, limit = int(params["offset"]), min(int(params["limit"]), max_rows)
+        page = rows[offset:offset + limit]
+        headers = {}
+        if request.headers.get("prefer") == "count=exact":
+            headers["content-range"] = f"{offset}-{offset + len(page) - 1}/{len(ROWS)}"
+        return httpx.Response(206 if headers else 200, json=page, headers=headers)
+    return handler
+
+def select_all(max_rows: int, page_size: int):
+    async def scenario():
+        requests = []
+        client = SupabaseClient()
+        client._client = httpx.AsyncClient(base_url="http://test/rest/v1",
+                                           transport=httpx.MockTransport(fake_postgrest(max_rows, requests)))
+        try:
+            return await client.select_all("kosten", order="dienst_id.asc", page_size=page_size), requests
+        finally:
+            await client.close()
+    return asyncio.run(scenario())
+
+def test_pages_are_ordered():
+    rows, requests = select_all(max_rows=1000, page_size=10)
+    assert rows == ROWS
+    assert all(params["order"] == "dienst_id.asc" for params in requests)
+    assert len(requests) == 3
+
+def test_server_max_rows_below_page_size_does_not_truncate():
+    rows, requests = select_all(max_rows=7, page_size=10)
+    assert rows == ROWS
+    assert len(requests) == 4
+
+def test_content_range_total():
+    assert parse_content_range_total("0-999/12345") == 12345
+    assert parse_content_range_total("*/0") == 0
+    assert parse_content_range_total("0-9/*") is None
+    assert parse_content_range_total(None) is None
@@ -0,0 +1,62 @@
+# backend/tests/test_templates.py
+# HTML fallback van /generate-report via stream_template: een template fout mag geen afgekapte 200 geven
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.reports import router
+from app.services import report_generator as report_generator_module
+from app.utils import templates
+from app.utils.templates import prefetch
+
+BODY = {"user_data": {"bedrag": 50000}, "matches": [{"name": "Test Bank", "matchScore": 85}], "claude_analysis": "analyse"}
+
+def fake_template(chunks):
+    """Template.generate() stub: levert de chunks en gooit bij een Exception"""
+    def generate(**context):
+        for chunk in chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    return SimpleNamespace(generate=generate)
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(report_generator_module, "WEASYPRINT_AVAILABLE", False)
+    app = FastAPI()
+    app.include_router(router, prefix="/api/reports")
+    return TestClient(app)
+
+def test_streams_complete_report(client, monkeypatch):
+    monkeypatch.setattr(templates, "get_template", lambda name: fake_template(["<html>", "rapport", "</html>"]))
+    response = client.post("/api/reports/generate-report", json=BODY)
+    assert response.status_code == 200
+    assert response.text == "<html>rapport</html>"
+
+def test_template_error_before_the_headers_is_a_500(client, monkeypatch):
+    chunks = ["<html>", "x" * 1000, ValueError("'user_profile' is undefined")]
+    monkeypatch.setattr(templates, "get_template", lambda name: fake_template(chunks))
+    response = client.post("/api/reports/generate-report", json=BODY)
+    assert response.status_code == 500
+    assert "user_profile" in response.json()["detail"]
+
+def test_template_error_after_the_buffer_aborts_the_response(client, monkeypatch):
+    chunks = ["<html>", "x" * templates.STREAM_TEMPLATE_BUFFER_CHARS, ValueError("'user_profile' is undefined")]
+    monkeypatch.setattr(templates, "get_template", lambda name: fake_template(chunks))
+    # De server breekt de stream af (geen afsluitende chunk): nooit een volledige 200
+    with pytest.raises(ValueError):
+        client.post("/api/reports/generate-report", json=BODY)
+
+def test_prefetch_renders_until_the_buffer_is_full():
+    pulled = []
+
+    def chunks():
+        for i in range(10):
+            pulled.append(i)
+            yield "abc"
+
+    stream = prefetch(chunks(), buffer_chars=7)
+    assert pulled == [0, 1, 2]
+    assert "".join(stream) == "abc" * 10
@@ -0,0 +1,42 @@
+# backend/tests/test_text_analyzer.py
+import pytest
+
+from app.services.text_analyzer import LocalTextAnalyzer
+
+@pytest.fixture
+def analyzer():
+    return LocalTextAnalyzer()
+
+# Vergelijkingen en "geen <criterium>" zijn niet eenduidig naar één belangrijkheid te vertalen: LLM pad
+@pytest.mark.parametrize("text", [
+    "kosten zijn belangrijker dan rendement",
+    "geen kosten",
+    "absoluut geen kosten",
+    "zonder kosten",
+    "rendement is niet het belangrijkste",
+    "rendement is het belangrijkste",
+    "duurzaamheid is minder belangrijk",
+    "liever duurzaam dan rendement",
+    "meer rendement dan kosten"
+])
+def test_ambiguous_phrases_go_to_the_llm(analyzer, text):
+    assert analyzer.analyze(text, {"kosten_belangrijkheid": "belangrijk"}) is None
+    assert analyzer.stats()["llm"] == 1
+
+@pytest.mark.parametrize("text,expected", [
+    ("kosten zijn niet belangrijk", {"kosten": "geen_voorkeur"}),
+    ("geen hoge kosten", {"kosten": "belangrijk"}),
+    ("duurzaamheid is heel belangrijk", {"duurzaamheid": "heel_belangrijk"}),
+    ("ik wil meer rendement", {"rendement": "heel_belangrijk"})
+])
+def test_unambiguous_criteria_stay_local(analyzer, text, expected):
+    result = analyzer.analyze(text, {})
+    assert result["preference_updates"] == expected
+    assert result["analysis_path"] == "local"
+
+@pytest.mark.parametrize("text,expected", [
+    ("geen KBC", ["exclude_banks:KBC"]),
+    ("absoluut Belfius", ["boost_banks:Belfius"])
+])
+def test_bank_preferences_stay_local(analyzer, text, expected):
+    assert analyzer.analyze(text, {})["soft_preferences"] == expected
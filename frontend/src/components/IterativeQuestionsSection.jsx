@@ -50,7 +50,8 @@ const IterativeQuestionsSection = ({
         body: JSON.stringify({
           clarification_id: clarificationId,
           selected_option: selectedOption,
-          preferences: userPreferences
+          preferences: userPreferences,
+          result_id: localStorage.getItem('matchResultId') || undefined
         })
       });
       
@@ -100,7 +101,8 @@ const IterativeQuestionsSection = ({
         },
         body: JSON.stringify({
           text: freeText,
-          preferences: userPreferences || {}
+          preferences: userPreferences || {},
+          result_id: localStorage.getItem('matchResultId') || undefined
         }),
       });
 
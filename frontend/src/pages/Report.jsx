@@ -30,7 +30,10 @@ const Report = () => {
           headers: {
             'Content-Type': 'application/json',
           },
-          body: JSON.stringify(userPreferences),
+          body: JSON.stringify({
+            ...userPreferences,
+            result_id: localStorage.getItem('matchResultId') || undefined
+          }),
         });
         
         console.log("Response status:", response.status);
@@ -60,6 +60,8 @@ const ResultsPage = () => {
             setMatches(data.matches);
             setOriginalMatches(data.matches);
             localStorage.setItem('matchResults', JSON.stringify(data.matches));
+            // Optimized endpoint opent geen match sessie
+            localStorage.removeItem('matchResultId');
             fetchAiInsights(data.matches, userPreferences);
           } else {
             throw new Error("Ongeldig formaat voor matches");
@@ -112,7 +114,8 @@ useEffect(() => {
         },
         body: JSON.stringify({
           ...userPreferences,
-          matches: matches
+          matches: matches,
+          result_id: localStorage.getItem('matchResultId') || undefined
         }),
       });
       
@@ -156,7 +159,8 @@ const handleTextSubmit = async (textInput) => {
     
     const requestBody = {
       text: textInput,
-      preferences: userPreferences
+      preferences: userPreferences,
+      result_id: localStorage.getItem('matchResultId') || undefined
     };
     
     console.log("🔥 FRONTEND: Request body:", requestBody);
@@ -259,7 +263,8 @@ const handleTextRefinement = async ({ updatedPreferences, matches: newMatches, t
         },
         body: JSON.stringify({
           original_preferences: userPreferences,
-          impacts: impacts
+          impacts: impacts,
+          result_id: localStorage.getItem('matchResultId') || undefined
         }),
       });
 
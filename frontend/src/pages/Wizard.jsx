@@ -221,6 +221,7 @@ setQuestionsLoading(false);
     console.log(`Gebruik fallback data vanwege: ${reason}`);
     localStorage.setItem('matchResults', JSON.stringify(mockMatches));
     localStorage.setItem('userPreferences', JSON.stringify(userAnswers));
+    localStorage.removeItem('matchResultId');
     setIsLoading(false);
     navigate('/results');
   };
@@ -271,6 +272,12 @@ setQuestionsLoading(false);
       
       localStorage.setItem('matchResults', JSON.stringify(data.matches));
       localStorage.setItem('userPreferences', JSON.stringify(userAnswers));
+      // Match sessie: vervolg endpoints hergebruiken hiermee de server-side score matrix
+      if (data.result_id) {
+        localStorage.setItem('matchResultId', data.result_id);
+      } else {
+        localStorage.removeItem('matchResultId');
+      }
       
       setIsLoading(false);
       navigate('/results');